@@ -31,27 +31,59 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'web.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so it only sees the view's queries; removes itself when NPLUSONE_MODE is "off"
+    'web.nplusone.NPlusOneMiddleware',
+]
+
+# N+1 detection (web.nplusone): a query shape repeated NPLUSONE_THRESHOLD
+# times in one request is a logged warning with the stack of the loop
+# ("log", the default with DEBUG), an error ("raise", which the tests use
+# through NPlusOneTestMixin; set it explicitly to fail requests in
+# development), or not checked ("off", the default without DEBUG)
+NPLUSONE_MODE = config("NPLUSONE_MODE", default="log" if DEBUG else "off")
+NPLUSONE_THRESHOLD = config("NPLUSONE_THRESHOLD", default=10, cast=int)
+
+# Response compression (web.middleware.CompressionMiddleware); brotli is
+# used when the package is installed and the client accepts it, except for
+# HTML, which stays on gzip with its random BREACH padding
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)
+COMPRESSION_CONTENT_TYPES = [
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
 ]
 
 ROOT_URLCONF = 'food.urls'
 
+# Templates are parsed once per process and kept by the cached loader
+# (Django also reloads them on change while DEBUG is on)
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -81,6 +113,62 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The shared backend must be visible to every worker process so that the
+# data version bumped on order writes invalidates all of them.
+
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / "cache")),
+    },
+    # Used by {% cache %}. Fragment keys carry a version of the data they
+    # show, so a per-process cache is safe as long as every write that
+    # changes a fragment also changes its version: bulk .update() calls on
+    # orders must set updated_at themselves (auto_now only runs on save()).
+    "template_fragments": {
+        "BACKEND": config("FRAGMENT_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": "template-fragments",
+        "OPTIONS": {"MAX_ENTRIES": config("FRAGMENT_CACHE_MAX_ENTRIES", default=5000, cast=int)},
+    },
+    # Kept apart from "default" so aggregate churn never evicts sessions
+    "sessions": {
+        "BACKEND": config("SESSION_CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("SESSION_CACHE_LOCATION", default=str(BASE_DIR / "cache" / "sessions")),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": config("SESSION_CACHE_MAX_ENTRIES", default=5000, cast=int)},
+    },
+}
+
+AGGREGATE_CACHE_ALIAS = "default"
+AGGREGATE_CACHE_TIMEOUT = config("AGGREGATE_CACHE_TIMEOUT", default=300, cast=int)
+AGGREGATE_CACHE_LRU_SIZE = config("AGGREGATE_CACHE_LRU_SIZE", default=256, cast=int)
+# Lifetime of cached template fragments; their keys carry a version of the
+# data they show, so this only bounds storage. 0 disables fragment caching.
+FRAGMENT_CACHE_TIMEOUT = config("FRAGMENT_CACHE_TIMEOUT", default=86400, cast=int)
+
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# "db" reads django_session on every request, which competes with order
+# writes for the SQLite lock at lunch. "cached_db" serves reads from the
+# "sessions" cache and only writes through on change; "signed_cookies"
+# keeps no server-side state at all (logout cannot revoke a copied cookie).
+# The session cache must be shared by every worker process, otherwise a
+# logout in one worker leaves the session alive in the others.
+
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_STORAGE = config("SESSION_STORAGE", default="db")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORAGE]
+SESSION_CACHE_ALIAS = "sessions"
+SESSION_CLEANUP_BATCH_SIZE = config("SESSION_CLEANUP_BATCH_SIZE", default=1000, cast=int)
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -101,6 +189,65 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# The preferred hasher comes first; the others stay listed so existing
+# hashes still verify and are upgraded on the next login. Argon2 needs the
+# argon2-cffi package. Cost defaults match Django's own.
+
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="pbkdf2")
+_PASSWORD_HASHERS = {
+    "pbkdf2": "web.hashers.PBKDF2PasswordHasher",
+    "scrypt": "web.hashers.ScryptPasswordHasher",
+    "argon2": "web.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = config("PASSWORD_PBKDF2_ITERATIONS", default=1_000_000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config("PASSWORD_SCRYPT_WORK_FACTOR", default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config("PASSWORD_SCRYPT_BLOCK_SIZE", default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config("PASSWORD_SCRYPT_PARALLELISM", default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config("PASSWORD_ARGON2_TIME_COST", default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config("PASSWORD_ARGON2_MEMORY_COST", default=102400, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config("PASSWORD_ARGON2_PARALLELISM", default=8, cast=int)
+
+# Login governor: token buckets in the shared cache that cap how often a
+# client IP or a username may make the server hash a password (login and
+# registration). The username bucket is the real limit: it stops hammering
+# of one account. The IP bucket is only a loose backstop against spraying
+# many usernames, because the whole canteen logs in from one NAT address:
+# about 300 staff within a few minutes of the 12:55 slot opening, plus typos.
+
+LOGIN_IP_BURST = config("LOGIN_IP_BURST", default=1000, cast=int)
+LOGIN_IP_REFILL_PER_SECOND = config("LOGIN_IP_REFILL_PER_SECOND", default=10.0, cast=float)
+LOGIN_USERNAME_BURST = config("LOGIN_USERNAME_BURST", default=5, cast=int)
+LOGIN_USERNAME_REFILL_PER_SECOND = config("LOGIN_USERNAME_REFILL_PER_SECOND", default=0.1, cast=float)
+
+
+# Pre-orders: staff may order for any of the next PREORDER_DAYS days that
+# an active MenuTimeSlot covers. Category.daily_capacity caps each day
+# (web.capacity).
+
+PREORDER_DAYS = config("PREORDER_DAYS", default=7, cast=int)
+
+
+# Order ingestion: "direct" writes carts to web_order in the request;
+# "journal" appends them to a local WAL journal, answers 202 and leaves
+# the inserts to the drain_orders command (web.journal, food-drain.service).
+
+ORDER_INGESTION = config("ORDER_INGESTION", default="direct")
+ORDER_JOURNAL_PATH = config("ORDER_JOURNAL_PATH", default=str(BASE_DIR / "order-journal.sqlite3"))
+ORDER_JOURNAL_BATCH_SIZE = config("ORDER_JOURNAL_BATCH_SIZE", default=500, cast=int)
+
+
+# Idempotency keys: POSTs that change orders or payments and carry an
+# Idempotency-Key header store their response this many seconds in the
+# shared cache; a retried request gets it back unchanged (web.idempotency).
+
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=86400, cast=int)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -147,6 +294,26 @@ STATIC_FILE_ROOT = BASE_DIR / "static"
 STATICFILES_DIRS = ((BASE_DIR / "static"),)
 STATIC_ROOT = BASE_DIR / "assets"
 
+# Outside DEBUG, collectstatic writes content-hashed, minified and
+# precompressed copies to STATIC_ROOT (web.storage); Apache serves them
+# with far-future immutable cache headers. Run collectstatic on deploy.
+STATIC_MANIFEST = config("STATIC_MANIFEST", default=not DEBUG, cast=bool)
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "web.storage.CompressedManifestStaticFilesStorage"
+            if STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
+# Widths of the resized category images served through srcset (web.images)
+CATEGORY_IMAGE_WIDTHS = [160, 320, 640]
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -154,6 +321,10 @@ STATIC_ROOT = BASE_DIR / "assets"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Authentication settings
+AUTHENTICATION_BACKENDS = [
+    'web.auth.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 # LOGIN_URL = '/management/login/'  # Let each app handle its own login
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -4,9 +4,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.contrib.auth.models import User
 from web.models import Category, Order, UserProfile
+from web.auth import get_role, role_required
+from web.idempotency import idempotent
+from web.throttle import password_attempt_delay
+from web.streaming import columns_document, document, json_stream_response, stream_rows, wants_columns
 import json
 
 def register(request):
@@ -25,6 +30,11 @@ def register(request):
             messages.error(request, 'Username already exists!')
             return render(request, 'kitchen/register.html')
         
+        delay = password_attempt_delay(request)
+        if delay:
+            messages.error(request, f'Too many attempts. Please try again in {delay} seconds.')
+            return render(request, 'kitchen/register.html', status=429)
+        
         # Create user
         user = User.objects.create_user(
             username=username,
@@ -49,9 +59,14 @@ def kitchen_login(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         
+        delay = password_attempt_delay(request, username)
+        if delay:
+            messages.error(request, f'Too many login attempts. Please try again in {delay} seconds.')
+            return render(request, 'kitchen/login.html', status=429)
+        
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            if hasattr(user, 'profile') and user.profile.role == 'kitchen':
+            if get_role(user) == 'kitchen':
                 login(request, user)
                 return redirect('kitchen:home')
             else:
@@ -68,16 +83,13 @@ def kitchen_logout(request):
     return redirect('kitchen:login')
 
 @login_required
+@role_required('kitchen', redirect_to='kitchen:login')
 def home(request):
     """Kitchen home page - shows today's orders by category"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'kitchen':
-        messages.error(request, 'Access denied.')
-        return redirect('kitchen:login')
-    
     today = timezone.now().date()
     
     # Get orders for today grouped by category
-    today_orders = Order.objects.filter(date=today).select_related('category', 'user')
+    today_orders = Order.objects.filter(date=today).for_listing()
     
     # Group orders by category
     categories_with_orders = {}
@@ -100,14 +112,11 @@ def home(request):
     return render(request, 'kitchen/orderlist.html', context)
 
 @login_required
+@role_required('kitchen', redirect_to='kitchen:login')
 def order_list(request):
     """Detailed order list page"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'kitchen':
-        messages.error(request, 'Access denied.')
-        return redirect('kitchen:login')
-    
     today = timezone.now().date()
-    orders = Order.objects.filter(date=today).select_related('category', 'user').order_by('created_at')
+    orders = Order.objects.filter(date=today).for_listing().order_by('created_at')
     
     context = {
         'orders': orders,
@@ -116,44 +125,70 @@ def order_list(request):
     return render(request, 'kitchen/orderlist.html', context)
 
 # API Views
+TODAY_ORDER_FIELDS = ('id', 'category', 'user', 'created_at')
+
+def _add_to_group(group, row, totals):
+    """Add one category-ordered row; returns (current group, finished group or None)"""
+    order_id, category_name, user_name, created_at = row
+    finished = None
+    if group is None or group['category'] != category_name:
+        finished = group
+        group = {'category': category_name, 'count': 0, 'orders': []}
+    group['count'] += 1
+    group['orders'].append({
+        'id': order_id,
+        'user': user_name,
+        'created_at': created_at,
+    })
+    totals['total_orders'] += 1
+    return group, finished
+
+def _group_by_category(rows, totals):
+    """Fold category-ordered rows into one dict per category"""
+    group = None
+    for row in rows:
+        group, finished = _add_to_group(group, row, totals)
+        if finished is not None:
+            yield finished
+    if group is not None:
+        yield group
+
+async def _agroup_by_category(rows, totals):
+    """Async variant of _group_by_category()"""
+    group = None
+    async for row in rows:
+        group, finished = _add_to_group(group, row, totals)
+        if finished is not None:
+            yield finished
+    if group is not None:
+        yield group
+
 @login_required
-def get_today_orders(request):
+@role_required('kitchen')
+async def get_today_orders(request):
     """API endpoint to get today's orders"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'kitchen':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     today = timezone.now().date()
-    orders = Order.objects.filter(date=today).select_related('category', 'user')
+    rows = stream_rows(request, Order.objects.filter(date=today).annotate(
+        user_name=Coalesce(NullIf('user__first_name', Value('')), 'user__username')
+    ).order_by('category__name', '-created_at').values_list(
+        'id', 'category__name', 'user_name', 'created_at'
+    ))
     
-    # Group by category
-    categories_data = {}
-    for order in orders:
-        category_name = order.category.name
-        if category_name not in categories_data:
-            categories_data[category_name] = {
-                'category': category_name,
-                'count': 0,
-                'orders': []
-            }
-        
-        categories_data[category_name]['count'] += 1
-        categories_data[category_name]['orders'].append({
-            'id': order.id,
-            'user': order.user.first_name or order.user.username,
-            'created_at': order.created_at.isoformat(),
-        })
+    if wants_columns(request):
+        return json_stream_response(columns_document(TODAY_ORDER_FIELDS, rows))
     
-    return JsonResponse({
-        'categories': list(categories_data.values()),
-        'total_orders': orders.count()
-    })
+    # Group by category while streaming; the total goes after the list
+    totals = {'total_orders': 0}
+    group = _agroup_by_category if hasattr(rows, '__aiter__') else _group_by_category
+    return json_stream_response(document(
+        'categories', group(rows, totals), trailer=lambda: totals
+    ))
 
 @login_required
+@role_required('kitchen')
+@idempotent
 def update_order_status(request):
     """API endpoint to update order status"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'kitchen':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -1,3 +1,189 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from web.cache import get_data_version, user_orders_version_key
+from web.capacity import reserve
+from web.models import BillReport, Category, DailyCapacity, DailyOrderSummary, Order
+from web.nplusone import NPlusOneTestMixin
+from web.testing import LOCMEM_CACHES, CacheResetMixin, create_user
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DeleteOrdersTests(CacheResetMixin, TestCase):
+    """delete_orders keeps the derived state of the day in step with the deleted orders"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.manager = create_user('manager', role='manager')
+        cls.staff = [create_user(f'staff{index}') for index in range(3)]
+        cls.limited = Category.objects.create(name='Lunch', price=30, daily_capacity=3)
+        cls.unlimited = Category.objects.create(name='Tea', price=20)
+
+        cls.deleted = []
+        for user in cls.staff[:2]:
+            reserve(cls.limited.id, cls.today, cls.limited.daily_capacity)
+            cls.deleted.append(Order.objects.create(user=user, category=cls.limited, date=cls.today, price=30).id)
+        Order.objects.create(user=cls.staff[0], category=cls.unlimited, date=cls.today, price=20, status='completed')
+        Order.objects.create(user=cls.staff[1], category=cls.unlimited, date=cls.today, price=20)
+        Order.objects.create(user=cls.staff[2], category=cls.unlimited, date=cls.today, price=20)
+        BillReport.objects.create(user=cls.staff[0], date=cls.today, completed_amount=0, pending_amount=50, balance=50)
+
+    def delete_orders(self, order_ids):
+        self.client.force_login(self.manager)
+        return self.client.post(
+            reverse('management:delete_orders'),
+            json.dumps({'order_ids': order_ids, 'date': self.today.isoformat()}),
+            content_type='application/json',
+        )
+
+    def test_bulk_delete_refreshes_derived_state(self):
+        versions = [get_data_version(user_orders_version_key(user.id)) for user in self.staff]
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 1)
+
+        response = self.delete_orders(self.deleted)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted_count'], 2)
+        self.assertFalse(Order.objects.filter(id__in=self.deleted).exists())
+
+        summary = DailyOrderSummary.objects.get(date=self.today)
+        self.assertEqual((summary.order_count, summary.total_amount), (3, Decimal(60)))
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 3)
+
+        reports = {
+            report.user_id: (report.completed_amount, report.pending_amount, report.balance)
+            for report in BillReport.objects.filter(date=self.today)
+        }
+        self.assertEqual(reports, {
+            self.staff[0].id: (Decimal(20), Decimal(0), Decimal(0)),
+            self.staff[1].id: (Decimal(0), Decimal(20), Decimal(20)),
+        })
+
+        # Only the owners of the deleted orders get a new orders version
+        self.assertNotEqual(get_data_version(user_orders_version_key(self.staff[0].id)), versions[0])
+        self.assertNotEqual(get_data_version(user_orders_version_key(self.staff[1].id)), versions[1])
+        self.assertEqual(get_data_version(user_orders_version_key(self.staff[2].id)), versions[2])
+
+    def test_orders_of_another_date_are_not_deleted(self):
+        other = Order.objects.create(user=self.staff[2], category=self.limited, date=self.today - timedelta(days=1), price=30)
+        response = self.delete_orders([other.id])
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Order.objects.filter(id=other.id).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ManagementQueryTests(NPlusOneTestMixin, CacheResetMixin, TestCase):
+    """Manager pages over many staff members run no per-row query loops"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.manager = create_user('manager', role='manager')
+        category = Category.objects.create(name='Lunch', price=30)
+        cls.orders = []
+        for index in range(15):
+            user = create_user(f'staff{index}', first_name=f'Staff {index}')
+            for days_ago in range(2):
+                cls.orders.append(Order.objects.create(
+                    user=user, category=category, date=cls.today - timedelta(days=days_ago), price=30,
+                ))
+            BillReport.objects.create(user=user, date=cls.today)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.manager)
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_staff_pages(self):
+        self.get(reverse('management:staff_list'))
+        self.get(reverse('management:bill_report'))
+        self.get(reverse('management:staff_data'))
+
+    def test_export_staff_pdf(self):
+        response = self.get(reverse('management:export_staff_pdf'))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_delete_orders(self):
+        order_ids = [order.id for order in self.orders if order.date == self.today]
+        response = self.client.post(
+            reverse('management:delete_orders'),
+            json.dumps({'order_ids': order_ids, 'date': self.today.isoformat()}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['deleted_count'], 15)
+        self.assertFalse(Order.objects.filter(date=self.today).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StaffSearchTests(CacheResetMixin, TestCase):
+    """The staff list searches names through the staff search API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = create_user('manager', role='manager')
+        cls.zoe = create_user('s1', first_name='Zoë', last_name='Person')
+        create_user('s2', first_name='Adam')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.manager)
+
+    def test_staff_list_links_the_search_api(self):
+        response = self.client.get(reverse('management:staff_list'))
+        self.assertContains(response, f'data-staff-search-url="{reverse("management:staff_search")}"')
+        self.assertContains(response, f'data-staff-id="{self.zoe.id}"')
+
+    def test_search_matches_names_without_accents(self):
+        for query in ('zoe', 'ZOE PERS', 'person'):
+            response = self.client.get(reverse('management:staff_search'), {'q': query})
+            self.assertEqual([result['id'] for result in response.json()['results']], [self.zoe.id])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, FRAGMENT_CACHE_TIMEOUT=3600)
+class MemberDetailFragmentTests(CacheResetMixin, TestCase):
+    """The cached order history follows payments recorded in bulk"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.manager = create_user('manager', role='manager')
+        cls.staff = create_user('staff')
+        category = Category.objects.create(name='Lunch', price=30)
+        for days_ago in range(2):
+            Order.objects.create(user=cls.staff, category=category, date=cls.today - timedelta(days=days_ago), price=30)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.manager)
+
+    def member_detail(self):
+        return self.client.get(reverse('management:member_detail', args=[self.staff.id]))
+
+    def test_mark_all_completed_re_renders_the_history(self):
+        self.assertContains(self.member_detail(), 'status-pending', count=2)
+        response = self.client.post(
+            reverse('management:update_payment'),
+            json.dumps({'user_id': self.staff.id, 'mark_all_completed': True}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.member_detail()
+        self.assertNotContains(response, 'status-pending')
+        self.assertContains(response, 'status-completed', count=2)
+
+    def test_status_change_without_updated_at_re_renders_the_history(self):
+        self.assertContains(self.member_detail(), 'status-pending', count=2)
+        Order.objects.filter(user=self.staff).update(status='completed')
+        self.assertNotContains(self.member_detail(), 'status-pending')
@@ -17,7 +17,9 @@ urlpatterns = [
     
     # API endpoints
     path('api/bill-data/', views.get_bill_data, name='bill_data'),
+    path('api/bill-summary/', views.get_bill_summary, name='bill_summary'),
     path('api/staff-data/', views.get_staff_data, name='staff_data'),
+    path('api/staff-search/', views.staff_search, name='staff_search'),
     path('api/update-payment/', views.update_payment, name='update_payment'),
     
     # Export endpoints
@@ -28,6 +30,7 @@ urlpatterns = [
     path('order-management/', views.order_management, name='order_management'),
     path('order-detail/', views.order_detail, name='order_detail'),
     path('api/orders-by-date/', views.get_orders_by_date, name='get_orders_by_date'),
+    path('api/calendar-summary/', views.get_calendar_summary, name='calendar_summary'),
     path('api/delete-orders/', views.delete_orders, name='delete_orders'),
     
     # Time slot management
@@ -4,9 +4,21 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.db.models import Sum, Count, Max, Q
 from django.contrib.auth.models import User
-from web.models import Category, Order, UserProfile, BillReport, MenuTimeSlot
+from django.conf import settings
+from django.db import transaction
+from web.models import Category, Order, UserProfile, BillReport, MenuTimeSlot, DailyOrderSummary
+from web.cache import cached_aggregate, acached_aggregate, bump_data_version, bump_user_orders_version, get_data_version, fragment_version
+from web.auth import get_role, role_required
+from web.idempotency import idempotent
+from web.throttle import password_attempt_delay
+from web.search import search_user_ids
+from web.signals import batched_order_deletes
+from web.stats import annotate_order_totals
+from web.streaming import iter_document, columns_document, member_encoder, wants_columns, json_stream_response
 import json
 from datetime import datetime, timedelta
 from reportlab.lib.pagesizes import letter, A4
@@ -15,9 +27,19 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 
 def management_login_required(view_func):
     """Custom decorator for management authentication"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if not user.is_authenticated:
+                return redirect('management:login')
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+    
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -46,6 +68,11 @@ def register(request):
             messages.error(request, 'Email already exists!')
             return render(request, 'management/register.html')
         
+        delay = password_attempt_delay(request)
+        if delay:
+            messages.error(request, f'Too many attempts. Please try again in {delay} seconds.')
+            return render(request, 'management/register.html', status=429)
+        
         # Create user
         user = User.objects.create_user(
             username=username,
@@ -71,9 +98,14 @@ def manager_login(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         
+        delay = password_attempt_delay(request, username)
+        if delay:
+            messages.error(request, f'Too many login attempts. Please try again in {delay} seconds.')
+            return render(request, 'management/login.html', status=429)
+        
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            if hasattr(user, 'profile') and user.profile.role == 'manager':
+            if get_role(user) == 'manager':
                 login(request, user)
                 return redirect('management:home')
             else:
@@ -89,15 +121,8 @@ def manager_logout(request):
     logout(request)
     return redirect('management:login')
 
-@management_login_required
-def home(request):
-    """Manager home page with dashboard metrics"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
-    today = timezone.now().date()
-    
+def _dashboard_metrics(today):
+    """Compute the manager dashboard counters for the given day"""
     # Get today's statistics
     today_orders = Order.objects.filter(date=today)
     total_orders = today_orders.count()
@@ -116,8 +141,7 @@ def home(request):
     all_orders = Order.objects.all()
     total_balance = all_orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
     
-    context = {
-        'today': today,
+    return {
         'total_orders': total_orders,
         'total_revenue': total_revenue,
         'completed_orders': completed_orders,
@@ -127,16 +151,9 @@ def home(request):
         'pending_orders': pending_orders,
         'total_balance': total_balance,
     }
-    return render(request, 'management/home.html', context)
 
-@management_login_required
-def bill_report(request):
-    """Bill report page with filters"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
-    # Get filter parameters
+def _get_date_range(request):
+    """Resolve the filter, start date and end date of a report request"""
     filter_type = request.GET.get('filter', 'month')
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
@@ -157,59 +174,94 @@ def bill_report(request):
         start_date = today.replace(day=1)
         end_date = today
     
-    # Get orders in date range
+    return filter_type, start_date, end_date
+
+def _bill_summary(start_date, end_date):
+    """Compute the revenue totals for a date range"""
     orders = Order.objects.filter(date__range=[start_date, end_date])
     
-    # Calculate summary statistics
     total_expense = orders.aggregate(Sum('price'))['price__sum'] or 0
-    completed_orders = orders.filter(status='completed')
-    completed_amount = completed_orders.aggregate(Sum('price'))['price__sum'] or 0
-    pending_orders = orders.filter(status__in=['pending', 'confirmed', 'preparing'])
-    pending_amount = pending_orders.aggregate(Sum('price'))['price__sum'] or 0
-    balance = total_expense - completed_amount
+    completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
+    pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
     
-    # Get staff summary
+    return {
+        'total_expense': total_expense,
+        'completed_amount': completed_amount,
+        'pending_amount': pending_amount,
+        'balance': total_expense - completed_amount,
+    }
+
+async def _abill_summary(start_date, end_date):
+    """Async variant of _bill_summary() computed in a single query"""
+    totals = await Order.objects.filter(date__range=[start_date, end_date]).aaggregate(
+        total_expense=Sum('price'),
+        completed_amount=Sum('price', filter=Q(status='completed')),
+        pending_amount=Sum('price', filter=Q(status__in=['pending', 'confirmed', 'preparing'])),
+    )
+    total_expense = totals['total_expense'] or 0
+    completed_amount = totals['completed_amount'] or 0
+    
+    return {
+        'total_expense': total_expense,
+        'completed_amount': completed_amount,
+        'pending_amount': totals['pending_amount'] or 0,
+        'balance': total_expense - completed_amount,
+    }
+
+def _staff_bill_summary(start_date, end_date):
+    """Compute the per-staff totals for a date range"""
     staff_summary = []
-    staff_users = User.objects.filter(profile__role='staff')
-    
-    for staff in staff_users:
-        staff_orders = orders.filter(user=staff)
-        staff_total = staff_orders.aggregate(Sum('price'))['price__sum'] or 0
-        staff_completed = staff_orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-        staff_pending = staff_orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
-        staff_balance = staff_total - staff_completed
-        
-        # Count unique days with orders
-        unique_days = len(set(staff_orders.values_list('date', flat=True)))
+    staff_users = annotate_order_totals(User.objects.filter(profile__role='staff'), start_date, end_date)
+    
+    for staff in staff_users.order_by('id'):
+        staff_total = staff.total_amount or 0
+        staff_completed = staff.completed_amount or 0
         
         staff_summary.append({
-            'user': staff,
-            'total_days': unique_days,
+            'user': {'id': staff.id, 'username': staff.username},
+            'total_days': staff.total_days,
             'total_amount': staff_total,
             'completed_amount': staff_completed,
-            'pending_amount': staff_pending,
-            'balance': staff_balance,
+            'pending_amount': staff.pending_amount or 0,
+            'balance': staff_total - staff_completed,
         })
     
+    return staff_summary
+
+@management_login_required
+@role_required('manager', redirect_to='management:login')
+def home(request):
+    """Manager home page with dashboard metrics"""
+    today = timezone.now().date()
+    metrics = cached_aggregate('dashboard', [today], lambda: _dashboard_metrics(today))
+    context = dict(metrics, today=today)
+    return render(request, 'management/home.html', context)
+
+@management_login_required
+@role_required('manager', redirect_to='management:login')
+def bill_report(request):
+    """Bill report page with filters"""
+    filter_type, start_date, end_date = _get_date_range(request)
+    
+    summary = cached_aggregate('bill-summary', [start_date, end_date], lambda: _bill_summary(start_date, end_date))
+    staff_summary = cached_aggregate('bill-staff', [start_date, end_date], lambda: _staff_bill_summary(start_date, end_date))
+    
     context = {
         'filter_type': filter_type,
         'start_date': start_date,
         'end_date': end_date,
-        'total_revenue': total_expense,
-        'completed_revenue': completed_amount,
-        'pending_revenue': pending_amount,
+        'total_revenue': summary['total_expense'],
+        'completed_revenue': summary['completed_amount'],
+        'pending_revenue': summary['pending_amount'],
         'total_staff': len(staff_summary),
         'staff_summary': staff_summary,
     }
     return render(request, 'management/bill_report.html', context)
 
 @management_login_required
+@role_required('manager', redirect_to='management:login')
 def staff_list(request):
     """Staff list page"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
     # Get search query
     search_query = request.GET.get('search', '').strip()
     
@@ -218,29 +270,19 @@ def staff_list(request):
     
     # Apply search filter if provided
     if search_query:
-        staff_users = staff_users.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(username__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(profile__phone_number__icontains=search_query)
-        )
+        staff_users = staff_users.filter(id__in=search_user_ids(search_query))
     
-    # Get statistics for each staff member
+    # Get statistics for each staff member, all in the same query
     staff_data = []
-    for staff in staff_users:
-        orders = Order.objects.filter(user=staff)
-        total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
-        completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-        pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
+    for staff in annotate_order_totals(staff_users).order_by('id'):
+        total_amount = staff.total_amount or 0
+        completed_amount = staff.completed_amount or 0
+        pending_amount = staff.pending_amount or 0
         balance = total_amount - completed_amount
         
-        # Count unique days with orders
-        unique_days = len(set(orders.values_list('date', flat=True)))
-        
         staff_data.append({
             'user': staff,
-            'total_days': unique_days,
+            'total_days': staff.total_days,
             'total_amount': total_amount,
             'completed_amount': completed_amount,
             'pending_amount': pending_amount,
@@ -254,21 +296,57 @@ def staff_list(request):
     return render(request, 'management/staff_list.html', context)
 
 @management_login_required
+@role_required('manager')
+def staff_search(request):
+    """API endpoint for staff autocomplete, best matches first"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+    
+    user_ids = search_user_ids(query, limit=limit)
+    users = User.objects.filter(id__in=user_ids).values(
+        'id', 'username', 'first_name', 'last_name', 'email', 'profile__phone_number'
+    )
+    users_by_id = {user['id']: user for user in users}
+    
+    results = []
+    for user_id in user_ids:
+        user = users_by_id.get(user_id)
+        if user:
+            results.append({
+                'id': user['id'],
+                'name': user['first_name'] or user['username'],
+                'username': user['username'],
+                'email': user['email'],
+                'phone_number': user['profile__phone_number'] or '',
+            })
+    
+    return JsonResponse({'query': query, 'results': results})
+
+@management_login_required
+@role_required('manager', redirect_to='management:login')
 def member_detail(request, user_id):
     """Individual staff member detail page"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
     staff_user = get_object_or_404(User, id=user_id, profile__role='staff')
     
     # Get all orders for this staff member
-    orders = Order.objects.filter(user=staff_user).order_by('-date')
+    orders = Order.objects.filter(user=staff_user).for_listing().order_by('-date')
     
     # Calculate statistics
-    total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
-    completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-    pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
+    totals = orders.aggregate(
+        total_amount=Sum('price'),
+        completed_amount=Sum('price', filter=Q(status='completed')),
+        pending_amount=Sum('price', filter=Q(status__in=['pending', 'confirmed', 'preparing'])),
+        order_count=Count('id'),
+        completed_count=Count('id', filter=Q(status='completed')),
+        last_updated=Max('updated_at'),
+        category_updated=Max('category__updated_at'),
+    )
+    total_amount = totals['total_amount'] or 0
+    completed_amount = totals['completed_amount'] or 0
+    pending_amount = totals['pending_amount'] or 0
     balance = total_amount - completed_amount
     
     context = {
@@ -278,77 +356,91 @@ def member_detail(request, user_id):
         'completed_amount': completed_amount,
         'pending_amount': pending_amount,
         'balance': balance,
+        # The order history table is only re-rendered when one of these changes;
+        # the status counts also catch writes that bypass updated_at
+        'orders_version': fragment_version(
+            totals['order_count'], totals['completed_count'], totals['completed_amount'],
+            totals['last_updated'], totals['category_updated'],
+        ),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'management/member_detail.html', context)
 
 # API Views
 @management_login_required
-def get_bill_data(request):
+@role_required('manager')
+async def get_bill_data(request):
     """API endpoint to get bill data"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    filter_type = request.GET.get('filter', 'month')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-    
-    today = timezone.now().date()
-    
-    # Set date range
-    if start_date and end_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-    elif filter_type == 'day':
-        start_date = today
-        end_date = today
-    elif filter_type == 'week':
-        start_date = today - timedelta(days=7)
-        end_date = today
-    else:  # month
-        start_date = today.replace(day=1)
-        end_date = today
-    
-    orders = Order.objects.filter(date__range=[start_date, end_date])
-    
-    # Calculate statistics
-    total_expense = orders.aggregate(Sum('price'))['price__sum'] or 0
-    completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-    pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
-    balance = total_expense - completed_amount
+    filter_type, start_date, end_date = _get_date_range(request)
+    summary = await acached_aggregate('bill-summary', [start_date, end_date], lambda: _abill_summary(start_date, end_date))
     
     return JsonResponse({
-        'total_expense': float(total_expense),
-        'completed_amount': float(completed_amount),
-        'pending_amount': float(pending_amount),
-        'balance': float(balance),
+        'total_expense': float(summary['total_expense']),
+        'completed_amount': float(summary['completed_amount']),
+        'pending_amount': float(summary['pending_amount']),
+        'balance': float(summary['balance']),
         'start_date': start_date.isoformat(),
         'end_date': end_date.isoformat(),
     })
 
 @management_login_required
+@role_required('manager')
+def get_bill_summary(request):
+    """API endpoint for the bill report auto-refresh (summary and staff rows)"""
+    filter_type, start_date, end_date = _get_date_range(request)
+    
+    # The payload only changes when the data version does, so the client can
+    # revalidate with If-None-Match and get an empty 304 between writes
+    etag = quote_etag(f'{get_data_version()}-{start_date.isoformat()}-{end_date.isoformat()}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        summary = cached_aggregate('bill-summary', [start_date, end_date], lambda: _bill_summary(start_date, end_date))
+        staff_summary = cached_aggregate('bill-staff', [start_date, end_date], lambda: _staff_bill_summary(start_date, end_date))
+        
+        response = JsonResponse({
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'summary': {
+                'total_revenue': float(summary['total_expense']),
+                'completed_revenue': float(summary['completed_amount']),
+                'pending_revenue': float(summary['pending_amount']),
+                'total_staff': len(staff_summary),
+            },
+            'fields': ['id', 'total_days', 'total_amount', 'completed_amount', 'balance'],
+            'staff': [
+                [
+                    staff['user']['id'],
+                    staff['total_days'],
+                    float(staff['total_amount']),
+                    float(staff['completed_amount']),
+                    float(staff['balance']),
+                ]
+                for staff in staff_summary
+            ],
+        })
+    
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@management_login_required
+@role_required('manager')
 def get_staff_data(request):
     """API endpoint to get staff data"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
-    staff_users = User.objects.filter(profile__role='staff')
+    staff_users = annotate_order_totals(User.objects.filter(profile__role='staff'))
     staff_data = []
     
-    for staff in staff_users:
-        orders = Order.objects.filter(user=staff)
-        total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
-        completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-        pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
+    for staff in staff_users.order_by('id'):
+        total_amount = staff.total_amount or 0
+        completed_amount = staff.completed_amount or 0
+        pending_amount = staff.pending_amount or 0
         balance = total_amount - completed_amount
         
-        # Count unique days with orders
-        unique_days = len(set(orders.values_list('date', flat=True)))
-        
         staff_data.append({
             'id': staff.id,
             'name': staff.first_name or staff.username,
             'email': staff.email,
-            'total_days': unique_days,
+            'total_days': staff.total_days,
             'total_amount': float(total_amount),
             'completed_amount': float(completed_amount),
             'pending_amount': float(pending_amount),
@@ -358,11 +450,10 @@ def get_staff_data(request):
     return JsonResponse({'staff_data': staff_data})
 
 @management_login_required
+@role_required('manager')
+@idempotent
 def update_payment(request):
     """API endpoint to update payment status"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -376,7 +467,10 @@ def update_payment(request):
             if mark_all_completed:
                 # Mark all pending orders as completed
                 orders = Order.objects.filter(user=staff_user, status__in=['pending', 'confirmed', 'preparing'])
-                orders.update(status='completed')
+                # update() skips auto_now, and the cached order fragments are versioned by updated_at
+                orders.update(status='completed', updated_at=timezone.now())
+                bump_data_version()
+                bump_user_orders_version(staff_user.id)
                 
                 return JsonResponse({
                     'success': True, 
@@ -417,7 +511,9 @@ def update_payment(request):
                 
                 # Update the selected orders to completed
                 if orders_to_complete:
-                    Order.objects.filter(id__in=orders_to_complete).update(status='completed')
+                    Order.objects.filter(id__in=orders_to_complete).update(status='completed', updated_at=timezone.now())
+                    bump_data_version()
+                    bump_user_orders_version(staff_user.id)
                 
                 # Create or update BillReport
                 bill_report, created = BillReport.objects.get_or_create(
@@ -449,22 +545,19 @@ def update_payment(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 @management_login_required
+@role_required('manager')
 def export_staff_pdf(request):
     """Export staff list to PDF"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     # Get staff data
-    staff_users = User.objects.filter(profile__role='staff')
+    staff_users = annotate_order_totals(User.objects.filter(profile__role='staff').select_related('profile'))
     staff_data = []
     
-    for staff in staff_users:
-        orders = Order.objects.filter(user=staff)
-        total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
-        completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-        pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
+    for staff in staff_users.order_by('id'):
+        total_amount = staff.total_amount or 0
+        completed_amount = staff.completed_amount or 0
+        pending_amount = staff.pending_amount or 0
         balance = total_amount - completed_amount
-        unique_days = len(set(orders.values_list('date', flat=True)))
+        unique_days = staff.total_days
         
         staff_data.append({
             'name': staff.first_name or staff.username,
@@ -601,15 +694,13 @@ def export_staff_pdf(request):
     return response
 
 @management_login_required
+@role_required('manager')
 def export_member_pdf(request, user_id):
     """Export member detail to PDF"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     staff_user = get_object_or_404(User, id=user_id)
     
     # Get member data
-    orders = Order.objects.filter(user=staff_user).order_by('-date')
+    orders = Order.objects.filter(user=staff_user).for_listing().order_by('-date')
     total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
     completed_amount = orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
     pending_amount = orders.filter(status__in=['pending', 'confirmed', 'preparing']).aggregate(Sum('price'))['price__sum'] or 0
@@ -735,12 +826,26 @@ def export_member_pdf(request, user_id):
     return response
 
 
+def _dates_with_orders(start_date, end_date):
+    """ISO dates in a range that have orders, read from the per-day index"""
+    return [
+        day.isoformat()
+        for day in DailyOrderSummary.objects.filter(
+            date__range=[start_date, end_date]
+        ).values_list('date', flat=True)
+    ]
+
+def _member_card_version(user_data):
+    """Changes with anything a member card on the order pages shows"""
+    return fragment_version(user_data['user'].username, user_data.get('categories'), *(
+        (order.id, order.status, order.price, order.category.name, order.updated_at)
+        for order in user_data['orders']
+    ))
+
 @management_login_required
+@role_required('manager', redirect_to='management:login')
 def order_management(request):
     """Order management page with calendar filtering"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return redirect('management:login')
-    
     # Get date filter from request
     selected_date = request.GET.get('date')
     if selected_date:
@@ -752,7 +857,7 @@ def order_management(request):
         selected_date = timezone.now().date()
     
     # Get orders for selected date
-    orders = Order.objects.filter(date=selected_date).select_related('user', 'category').order_by('user__first_name', 'user__last_name')
+    orders = Order.objects.filter(date=selected_date).for_listing().order_by('user__first_name', 'user__last_name')
     
     # Group orders by user
     orders_by_user = {}
@@ -767,32 +872,65 @@ def order_management(request):
         orders_by_user[user_key]['orders'].append(order)
         orders_by_user[user_key]['total_amount'] += order.price
     
+    for user_data in orders_by_user.values():
+        user_data['version'] = _member_card_version(user_data)
+    
     # Get date range for calendar
     start_date = selected_date - timedelta(days=30)
     end_date = selected_date + timedelta(days=30)
     
     # Get dates with orders for calendar highlighting
-    dates_with_orders = Order.objects.filter(
-        date__range=[start_date, end_date]
-    ).values_list('date', flat=True).distinct()
+    dates_with_orders = _dates_with_orders(start_date, end_date)
     
     context = {
         'selected_date': selected_date,
         'orders_by_user': orders_by_user,
-        'dates_with_orders': list(dates_with_orders),
+        'dates_with_orders': dates_with_orders,
         'start_date': start_date,
         'end_date': end_date,
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     
     return render(request, 'management/order_detail.html', context)
 
 
+ORDERS_BY_DATE_FIELDS = (
+    'id', 'user_id', 'first_name', 'last_name', 'username', 'category', 'price', 'status'
+)
+
+def _group_by_user(rows):
+    """Fold user-ordered order rows into (user_id, group) pairs"""
+    group = None
+    for order_id, user_id, first_name, last_name, username, category_name, price, status in rows:
+        if group is None or group['user']['id'] != user_id:
+            if group is not None:
+                group['total_amount'] = str(group['total_amount'])
+                yield group['user']['id'], group
+            group = {
+                'user': {
+                    'id': user_id,
+                    'first_name': first_name or username,
+                    'last_name': last_name or '',
+                    'username': username
+                },
+                'orders': [],
+                'total_amount': 0
+            }
+        group['orders'].append({
+            'id': order_id,
+            'category': category_name,
+            'price': price,
+            'status': status
+        })
+        group['total_amount'] += price
+    if group is not None:
+        group['total_amount'] = str(group['total_amount'])
+        yield group['user']['id'], group
+
 @management_login_required
+@role_required('manager')
 def get_orders_by_date(request):
     """API endpoint to get orders by date"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     date_str = request.GET.get('date')
     if not date_str:
         return JsonResponse({'error': 'Date parameter required'}, status=400)
@@ -802,43 +940,60 @@ def get_orders_by_date(request):
     except ValueError:
         return JsonResponse({'error': 'Invalid date format'}, status=400)
     
-    orders = Order.objects.filter(date=selected_date).select_related('user', 'category').order_by('user__first_name', 'user__last_name')
+    rows = Order.objects.filter(date=selected_date).order_by(
+        'user__first_name', 'user__last_name', 'user_id'
+    ).values_list(
+        'id', 'user_id', 'user__first_name', 'user__last_name', 'user__username',
+        'category__name', 'price', 'status'
+    ).iterator(chunk_size=2000)
+    
+    if wants_columns(request):
+        return json_stream_response(columns_document(
+            ORDERS_BY_DATE_FIELDS, rows, extra={'date': selected_date.strftime('%Y-%m-%d')}
+        ))
+    
+    return json_stream_response(iter_document(
+        'orders_by_user', _group_by_user(rows), encode=member_encoder, brackets='{}',
+        trailer=lambda: {'date': selected_date.strftime('%Y-%m-%d')},
+    ))
+
+
+@management_login_required
+@role_required('manager')
+def get_calendar_summary(request):
+    """API endpoint with per-day order counts and amounts for one month"""
+    month_str = request.GET.get('month')
+    if month_str:
+        try:
+            start_date = datetime.strptime(month_str, '%Y-%m').date()
+        except ValueError:
+            return JsonResponse({'error': 'Invalid month format'}, status=400)
+    else:
+        start_date = timezone.now().date().replace(day=1)
+    
+    if start_date.month == 12:
+        end_date = start_date.replace(year=start_date.year + 1, month=1) - timedelta(days=1)
+    else:
+        end_date = start_date.replace(month=start_date.month + 1) - timedelta(days=1)
     
-    # Group orders by user
-    orders_by_user = {}
-    for order in orders:
-        user_key = order.user.id
-        if user_key not in orders_by_user:
-            orders_by_user[user_key] = {
-                'user': {
-                    'id': order.user.id,
-                    'first_name': order.user.first_name or order.user.username,
-                    'last_name': order.user.last_name or '',
-                    'username': order.user.username
-                },
-                'orders': [],
-                'total_amount': 0
-            }
-        orders_by_user[user_key]['orders'].append({
-            'id': order.id,
-            'category': order.category.name,
-            'price': float(order.price),
-            'status': order.status
-        })
-        orders_by_user[user_key]['total_amount'] += order.price
+    days = DailyOrderSummary.objects.filter(
+        date__range=[start_date, end_date]
+    ).values_list('date', 'order_count', 'total_amount')
     
     return JsonResponse({
-        'orders_by_user': orders_by_user,
-        'date': selected_date.strftime('%Y-%m-%d')
+        'month': start_date.strftime('%Y-%m'),
+        'days': {
+            day.isoformat(): {'count': order_count, 'amount': float(total_amount)}
+            for day, order_count, total_amount in days
+        },
     })
 
 
 @management_login_required
+@role_required('manager')
+@idempotent
 def delete_orders(request):
     """Delete selected orders and recalculate payments"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -851,45 +1006,51 @@ def delete_orders(request):
             if not date:
                 return JsonResponse({'error': 'Date required'}, status=400)
             
-            # Get orders to delete
-            orders_to_delete = Order.objects.filter(id__in=order_ids, date=date)
+            order_date = datetime.strptime(date, '%Y-%m-%d').date()
             
-            if not orders_to_delete.exists():
-                return JsonResponse({'error': 'No orders found'}, status=404)
-            
-            # Get affected users
-            affected_users = orders_to_delete.values_list('user', flat=True).distinct()
-            
-            # Delete orders
-            deleted_count = orders_to_delete.count()
-            orders_to_delete.delete()
-            
-            # Recalculate BillReport for affected users
-            for user_id in affected_users:
-                user = User.objects.get(id=user_id)
+            with transaction.atomic():
+                # One post_delete per order, whose summary, capacity and cache work
+                # batched_order_deletes() (web.signals) does once per day and user
+                with batched_order_deletes() as deleted:
+                    Order.objects.filter(id__in=order_ids, date=order_date).delete()
                 
-                # Get remaining orders for this user on this date
-                remaining_orders = Order.objects.filter(user=user, date=date)
-                total_amount = remaining_orders.aggregate(Sum('price'))['price__sum'] or 0
-                completed_amount = remaining_orders.filter(status='completed').aggregate(Sum('price'))['price__sum'] or 0
-                pending_amount = total_amount - completed_amount
+                if not deleted:
+                    return JsonResponse({'error': 'No orders found'}, status=404)
+                deleted_count = len(deleted)
                 
-                # Update or create BillReport
-                bill_report, created = BillReport.objects.get_or_create(
-                    user=user,
-                    date=date,
-                    defaults={
-                        'completed_amount': completed_amount,
-                        'pending_amount': pending_amount,
-                        'balance': pending_amount
-                    }
-                )
-                
-                if not created:
-                    bill_report.completed_amount = completed_amount
-                    bill_report.pending_amount = pending_amount
-                    bill_report.balance = pending_amount
-                    bill_report.save()
+                # Recalculate BillReport for affected users from their remaining orders
+                affected_users = {order.user_id for order in deleted}
+                remaining = {
+                    row['user_id']: row
+                    for row in Order.objects.filter(user_id__in=affected_users, date=order_date).values('user_id').annotate(
+                        total_amount=Sum('price'),
+                        completed_amount=Sum('price', filter=Q(status='completed')),
+                    )
+                }
+                bill_reports = {
+                    report.user_id: report
+                    for report in BillReport.objects.filter(user_id__in=affected_users, date=order_date)
+                }
+                new_reports = []
+                for user_id in affected_users:
+                    totals = remaining.get(user_id, {})
+                    completed_amount = totals.get('completed_amount') or 0
+                    pending_amount = (totals.get('total_amount') or 0) - completed_amount
+                    bill_report = bill_reports.get(user_id)
+                    if bill_report is None:
+                        new_reports.append(BillReport(
+                            user_id=user_id,
+                            date=order_date,
+                            completed_amount=completed_amount,
+                            pending_amount=pending_amount,
+                            balance=pending_amount,
+                        ))
+                    else:
+                        bill_report.completed_amount = completed_amount
+                        bill_report.pending_amount = pending_amount
+                        bill_report.balance = pending_amount
+                BillReport.objects.bulk_create(new_reports)
+                BillReport.objects.bulk_update(bill_reports.values(), ['completed_amount', 'pending_amount', 'balance'])
             
             return JsonResponse({
                 'success': True,
@@ -904,12 +1065,9 @@ def delete_orders(request):
 
 
 @management_login_required
+@role_required('manager', redirect_to='management:login')
 def order_detail(request):
     """Order detail page with calendar, search, and daily member list"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
     # Get filters from request
     selected_date = request.GET.get('date')
     search_query = request.GET.get('search', '').strip()
@@ -923,14 +1081,12 @@ def order_detail(request):
         selected_date = timezone.now().date()
     
     # Get orders for selected date
-    orders = Order.objects.filter(date=selected_date).select_related('user', 'category').order_by('user__first_name', 'user__last_name')
+    orders = Order.objects.filter(date=selected_date).for_listing().order_by('user__first_name', 'user__last_name')
     
     # Apply search filter if provided
     if search_query:
         orders = orders.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(user__username__icontains=search_query) |
+            Q(user_id__in=search_user_ids(search_query)) |
             Q(category__name__icontains=search_query)
         )
     
@@ -966,7 +1122,8 @@ def order_detail(request):
     
     # Convert sets to lists for template
     for user_data in orders_by_user.values():
-        user_data['categories'] = list(user_data['categories'])
+        user_data['categories'] = sorted(user_data['categories'])
+        user_data['version'] = _member_card_version(user_data)
     
     # Get date range for calendar (current month)
     today = timezone.now().date()
@@ -977,15 +1134,13 @@ def order_detail(request):
         end_date = start_date.replace(month=start_date.month + 1) - timedelta(days=1)
     
     # Get dates with orders for calendar highlighting
-    dates_with_orders = Order.objects.filter(
-        date__range=[start_date, end_date]
-    ).values_list('date', flat=True).distinct()
+    dates_with_orders = _dates_with_orders(start_date, end_date)
     
     # Get unique members count
     unique_members = len(orders_by_user)
     
     # Get today's orders for quick overview
-    today_orders = Order.objects.filter(date=today).select_related('user', 'category')
+    today_orders = Order.objects.filter(date=today).for_listing()
     today_staff = {}
     today_categories = set()
     
@@ -1009,7 +1164,7 @@ def order_detail(request):
         'selected_date': selected_date,
         'search_query': search_query,
         'orders_by_user': orders_by_user,
-        'dates_with_orders': list(dates_with_orders),
+        'dates_with_orders': dates_with_orders,
         'start_date': start_date,
         'end_date': end_date,
         'total_amount': total_amount,
@@ -1019,18 +1174,16 @@ def order_detail(request):
         'today': today,
         'today_staff': today_staff,
         'today_categories': list(today_categories),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     
     return render(request, 'management/order_detail.html', context)
 
 
 @management_login_required
+@role_required('manager', redirect_to='management:login')
 def time_slot_management(request):
     """Time slot management page"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        messages.error(request, 'Access denied.')
-        return redirect('management:login')
-    
     time_slots = MenuTimeSlot.objects.all().order_by('-created_at')
     
     context = {
@@ -1041,11 +1194,9 @@ def time_slot_management(request):
 
 
 @management_login_required
+@role_required('manager')
 def create_time_slot(request):
     """Create new time slot"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -1104,11 +1255,9 @@ def create_time_slot(request):
 
 
 @management_login_required
+@role_required('manager')
 def update_time_slot(request, slot_id):
     """Update time slot"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     try:
         time_slot = MenuTimeSlot.objects.get(id=slot_id)
     except MenuTimeSlot.DoesNotExist:
@@ -1171,11 +1320,9 @@ def update_time_slot(request, slot_id):
 
 
 @management_login_required
+@role_required('manager')
 def delete_time_slot(request, slot_id):
     """Delete time slot"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'manager':
-        return JsonResponse({'error': 'Access denied'}, status=403)
-    
     try:
         time_slot = MenuTimeSlot.objects.get(id=slot_id)
         time_slot.delete()
@@ -1,3 +1,123 @@
-from django.test import TestCase
+import json
+import re
+from datetime import time, timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from web.catalog import get_day_menu, resolve_menus
+from web.models import Category, Menu, MenuTimeSlot, Order
+from web.testing import LOCMEM_CACHES, CacheResetMixin, create_user, open_ordering
+
+re_catalog_table = re.compile(r'FROM "web_(category|menu)"')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogQueryTests(CacheResetMixin, TestCase):
+    """The day menu loads 100 categories with a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.offered = set()
+        for index in range(100):
+            category = Category.objects.create(name=f'Category {index}', price=10 + index)
+            # Every fifth category has nothing available and must not be offered
+            has_dish = index % 5 != 0
+            Menu.objects.create(category=category, name=f'Dish {index}', is_available=has_dish)
+            Menu.objects.create(category=category, name=f'Off {index}', is_available=False)
+            if has_dish:
+                cls.offered.add(category.id)
+
+        cls.user = create_user('staff')
+        open_ordering(cls.today)
+
+    def test_resolve_menus_loads_catalog_in_two_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            snapshot = resolve_menus(self.today, self.today)[self.today]
+
+        catalog_queries = [query for query in queries if re_catalog_table.search(query['sql'])]
+        self.assertEqual(len(catalog_queries), 2)
+        # The other two load the weekly menu ranges and the custom foods
+        self.assertEqual(len(queries), 4)
+        self.assertEqual(set(snapshot['by_id']), self.offered)
+
+    def test_get_day_menu_is_cached(self):
+        with CaptureQueriesContext(connection) as cold:
+            get_day_menu(self.today)
+        self.assertEqual(len([query for query in cold if re_catalog_table.search(query['sql'])]), 2)
+
+        with self.assertNumQueries(0):
+            snapshot = get_day_menu(self.today)
+        self.assertEqual(set(snapshot['by_id']), self.offered)
+
+    def test_category_change_invalidates_day_menu(self):
+        get_day_menu(self.today)
+        category = Category.objects.get(name='Category 1')
+        category.is_locked = True
+        category.save()
+        self.assertNotIn(category.id, get_day_menu(self.today)['by_id'])
+
+    def test_pages_render_only_available_menus(self):
+        self.client.force_login(self.user)
+        for name in ('orders:home', 'orders:menu'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            categories = response.context['categories']
+            self.assertEqual({category['id'] for category in categories}, self.offered)
+            for category in categories:
+                self.assertEqual([menu['name'] for menu in category['menus']], [category['name'].replace('Category', 'Dish')])
+
+        self.assertContains(response, 'Dish 1')
+        self.assertNotContains(response, 'Off 1<')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PreorderTests(CacheResetMixin, TestCase):
+    """Orders placed for a coming day show up for the staff member who placed them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.tomorrow = cls.today + timedelta(days=1)
+        cls.lunch = Category.objects.create(name='Lunch', price=30)
+        cls.tea = Category.objects.create(name='Tea', price=10)
+        for category in (cls.lunch, cls.tea):
+            Menu.objects.create(category=category, name=f'{category.name} dish')
+        MenuTimeSlot.objects.create(
+            name='All week', start_date=cls.today, end_date=cls.today + timedelta(days=6),
+            start_time=time(0, 0), end_time=time(23, 59, 59),
+        )
+        cls.user = create_user('staff')
+        cls.preorder = Order.objects.create(user=cls.user, category=cls.lunch, date=cls.tomorrow, price=30)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_menu_marks_categories_ordered_for_the_selected_date(self):
+        response = self.client.get(reverse('orders:menu'), {'date': self.tomorrow.isoformat()})
+        self.assertEqual(response.context['order_date'], self.tomorrow)
+        self.assertEqual(response.context['ordered_categories'], {self.lunch.id})
+        self.assertContains(response, 'Ordered</div>', count=1)
+
+        response = self.client.get(reverse('orders:menu'))
+        self.assertEqual(response.context['ordered_categories'], set())
+
+    def test_user_orders_include_upcoming_days(self):
+        Order.objects.create(user=self.user, category=self.tea, date=self.today - timedelta(days=1), price=10)
+        response = self.client.get(reverse('orders:user_orders'))
+        orders = json.loads(b''.join(response))['orders']
+        self.assertEqual(
+            [(order['id'], order['date']) for order in orders],
+            [(self.preorder.id, self.tomorrow.isoformat())],
+        )
+
+    def test_profile_lists_upcoming_preorders(self):
+        response = self.client.get(reverse('orders:profile'), {'filter': 'day'})
+        self.assertEqual(list(response.context['upcoming_orders']), [self.preorder])
+        self.assertNotIn(self.preorder, response.context['orders'])
+        self.assertContains(response, 'Upcoming Pre-orders')
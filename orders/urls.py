@@ -19,6 +19,7 @@ urlpatterns = [
     path('api/categories/', views.get_categories, name='api_categories'),
     path('api/menu/<int:category_id>/', views.get_menu_items, name='api_menu'),
     path('api/place-order/', views.place_order, name='place_order'),
+    path('api/place-orders/', views.place_orders, name='place_orders'),
     path('api/user-orders/', views.get_user_orders, name='user_orders'),
 
     
@@ -4,10 +4,26 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Sum, Count
+from django.db.models import Count
 from django.contrib.auth.models import User
-from web.models import Category, Menu, Order, UserProfile, BillReport, MenuTimeSlot
+from django.db import transaction
+from django.conf import settings
+from web.models import Category, Menu, Order, UserProfile, BillReport, MenuTimeSlot, DailyOrderSummary
+from web.cache import bump_data_version
+from web.catalog import get_day_menu
+from web.capacity import SoldOut, asold_out_ids, release, reserve, sold_out_ids
+from web.stats import user_order_totals
+from web import journal
+from web.auth import get_role, role_required
+from web.idempotency import idempotent
+from web.throttle import password_attempt_delay
+from web.images import FORMATS, srcset
+from asgiref.sync import sync_to_async
+from web.streaming import columns_document, document, json_stream_response, record_encoder, stream_rows, wants_columns
 import json
+import pytz
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import chain
 
 def register(request):
     """Staff registration page"""
@@ -31,6 +47,11 @@ def register(request):
             messages.error(request, 'Email already exists!')
             return render(request, 'orders/register.html')
         
+        delay = password_attempt_delay(request)
+        if delay:
+            messages.error(request, f'Too many attempts. Please try again in {delay} seconds.')
+            return render(request, 'orders/register.html', status=429)
+        
         # Create user
         user = User.objects.create_user(
             username=username,
@@ -57,9 +78,14 @@ def user_login(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         
+        delay = password_attempt_delay(request, username)
+        if delay:
+            messages.error(request, f'Too many login attempts. Please try again in {delay} seconds.')
+            return render(request, 'orders/login.html', status=429)
+        
         user = authenticate(request, username=username, password=password)
         if user is not None:
-            if hasattr(user, 'profile') and user.profile.role == 'staff':
+            if get_role(user) == 'staff':
                 login(request, user)
                 return redirect('orders:home')
             else:
@@ -76,24 +102,19 @@ def user_logout(request):
     return redirect('orders:login')
 
 @login_required
+@role_required('staff', redirect_to='orders:login')
 def home(request):
     """Staff home page - shows today's categories"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'staff':
-        messages.error(request, 'Access denied.')
-        return redirect('orders:login')
-    
     today = timezone.now().date()
     
-    # Get available categories (not locked and have menu items)
-    categories = Category.objects.filter(
-        is_locked=False
-    ).prefetch_related('menus').filter(
-        menus__is_available=True
-    ).distinct()
+    # Today's resolved menu, shared with the menu page
+    categories = get_day_menu(today)['categories']
     
     # Get user's orders for today
     today_orders = Order.objects.filter(user=request.user, date=today)
-    ordered_categories = [order.category.id for order in today_orders]
+    ordered_categories = set(today_orders.values_list('category_id', flat=True))
+    if journal.is_enabled():
+        ordered_categories |= journal.pending_category_ids(request.user.id, today)
     
     context = {
         'categories': categories,
@@ -104,12 +125,9 @@ def home(request):
     return render(request, 'orders/index.html', context)
 
 @login_required
+@role_required('staff', redirect_to='orders:login')
 def menu(request):
     """Menu page with category selection"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'staff':
-        messages.error(request, 'Access denied.')
-        return redirect('orders:login')
-    
     # Check if menu is currently available based on time slots
     from django.utils import timezone as django_timezone
     import pytz
@@ -141,14 +159,30 @@ def menu(request):
                 current_time_slot = time_slot
                 break
     
-    # Get available categories (not locked and have menu items)
-    categories = Category.objects.filter(
-        is_locked=False
-    ).prefetch_related('menus').filter(
-        menus__is_available=True
-    ).distinct()
-    
     today = timezone.now().date()
+    preorder_dates = _preorder_dates(today)
+    
+    # ?date= switches to one of the pre-order days, which have no time window
+    order_date = today
+    if request.GET.get('date'):
+        try:
+            requested_date = date.fromisoformat(request.GET['date'])
+        except ValueError:
+            requested_date = None
+        if requested_date in preorder_dates:
+            order_date = requested_date
+            is_menu_available = True
+    
+    # The day's resolved menu, shared with the home page
+    categories = get_day_menu(order_date)['categories']
+    sold_out = sold_out_ids(order_date, [category['id'] for category in categories])
+    
+    # Categories the user already has for the shown day, pre-orders included
+    ordered_categories = set(Order.objects.filter(
+        user=request.user, date=order_date
+    ).values_list('category_id', flat=True))
+    if journal.is_enabled():
+        ordered_categories |= journal.pending_category_ids(request.user.id, order_date)
     
     # Get user's orders for today
     today_orders = Order.objects.filter(user=request.user, date=today)
@@ -157,6 +191,10 @@ def menu(request):
         'categories': categories,
         'today_orders': today_orders,
         'today': today,
+        'order_date': order_date,
+        'sold_out': sold_out,
+        'ordered_categories': ordered_categories,
+        'preorder_dates': preorder_dates,
         'is_menu_available': is_menu_available,
         'current_time_slot': current_time_slot,
         'active_time_slots': active_time_slots,
@@ -165,12 +203,9 @@ def menu(request):
     return render(request, 'orders/menu.html', context)
 
 @login_required
+@role_required('staff', redirect_to='orders:login')
 def profile(request):
     """User profile page with order history and statistics"""
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'staff':
-        messages.error(request, 'Access denied.')
-        return redirect('orders:login')
-    
     user = request.user
     today = timezone.now().date()
     
@@ -187,27 +222,26 @@ def profile(request):
         start_date = today.replace(day=1)
         end_date = today
     
-    # Get orders in date range
+    # Get orders in date range, with the category names the table shows
     orders = Order.objects.filter(
         user=user,
         date__range=[start_date, end_date]
-    )
+    ).for_listing()
     
-    # Calculate statistics
-    total_amount = orders.aggregate(Sum('price'))['price__sum'] or 0
-    completed_orders = orders.filter(status='completed')
-    completed_amount = completed_orders.aggregate(Sum('price'))['price__sum'] or 0
-    pending_orders = orders.filter(status__in=['pending', 'confirmed', 'preparing'])
-    pending_amount = pending_orders.aggregate(Sum('price'))['price__sum'] or 0
-    balance = total_amount - completed_amount
+    # Pre-orders for the coming days, which no filter's range reaches
+    upcoming_orders = Order.objects.filter(user=user, date__gt=today).for_listing().order_by('date', 'category__name')
+    
+    # Calculate statistics: one query for today, earlier days come from the cache
+    totals = user_order_totals(user.id, start_date, end_date, today)
     
     context = {
         'user': user,
         'orders': orders,
-        'total_amount': total_amount,
-        'completed_amount': completed_amount,
-        'pending_amount': pending_amount,
-        'balance': balance,
+        'upcoming_orders': upcoming_orders,
+        'total_amount': totals['total_amount'],
+        'completed_amount': totals['completed_amount'],
+        'pending_amount': totals['pending_amount'],
+        'balance': totals['balance'],
         'filter_type': filter_type,
         'start_date': start_date,
         'end_date': end_date,
@@ -220,24 +254,31 @@ def terms(request):
 
 # API Views
 @login_required
-def get_categories(request):
+async def get_categories(request):
     """API endpoint to get categories"""
-    # Get available categories (not locked and have menu items)
-    categories = Category.objects.filter(
-        is_locked=False
-    ).prefetch_related('menus').filter(
-        menus__is_available=True
-    ).distinct()
+    # Today's resolved menu decides which categories are offered and at what price
+    today = timezone.now().date()
+    day_menu = await sync_to_async(get_day_menu)(today)
+    sold_out = await asold_out_ids(today, list(day_menu['by_id']))
+    categories = Category.objects.filter(id__in=list(day_menu['by_id'])).order_by('id')
     
     categories_data = []
     
-    for category in categories:
+    async for category in categories:
+        variants = category.image_variants
+        if not category.image or variants.get('source') != category.image.name:
+            variants = {}
         categories_data.append({
             'id': category.id,
             'name': category.name,
-            'price': float(category.price),
+            'price': float(day_menu['by_id'][category.id]['price']),
             'image': category.image.url if category.image else None,
+            # Resized copies for <img srcset>/<picture>; empty until they are built
+            'srcset': {
+                fmt: srcset(variants, fmt, category.image.storage) for fmt in FORMATS
+            } if variants else None,
             'is_locked': category.is_locked,
+            'is_sold_out': category.id in sold_out,
         })
     
     return JsonResponse({'categories': categories_data})
@@ -245,30 +286,75 @@ def get_categories(request):
 @login_required
 def get_menu_items(request, category_id):
     """API endpoint to get menu items for a category"""
-    try:
-        category = Category.objects.get(id=category_id)
-        menu_items = Menu.objects.filter(category=category, is_available=True)
-        
-        menu_data = []
-        for item in menu_items:
-            menu_data.append({
-                'id': item.id,
-                'name': item.name,
-                'description': item.description,
-            })
-        
-        return JsonResponse({
-            'category': {
-                'id': category.id,
-                'name': category.name,
-                'price': float(category.price),
-            },
-            'menu_items': menu_data
-        })
-    except Category.DoesNotExist:
+    category = get_day_menu(timezone.now().date())['by_id'].get(category_id)
+    if category is None:
         return JsonResponse({'error': 'Category not found'}, status=404)
+    
+    return JsonResponse({
+        'category': {
+            'id': category['id'],
+            'name': category['name'],
+            'price': float(category['price']),
+        },
+        'menu_items': category['menus']
+    })
+
+def _current_time_slot():
+    """Active time slot covering the current local date and time, if any"""
+    now = timezone.now().astimezone(pytz.timezone('Asia/Kolkata'))
+    return MenuTimeSlot.objects.filter(
+        is_active=True,
+        start_date__lte=now.date(),
+        end_date__gte=now.date(),
+        start_time__lte=now.time(),
+        end_time__gte=now.time(),
+    ).first()
+
+def _preorder_dates(today):
+    """Future days within PREORDER_DAYS that an active time slot covers"""
+    last_day = today + timedelta(days=settings.PREORDER_DAYS)
+    slots = MenuTimeSlot.objects.filter(
+        is_active=True,
+        start_date__lte=last_day,
+        end_date__gt=today,
+    ).values_list('start_date', 'end_date')
+    
+    days = set()
+    for start_date, end_date in slots:
+        day = max(start_date, today + timedelta(days=1))
+        while day <= min(end_date, last_day):
+            days.add(day)
+            day += timedelta(days=1)
+    return sorted(days)
+
+def _ordering_open(order_date):
+    """Today needs the current time inside a slot; pre-order days only a covering slot"""
+    today = timezone.now().date()
+    if order_date == today:
+        return _current_time_slot() is not None
+    return order_date in _preorder_dates(today)
+
+def _queue_cart(user_id, order_date, items):
+    """
+    Journal mode: take the cart's places, then queue it for drain_orders.
+
+    items are category dicts of the day's menu. The places are taken and
+    committed before the append, so an acknowledged cart is never dropped
+    for lack of capacity; a failed append gives them back. Raises SoldOut.
+    """
+    with transaction.atomic():
+        for category in items:
+            reserve(category['id'], order_date, category['daily_capacity'])
+    try:
+        return journal.append(user_id, order_date, [(category['id'], category['price']) for category in items])
+    except Exception:
+        for category in items:
+            if category['daily_capacity'] is not None:
+                release(category['id'], order_date)
+        raise
 
 @login_required
+@idempotent
 def place_order(request):
     """API endpoint to place an order"""
     if request.method == 'POST':
@@ -276,58 +362,53 @@ def place_order(request):
             data = json.loads(request.body)
             category_id = data.get('category_id')
             
-            # Check if menu is currently available based on time slots
-            from django.utils import timezone as django_timezone
-            import pytz
-            
-            # Get current time in local timezone
-            local_tz = pytz.timezone('Asia/Kolkata')
-            now = django_timezone.now().astimezone(local_tz)
-            current_date = now.date()
-            current_time = now.time()
-            
-            # Get active time slots for today
-            active_time_slots = MenuTimeSlot.objects.filter(
-                is_active=True,
-                start_date__lte=current_date,
-                end_date__gte=current_date
-            )
-            
-            is_menu_available = False
-            # Check if current date is within any active time slot's date range
-            # and current time is within the time slot's time range
-            for time_slot in active_time_slots:
-                # Check if current date is within the date range
-                if time_slot.start_date <= current_date <= time_slot.end_date:
-                    # Check if current time is within the time range
-                    if time_slot.start_time <= current_time <= time_slot.end_time:
-                        is_menu_available = True
-                        break
-            
-            if not is_menu_available:
+            if _current_time_slot() is None:
                 return JsonResponse({'error': 'Menu ordering is not available at this time'}, status=400)
             
-            category = Category.objects.get(id=category_id)
+            # Only categories on today's resolved menu can be ordered, at today's price
+            today = timezone.now().date()
+            try:
+                category = get_day_menu(today)['by_id'][int(category_id)]
+            except (KeyError, TypeError, ValueError):
+                return JsonResponse({'error': 'Category not found'}, status=404)
+            if sold_out_ids(today, [category['id']]):
+                return JsonResponse({'error': 'This category is sold out for today'}, status=400)
             
             # Check if user already ordered this category today
-            today = timezone.now().date()
             existing_order = Order.objects.filter(
                 user=request.user,
-                category=category,
+                category_id=category['id'],
                 date=today
             ).first()
             
-            if existing_order:
+            if existing_order or (journal.is_enabled() and category['id'] in journal.pending_category_ids(request.user.id, today)):
                 return JsonResponse({'error': 'You have already ordered this category today'}, status=400)
             
-            # Create order
-            order = Order.objects.create(
-                user=request.user,
-                category=category,
-                date=today,
-                price=category.price,
-                status='pending'
-            )
+            if journal.is_enabled():
+                # Write-behind, like place_orders: drain_orders inserts the order shortly
+                try:
+                    _queue_cart(request.user.id, today, [category])
+                except SoldOut:
+                    return JsonResponse({'error': 'This category is sold out for today'}, status=400)
+                return JsonResponse({
+                    'success': True,
+                    'queued': True,
+                    'message': 'Order queued, it will appear in your orders shortly',
+                }, status=202)
+            
+            # Create order, taking one place from the day's capacity
+            try:
+                with transaction.atomic():
+                    reserve(category['id'], today, category['daily_capacity'])
+                    order = Order.objects.create(
+                        user=request.user,
+                        category_id=category['id'],
+                        date=today,
+                        price=category['price'],
+                        status='pending'
+                    )
+            except SoldOut:
+                return JsonResponse({'error': 'This category is sold out for today'}, status=400)
             
             return JsonResponse({
                 'success': True,
@@ -335,27 +416,163 @@ def place_order(request):
                 'message': 'Order placed successfully!'
             })
             
-        except Category.DoesNotExist:
-            return JsonResponse({'error': 'Category not found'}, status=404)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
+MAX_BATCH_ORDERS = 50
+
 @login_required
-def get_user_orders(request):
-    """API endpoint to get user's orders"""
+@idempotent
+def place_orders(request):
+    """API endpoint to place orders for several categories at once (all or nothing)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    
     today = timezone.now().date()
-    orders = Order.objects.filter(user=request.user, date=today)
-    
-    orders_data = []
-    for order in orders:
-        orders_data.append({
-            'id': order.id,
-            'category': order.category.name,
-            'price': float(order.price),
-            'status': order.status,
-            'created_at': order.created_at.isoformat(),
-        })
+    try:
+        data = json.loads(request.body)
+        category_ids = list(dict.fromkeys(int(category_id) for category_id in data['category_ids']))
+        # An optional ISO date pre-orders for a coming day
+        order_date = date.fromisoformat(data['date']) if data.get('date') else today
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'category_ids must be a list of category ids and date an ISO date'}, status=400)
+    if not category_ids or len(category_ids) > MAX_BATCH_ORDERS:
+        return JsonResponse({'error': f'Order between 1 and {MAX_BATCH_ORDERS} categories at once'}, status=400)
+    
+    if not _ordering_open(order_date):
+        if order_date == today:
+            return JsonResponse({'error': 'Menu ordering is not available at this time'}, status=400)
+        return JsonResponse({'error': 'Pre-orders are not open for this date'}, status=400)
+    
+    categories = get_day_menu(order_date)['by_id']
+    
+    # Sold-out categories are turned away from the cache, before any order query
+    sold_out = sold_out_ids(order_date, category_ids)
+    if sold_out:
+        results = [
+            {'category_id': category_id, 'error': 'Sold out for this date' if category_id in sold_out else None}
+            for category_id in category_ids
+        ]
+        return JsonResponse({'error': 'Some orders could not be placed', 'results': results}, status=400)
+    
+    already_ordered = set(Order.objects.filter(
+        user=request.user,
+        category_id__in=category_ids,
+        date=order_date,
+    ).values_list('category_id', flat=True))
+    if journal.is_enabled():
+        already_ordered |= journal.pending_category_ids(request.user.id, order_date)
+    
+    results = []
+    for category_id in category_ids:
+        if category_id not in categories:
+            error = 'Category is not on the menu for this date'
+        elif category_id in already_ordered:
+            error = 'You have already ordered this category for this date'
+        else:
+            error = None
+        results.append({'category_id': category_id, 'error': error})
+    
+    # One bad item rejects the whole cart so it never ends up half placed
+    if any(result['error'] for result in results):
+        return JsonResponse({'error': 'Some orders could not be placed', 'results': results}, status=400)
+    
+    if journal.is_enabled():
+        # Write-behind: reserve, queue the cart durably and let drain_orders insert it
+        try:
+            _queue_cart(request.user.id, order_date, [categories[category_id] for category_id in category_ids])
+        except SoldOut as sold_out:
+            for result in results:
+                if result['category_id'] == sold_out.category_id:
+                    result['error'] = 'Sold out for this date'
+            return JsonResponse({'error': 'Some orders could not be placed', 'results': results}, status=400)
+        for result in results:
+            result['price'] = float(categories[result['category_id']]['price'])
+        return JsonResponse({
+            'success': True,
+            'queued': True,
+            'date': order_date.isoformat(),
+            'results': results,
+            'total': float(sum(categories[category_id]['price'] for category_id in category_ids)),
+            'message': 'Order queued, it will appear in your orders shortly',
+        }, status=202)
+    
+    try:
+        with transaction.atomic():
+            # A sold-out category rolls back the places already taken for the cart
+            for category_id in category_ids:
+                reserve(category_id, order_date, categories[category_id]['daily_capacity'])
+            orders = Order.objects.bulk_create([
+                Order(
+                    user=request.user,
+                    category_id=category_id,
+                    date=order_date,
+                    price=categories[category_id]['price'],
+                    status='pending',
+                )
+                for category_id in category_ids
+            ])
+            # bulk_create skips the post_save handlers, so do their work once here
+            DailyOrderSummary.add_orders(orders)
+            transaction.on_commit(bump_data_version)
+    except SoldOut as sold_out:
+        for result in results:
+            if result['category_id'] == sold_out.category_id:
+                result['error'] = 'Sold out for this date'
+        return JsonResponse({'error': 'Some orders could not be placed', 'results': results}, status=400)
+    
+    for result, order in zip(results, orders):
+        result['order_id'] = order.id
+        result['price'] = float(order.price)
+    return JsonResponse({
+        'success': True,
+        'date': order_date.isoformat(),
+        'results': results,
+        'total': float(sum(order.price for order in orders)),
+        'message': 'Orders placed successfully!',
+    })
+
+USER_ORDER_FIELDS = ('id', 'category', 'price', 'status', 'created_at', 'date')
+
+def _intent_rows(user_id, today):
+    """The user's queued or rejected journal rows shaped like USER_ORDER_FIELDS"""
+    intents = journal.user_intents(user_id, today)
+    names = {}
+    for order_date in {intent['date'] for intent in intents}:
+        names[order_date] = {category['id']: category['name'] for category in get_day_menu(order_date)['categories']}
+    return [
+        (
+            None,
+            names[intent['date']].get(intent['category_id'], ''),
+            intent['price'],
+            intent['state'],
+            datetime.fromtimestamp(intent['created_at'], tz=dt_timezone.utc),
+            intent['date'],
+        )
+        for intent in reversed(intents)
+    ]
+
+async def _with_intents(intent_rows, rows):
+    for row in intent_rows:
+        yield row
+    async for row in rows:
+        yield row
+
+@login_required
+async def get_user_orders(request):
+    """API endpoint to get user's orders for today and the pre-ordered days after it"""
+    user = await request.auser()
+    today = timezone.now().date()
+    rows = stream_rows(request, Order.objects.filter(user=user, date__gte=today).values_list(
+        'id', 'category__name', 'price', 'status', 'created_at', 'date'
+    ))
+    if journal.is_enabled():
+        # Read-your-writes: carts still in the journal come first, as the newest
+        intent_rows = await sync_to_async(_intent_rows)(user.id, today)
+        rows = _with_intents(intent_rows, rows) if hasattr(rows, '__aiter__') else chain(intent_rows, rows)
     
-    return JsonResponse({'orders': orders_data})
+    if wants_columns(request):
+        return json_stream_response(columns_document(USER_ORDER_FIELDS, rows))
+    return json_stream_response(document('orders', rows, encode=record_encoder(USER_ORDER_FIELDS)))
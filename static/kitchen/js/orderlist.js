@@ -0,0 +1,4 @@
+// Auto-refresh every 30 seconds
+setInterval(() => {
+    location.reload();
+}, 30000);
@@ -0,0 +1,167 @@
+const pageData = document.currentScript.dataset;
+
+// Sidebar toggle functionality
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.toggle('open');
+    overlay.classList.toggle('open');
+}
+
+function closeSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.remove('open');
+    overlay.classList.remove('open');
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(event) {
+    const sidebar = document.getElementById('sidebar');
+    const sidebarToggle = document.querySelector('.sidebar-toggle');
+
+    if (window.innerWidth <= 768 && 
+        !sidebar.contains(event.target) && 
+        !sidebarToggle.contains(event.target) &&
+        sidebar.classList.contains('open')) {
+        closeSidebar();
+    }
+});
+
+// Close sidebar on window resize if mobile
+window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
+        closeSidebar();
+    }
+});
+
+// Custom filter functionality
+function applyCustomFilter() {
+    const startDate = document.getElementById('startDate').value;
+    const endDate = document.getElementById('endDate').value;
+
+    if (startDate && endDate) {
+        // Add loading state
+        const applyBtn = document.querySelector('.apply-btn');
+        applyBtn.textContent = 'Loading...';
+        applyBtn.disabled = true;
+
+        window.location.href = `?filter=custom&start_date=${startDate}&end_date=${endDate}`;
+    } else {
+        alert('Please select both start and end dates');
+    }
+}
+
+// Add hover effects to summary cards
+document.querySelectorAll('.summary-card').forEach(card => {
+    card.addEventListener('mouseenter', function() {
+        this.style.transform = 'translateY(-5px)';
+    });
+
+    card.addEventListener('mouseleave', function() {
+        this.style.transform = 'translateY(0)';
+    });
+});
+
+// Add click handlers for filter buttons
+document.querySelectorAll('.filter-btn').forEach(btn => {
+    btn.addEventListener('click', function(e) {
+        // Add loading state
+        this.style.opacity = '0.7';
+        this.textContent = this.textContent + '...';
+    });
+});
+
+// Auto-refresh data every 30 seconds
+const billSummaryUrl = pageData.billSummaryUrl;
+let billSummaryEtag = null;
+
+function formatAmount(value) {
+    return '₹' + Math.round(value);
+}
+
+function setCellText(cell, text) {
+    // Only touch the DOM when the value actually changed
+    if (cell && cell.textContent !== text) {
+        cell.textContent = text;
+    }
+}
+
+function applyBillSummary(data) {
+    setCellText(document.querySelector('[data-summary="total_revenue"]'), formatAmount(data.summary.total_revenue));
+    setCellText(document.querySelector('[data-summary="completed_revenue"]'), formatAmount(data.summary.completed_revenue));
+    setCellText(document.querySelector('[data-summary="pending_revenue"]'), formatAmount(data.summary.pending_revenue));
+    setCellText(document.querySelector('[data-summary="total_staff"]'), String(data.summary.total_staff));
+
+    const rows = document.querySelectorAll('tr[data-staff-id]');
+    if (rows.length !== data.staff.length) {
+        // Staff were added or removed; the table layout changed
+        window.location.reload();
+        return;
+    }
+
+    data.staff.forEach(values => {
+        const row = document.querySelector(`tr[data-staff-id="${values[0]}"]`);
+        if (!row) {
+            return;
+        }
+        data.fields.forEach((field, index) => {
+            if (field === 'id') {
+                return;
+            }
+            const text = field === 'total_days' ? String(values[index]) : formatAmount(values[index]);
+            setCellText(row.querySelector(`[data-field="${field}"]`), text);
+        });
+    });
+}
+
+setInterval(function() {
+    // Only refresh if no custom date range is selected
+    const currentFilter = new URLSearchParams(window.location.search).get('filter');
+    if (currentFilter && currentFilter !== 'custom') {
+        const headers = {};
+        if (billSummaryEtag) {
+            headers['If-None-Match'] = billSummaryEtag;
+        }
+
+        fetch(billSummaryUrl + window.location.search, { headers: headers, cache: 'no-store' })
+            .then(response => {
+                if (response.status === 304 || !response.ok) {
+                    return null;
+                }
+                billSummaryEtag = response.headers.get('ETag');
+                return response.json();
+            })
+            .then(data => {
+                if (data) {
+                    applyBillSummary(data);
+                }
+            })
+            .catch(error => console.log('Auto-refresh failed:', error));
+    }
+}, 30000);
+
+// Add real-time date display
+function updateDateTime() {
+    const now = new Date();
+    const dateTimeString = now.toLocaleString('en-US', {
+        weekday: 'long',
+        year: 'numeric',
+        month: 'long',
+        day: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+
+    // Update page subtitle with current time
+    const subtitle = document.querySelector('.page-subtitle');
+    if (subtitle) {
+        subtitle.textContent = `Financial reports and staff summaries - Last updated: ${dateTimeString}`;
+    }
+}
+
+// Update time on page load and every minute
+updateDateTime();
+setInterval(updateDateTime, 60000);
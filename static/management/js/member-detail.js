@@ -0,0 +1,192 @@
+const pageData = document.currentScript.dataset;
+
+// Sidebar toggle functionality
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.toggle('open');
+    overlay.classList.toggle('open');
+}
+
+function closeSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.remove('open');
+    overlay.classList.remove('open');
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(event) {
+    const sidebar = document.getElementById('sidebar');
+    const sidebarToggle = document.querySelector('.sidebar-toggle');
+
+    if (window.innerWidth <= 768 && 
+        !sidebar.contains(event.target) && 
+        !sidebarToggle.contains(event.target) &&
+        sidebar.classList.contains('open')) {
+        closeSidebar();
+    }
+});
+
+// Close sidebar on window resize if mobile
+window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
+        closeSidebar();
+    }
+});
+
+// Payment Modal Functions
+function openPaymentModal() {
+    document.getElementById('paymentModal').style.display = 'block';
+    document.getElementById('paymentAmount').focus();
+}
+
+function closePaymentModal() {
+    document.getElementById('paymentModal').style.display = 'none';
+    document.getElementById('paymentForm').reset();
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const modal = document.getElementById('paymentModal');
+    if (event.target == modal) {
+        closePaymentModal();
+    }
+}
+
+// Payment Form Submission
+document.getElementById('paymentForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const paymentAmount = parseFloat(document.getElementById('paymentAmount').value);
+    const paymentNotes = document.getElementById('paymentNotes').value;
+    const maxAmount = Number(pageData.balance);
+
+    if (paymentAmount <= 0) {
+        alert('Payment amount must be greater than 0');
+        return;
+    }
+
+    if (paymentAmount > maxAmount) {
+        alert(`Payment amount cannot exceed the balance of ₹${maxAmount}`);
+        return;
+    }
+
+    // Show loading state
+    const submitBtn = document.querySelector('#paymentForm button[type="submit"]');
+    const originalText = submitBtn.textContent;
+    submitBtn.textContent = 'Processing...';
+    submitBtn.disabled = true;
+
+    try {
+        const csrfToken = getCookie('csrftoken');
+
+        const body = JSON.stringify({
+            user_id: Number(pageData.staffUserId),
+            payment_amount: paymentAmount,
+            payment_notes: paymentNotes
+        });
+        const response = settleRequest(await fetch(pageData.updatePaymentUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfToken,
+                'Idempotency-Key': idempotencyKey(body)
+            },
+            body
+        }));
+
+        const result = await response.json();
+
+        if (response.ok) {
+            alert(`Payment of ₹${paymentAmount} recorded successfully!`);
+            closePaymentModal();
+            location.reload(); // Refresh to show updated amounts
+        } else {
+            throw new Error(result.error || 'Failed to process payment');
+        }
+    } catch (error) {
+        alert('Error: ' + error.message);
+    } finally {
+        // Reset button state
+        submitBtn.textContent = originalText;
+        submitBtn.disabled = false;
+    }
+});
+
+// Mark All Completed Function
+async function markAllCompleted() {
+    if (confirm(`Mark all pending orders as completed for ${pageData.staffUsername}?`)) {
+        try {
+            const csrfToken = getCookie('csrftoken');
+
+            const body = JSON.stringify({
+                user_id: Number(pageData.staffUserId),
+                mark_all_completed: true
+            });
+            const response = settleRequest(await fetch(pageData.updatePaymentUrl, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': csrfToken,
+                    'Idempotency-Key': idempotencyKey(body)
+                },
+                body
+            }));
+
+            const result = await response.json();
+
+            if (response.ok) {
+                alert('All orders marked as completed!');
+                location.reload();
+            } else {
+                throw new Error(result.error || 'Failed to mark orders as completed');
+            }
+        } catch (error) {
+            alert('Error: ' + error.message);
+        }
+    }
+}
+
+// Helper function to get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Add hover effects to stat cards
+document.querySelectorAll('.stat-card').forEach(card => {
+    card.addEventListener('mouseenter', function() {
+        this.style.transform = 'translateY(-5px)';
+    });
+
+    card.addEventListener('mouseleave', function() {
+        this.style.transform = 'translateY(0)';
+    });
+});
+
+// Real-time balance calculation
+document.getElementById('paymentAmount').addEventListener('input', function() {
+    const paymentAmount = parseFloat(this.value) || 0;
+    const maxAmount = Number(pageData.balance);
+
+    if (paymentAmount > maxAmount) {
+        this.style.borderColor = 'var(--danger)';
+        this.style.backgroundColor = '#fff5f5';
+    } else {
+        this.style.borderColor = '#ddd';
+        this.style.backgroundColor = 'var(--white)';
+    }
+});
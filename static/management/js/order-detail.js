@@ -0,0 +1,358 @@
+const pageData = document.currentScript.dataset;
+
+let currentDate = new Date(pageData.selectedDate);
+let currentMonth = currentDate.getMonth();
+let currentYear = currentDate.getFullYear();
+let selectedDate = pageData.selectedDate;
+let datesWithOrders = JSON.parse(document.getElementById('dates-with-orders').textContent);
+// Per-day counts fetched lazily from the calendar index, keyed by 'YYYY-MM'
+const calendarMonths = {};
+
+function loadCalendarMonth() {
+    const monthKey = `${currentYear}-${String(currentMonth + 1).padStart(2, '0')}`;
+    if (calendarMonths[monthKey]) {
+        return;
+    }
+    calendarMonths[monthKey] = {};
+    fetch(`${pageData.calendarSummaryUrl}?month=${monthKey}`)
+        .then(response => response.json())
+        .then(data => {
+            calendarMonths[monthKey] = data.days || {};
+            Object.keys(calendarMonths[monthKey]).forEach(day => {
+                if (!datesWithOrders.includes(day)) {
+                    datesWithOrders.push(day);
+                }
+            });
+            generateCalendar();
+        })
+        .catch(error => console.log('Calendar summary failed:', error));
+}
+
+function calendarDayInfo(dateStr) {
+    const month = calendarMonths[dateStr.slice(0, 7)];
+    return month ? month[dateStr] : null;
+}
+
+// Calendar functionality
+function generateCalendar() {
+    const calendarGrid = document.getElementById('calendar-grid');
+    const monthNames = ['January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December'];
+
+    // Update month display
+    document.getElementById('current-month').textContent = 
+        `${monthNames[currentMonth]} ${currentYear}`;
+
+    // Clear calendar
+    calendarGrid.innerHTML = '';
+
+    // Add day headers
+    const dayHeaders = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
+    dayHeaders.forEach(day => {
+        const dayHeader = document.createElement('div');
+        dayHeader.className = 'calendar-day-header';
+        dayHeader.textContent = day;
+        calendarGrid.appendChild(dayHeader);
+    });
+
+    // Get first day of month and number of days
+    const firstDay = new Date(currentYear, currentMonth, 1);
+    const lastDay = new Date(currentYear, currentMonth + 1, 0);
+    const startDate = new Date(firstDay);
+    startDate.setDate(startDate.getDate() - firstDay.getDay());
+
+    // Generate calendar days
+    for (let i = 0; i < 42; i++) {
+        const date = new Date(startDate);
+        date.setDate(startDate.getDate() + i);
+
+        const dayElement = document.createElement('div');
+        dayElement.className = 'calendar-day';
+        dayElement.textContent = date.getDate();
+
+        // Add classes based on date properties
+        if (date.getMonth() !== currentMonth) {
+            dayElement.classList.add('other-month');
+        }
+
+        if (date.toDateString() === new Date().toDateString()) {
+            dayElement.classList.add('today');
+        }
+
+        if (date.toISOString().split('T')[0] === selectedDate) {
+            dayElement.classList.add('selected');
+        }
+
+        // Check if date has orders
+        const dateStr = date.toISOString().split('T')[0];
+        if (datesWithOrders.includes(dateStr)) {
+            dayElement.classList.add('has-orders');
+        }
+        const dayInfo = calendarDayInfo(dateStr);
+        if (dayInfo) {
+            dayElement.title = `${dayInfo.count} orders · ₹${Math.round(dayInfo.amount)}`;
+        }
+
+        // Add click event
+        dayElement.addEventListener('click', () => {
+            if (date.getMonth() === currentMonth) {
+                selectedDate = dateStr;
+                loadOrdersForDate();
+            }
+        });
+
+        calendarGrid.appendChild(dayElement);
+    }
+
+    loadCalendarMonth();
+}
+
+function previousMonth() {
+    currentMonth--;
+    if (currentMonth < 0) {
+        currentMonth = 11;
+        currentYear--;
+    }
+    generateCalendar();
+}
+
+function nextMonth() {
+    currentMonth++;
+    if (currentMonth > 11) {
+        currentMonth = 0;
+        currentYear++;
+    }
+    generateCalendar();
+}
+
+function loadOrdersForDate() {
+    const dateInput = document.querySelector('input[name="date"]');
+    if (dateInput) {
+        dateInput.value = selectedDate;
+        dateInput.form.submit();
+    }
+}
+
+// Bulk selection functionality
+function toggleSelectAll() {
+    const selectAllCheckbox = document.getElementById('select-all-members');
+    const memberCheckboxes = document.querySelectorAll('.member-checkbox');
+    const orderCheckboxes = document.querySelectorAll('.order-checkbox');
+
+    memberCheckboxes.forEach(checkbox => {
+        checkbox.checked = selectAllCheckbox.checked;
+    });
+
+    orderCheckboxes.forEach(checkbox => {
+        checkbox.checked = selectAllCheckbox.checked;
+    });
+
+    updateBulkDeleteButton();
+}
+
+function updateBulkDeleteButton() {
+    const checkedBoxes = document.querySelectorAll('.order-checkbox:checked');
+    const bulkDeleteBtn = document.getElementById('bulk-delete-btn');
+
+    if (checkedBoxes.length > 0) {
+        bulkDeleteBtn.classList.add('show');
+        bulkDeleteBtn.textContent = `Delete Selected (${checkedBoxes.length})`;
+    } else {
+        bulkDeleteBtn.classList.remove('show');
+    }
+}
+
+function deleteSelectedOrders() {
+    const checkedBoxes = document.querySelectorAll('.order-checkbox:checked');
+    const orderIds = Array.from(checkedBoxes).map(cb => cb.dataset.orderId);
+
+    if (orderIds.length === 0) {
+        alert('Please select orders to delete.');
+        return;
+    }
+
+    const deleteModal = new bootstrap.Modal(document.getElementById('deleteModal'));
+    const deleteMessage = document.getElementById('delete-message');
+    const deleteCount = document.getElementById('delete-count');
+    const deleteDetails = document.getElementById('delete-details');
+
+    // Update message based on count
+    if (orderIds.length === 1) {
+        deleteMessage.textContent = 'Are you sure you want to delete this order?';
+    } else {
+        deleteMessage.textContent = `Are you sure you want to delete ${orderIds.length} selected orders?`;
+    }
+
+    // Show details
+    deleteCount.textContent = orderIds.length;
+    deleteDetails.style.display = 'block';
+
+    document.getElementById('confirm-delete').onclick = function() {
+        deleteOrders(orderIds);
+        deleteModal.hide();
+    };
+
+    deleteModal.show();
+}
+
+function deleteSingleOrder(orderId) {
+    const deleteModal = new bootstrap.Modal(document.getElementById('deleteModal'));
+    const deleteMessage = document.getElementById('delete-message');
+    const deleteCount = document.getElementById('delete-count');
+    const deleteDetails = document.getElementById('delete-details');
+
+    deleteMessage.textContent = 'Are you sure you want to delete this order?';
+    deleteCount.textContent = '1';
+    deleteDetails.style.display = 'block';
+
+    document.getElementById('confirm-delete').onclick = function() {
+        deleteOrders([orderId]);
+        deleteModal.hide();
+    };
+
+    deleteModal.show();
+}
+
+function deleteAllUserOrders(userId) {
+    // Get all order IDs for this user on the selected date
+    const userOrderCheckboxes = document.querySelectorAll(`input[data-user-id="${userId}"].order-checkbox`);
+    const orderIds = Array.from(userOrderCheckboxes).map(cb => cb.dataset.orderId);
+
+    if (orderIds.length === 0) {
+        alert('No orders found for this member.');
+        return;
+    }
+
+    const deleteModal = new bootstrap.Modal(document.getElementById('deleteModal'));
+    const deleteMessage = document.getElementById('delete-message');
+    const deleteCount = document.getElementById('delete-count');
+    const deleteDetails = document.getElementById('delete-details');
+
+    deleteMessage.textContent = `Are you sure you want to delete ALL ${orderIds.length} orders for this member?`;
+    deleteCount.textContent = orderIds.length;
+    deleteDetails.style.display = 'block';
+
+    document.getElementById('confirm-delete').onclick = function() {
+        deleteOrders(orderIds);
+        deleteModal.hide();
+    };
+
+    deleteModal.show();
+}
+
+function markAllUserOrdersCompleted(userId) {
+    if (confirm('Are you sure you want to mark ALL orders as completed for this member?')) {
+        // Get all order IDs for this user on the selected date
+        const userOrderCheckboxes = document.querySelectorAll(`input[data-user-id="${userId}"].order-checkbox`);
+        const orderIds = Array.from(userOrderCheckboxes).map(cb => cb.dataset.orderId);
+
+        if (orderIds.length > 0) {
+            markOrdersCompleted(orderIds);
+        } else {
+            alert('No orders found for this member.');
+        }
+    }
+}
+
+function markOrdersCompleted(orderIds) {
+    const body = JSON.stringify({
+        order_ids: orderIds,
+        mark_all_completed: true
+    });
+    fetch(pageData.updatePaymentUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+            'Idempotency-Key': idempotencyKey(body)
+        },
+        body
+    })
+    .then(settleRequest)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            location.reload();
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('An error occurred while updating orders.');
+    });
+}
+
+function deleteOrders(orderIds) {
+    const body = JSON.stringify({
+        order_ids: orderIds,
+        date: selectedDate
+    });
+    fetch(pageData.deleteOrdersUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+            'Idempotency-Key': idempotencyKey(body)
+        },
+        body
+    })
+    .then(settleRequest)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            location.reload();
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('An error occurred while deleting orders.');
+    });
+}
+
+// Sidebar toggle functionality
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.toggle('open');
+    overlay.classList.toggle('open');
+}
+
+function closeSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.remove('open');
+    overlay.classList.remove('open');
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(event) {
+    const sidebar = document.getElementById('sidebar');
+    const sidebarToggle = document.querySelector('.sidebar-toggle');
+
+    if (window.innerWidth <= 768 && 
+        !sidebar.contains(event.target) && 
+        !sidebarToggle.contains(event.target) &&
+        sidebar.classList.contains('open')) {
+        closeSidebar();
+    }
+});
+
+// Close sidebar on window resize if mobile
+window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
+        closeSidebar();
+    }
+});
+
+// Initialize calendar on page load
+document.addEventListener('DOMContentLoaded', function() {
+    generateCalendar();
+    updateBulkDeleteButton();
+});
@@ -0,0 +1,169 @@
+const pageData = document.currentScript.dataset;
+
+// Sidebar toggle functionality
+function toggleSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.toggle('open');
+    overlay.classList.toggle('open');
+}
+
+function closeSidebar() {
+    const sidebar = document.getElementById('sidebar');
+    const overlay = document.getElementById('sidebarOverlay');
+
+    sidebar.classList.remove('open');
+    overlay.classList.remove('open');
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(event) {
+    const sidebar = document.getElementById('sidebar');
+    const sidebarToggle = document.querySelector('.sidebar-toggle');
+
+    if (window.innerWidth <= 768 && 
+        !sidebar.contains(event.target) && 
+        !sidebarToggle.contains(event.target) &&
+        sidebar.classList.contains('open')) {
+        closeSidebar();
+    }
+});
+
+// Close sidebar on window resize if mobile
+window.addEventListener('resize', function() {
+    if (window.innerWidth > 768) {
+        closeSidebar();
+    }
+});
+
+// Search functionality
+function performSearch() {
+    const searchInput = document.getElementById('searchInput');
+    const searchQuery = searchInput.value.trim().toLowerCase();
+
+    if (searchQuery) {
+        // Filter table rows
+        filterTableRows(searchQuery);
+        searchServer(searchQuery);
+    } else {
+        // Show all rows
+        showAllRows();
+    }
+}
+
+function clearSearch() {
+    document.getElementById('searchInput').value = '';
+    showAllRows();
+}
+
+// The staff search API also matches first and last names and ignores accents;
+// the rows it finds are added to those the local filter already shows
+let searchTimer = null;
+let searchRequest = null;
+
+function cancelServerSearch() {
+    clearTimeout(searchTimer);
+    if (searchRequest) {
+        searchRequest.abort();
+        searchRequest = null;
+    }
+}
+
+function searchServer(searchQuery) {
+    cancelServerSearch();
+    searchTimer = setTimeout(async function() {
+        searchRequest = new AbortController();
+        try {
+            const url = `${pageData.staffSearchUrl}?q=${encodeURIComponent(searchQuery)}&limit=50`;
+            const response = await fetch(url, { signal: searchRequest.signal });
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            filterTableRows(searchQuery, new Set(data.results.map(result => String(result.id))));
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Staff search failed:', error);
+            }
+        }
+    }, 200);
+}
+
+function filterTableRows(searchQuery, matchedIds = new Set()) {
+    const table = document.getElementById('staffTable');
+    const rows = table.querySelectorAll('tbody tr');
+    let visibleCount = 0;
+
+    rows.forEach(row => {
+        const staffName = row.dataset.staffName || '';
+        const staffEmail = row.dataset.staffEmail || '';
+        const staffPhone = row.dataset.staffPhone || '';
+
+        if (staffName.includes(searchQuery) || 
+            staffEmail.includes(searchQuery) || 
+            staffPhone.includes(searchQuery) ||
+            matchedIds.has(row.dataset.staffId)) {
+            row.style.display = '';
+            visibleCount++;
+        } else {
+            row.style.display = 'none';
+        }
+    });
+
+    // Update staff count
+    document.getElementById('staffCount').textContent = 
+        `${visibleCount} Staff Member${visibleCount !== 1 ? 's' : ''}`;
+}
+
+function showAllRows() {
+    cancelServerSearch();
+    const table = document.getElementById('staffTable');
+    const rows = table.querySelectorAll('tbody tr');
+
+    rows.forEach(row => {
+        row.style.display = '';
+    });
+
+    // Update staff count
+    document.getElementById('staffCount').textContent = 
+        `${rows.length} Staff Member${rows.length !== 1 ? 's' : ''}`;
+}
+
+// View staff detail
+function viewStaffDetail(userId) {
+    window.location.href = pageData.memberDetailUrl.replace('0', userId);
+}
+
+// Real-time search
+document.getElementById('searchInput').addEventListener('input', function() {
+    const searchQuery = this.value.trim().toLowerCase();
+
+    if (searchQuery.length > 0) {
+        filterTableRows(searchQuery);
+        searchServer(searchQuery);
+    } else {
+        showAllRows();
+    }
+});
+
+// Add hover effects to table rows
+document.querySelectorAll('.staff-table tbody tr').forEach(row => {
+    row.addEventListener('mouseenter', function() {
+        this.style.backgroundColor = '#f8f9fa';
+        this.style.transform = 'scale(1.01)';
+    });
+
+    row.addEventListener('mouseleave', function() {
+        this.style.backgroundColor = '';
+        this.style.transform = 'scale(1)';
+    });
+});
+
+// Add click handlers for table rows
+document.querySelectorAll('.staff-table tbody tr').forEach(row => {
+    row.addEventListener('click', function() {
+        // Add loading state
+        this.style.opacity = '0.7';
+    });
+});
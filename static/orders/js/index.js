@@ -0,0 +1,33 @@
+const pageData = document.currentScript.dataset;
+
+// Trigger animations after load
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.category-card').forEach(card => {
+        card.style.opacity = '1';
+        card.style.transform = 'translateY(0)';
+    });
+});
+
+// Add click handlers for category cards
+document.querySelectorAll('.category-card:not(.locked)').forEach(card => {
+    card.addEventListener('click', function() {
+        const categoryId = this.dataset.categoryId;
+        if (categoryId) {
+            // Redirect to menu page with category filter
+            window.location.href = `${pageData.menuUrl}?category=${categoryId}`;
+        }
+    });
+});
+
+// Add hover effects
+document.querySelectorAll('.category-card').forEach(card => {
+    card.addEventListener('mouseenter', function() {
+        if (!this.classList.contains('locked')) {
+            this.style.transform = 'scale(1.03)';
+        }
+    });
+
+    card.addEventListener('mouseleave', function() {
+        this.style.transform = 'scale(1)';
+    });
+});
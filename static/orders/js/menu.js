@@ -0,0 +1,173 @@
+const pageData = document.currentScript.dataset;
+
+// Global variables
+let selectedCategories = new Set();
+let totalAmount = 0;
+
+// Check if menu is available
+const isMenuAvailable = pageData.menuAvailable === 'true';
+
+// Select All functionality
+document.getElementById('selectAll').addEventListener('change', function() {
+    if (!isMenuAvailable) return;
+
+    const categoryCheckboxes = document.querySelectorAll('.category-checkbox:not([disabled])');
+
+    if (this.checked) {
+        categoryCheckboxes.forEach(checkbox => {
+            checkbox.checked = true;
+            const categoryId = checkbox.dataset.categoryId;
+            const price = parseFloat(checkbox.dataset.price);
+            selectedCategories.add(categoryId);
+            totalAmount += price;
+        });
+    } else {
+        categoryCheckboxes.forEach(checkbox => {
+            checkbox.checked = false;
+        });
+        selectedCategories.clear();
+        totalAmount = 0;
+    }
+
+    updateTotalAmount();
+    updateOrderButton();
+});
+
+// Category checkbox functionality
+document.querySelectorAll('.category-checkbox').forEach(checkbox => {
+    checkbox.addEventListener('change', function() {
+        if (!isMenuAvailable) return;
+
+        const categoryId = this.dataset.categoryId;
+        const price = parseFloat(this.dataset.price);
+
+        if (this.checked) {
+            selectedCategories.add(categoryId);
+            totalAmount += price;
+        } else {
+            selectedCategories.delete(categoryId);
+            totalAmount -= price;
+        }
+
+        updateTotalAmount();
+        updateOrderButton();
+        updateSelectAllState();
+    });
+});
+
+
+// Place Order functionality
+document.getElementById('placeOrderBtn').addEventListener('click', async function() {
+    if (!isMenuAvailable) {
+        showMessage('Menu ordering is not available at this time', 'error');
+        return;
+    }
+
+    if (selectedCategories.size === 0) return;
+
+    this.disabled = true;
+    this.textContent = 'Placing Order...';
+
+    try {
+        // The whole cart goes in one request and is placed all or nothing
+        const body = JSON.stringify({
+            category_ids: Array.from(selectedCategories, Number),
+            date: pageData.orderDate
+        });
+        const response = settleRequest(await fetch(pageData.placeOrdersUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Idempotency-Key': idempotencyKey(body)
+            },
+            body
+        }));
+
+        const result = await response.json();
+
+        if (!response.ok) {
+            const failed = (result.results || []).filter(item => item.error).map(item => item.error);
+            throw new Error(failed.length ? failed.join(', ') : (result.error || 'Failed to place order'));
+        }
+
+        // Show success message
+        showMessage(result.message || 'Orders placed successfully!', 'success');
+
+        // Reset form
+        selectedCategories.clear();
+        totalAmount = 0;
+        document.querySelectorAll('input[type="checkbox"]').forEach(checkbox => {
+            checkbox.checked = false;
+        });
+        updateTotalAmount();
+        updateOrderButton();
+        updateSelectAllState();
+
+    } catch (error) {
+        showMessage(error.message, 'error');
+    } finally {
+        this.disabled = false;
+        this.textContent = isMenuAvailable ? 'Place Order' : 'Ordering Unavailable';
+    }
+});
+
+// Helper functions
+function updateTotalAmount() {
+    document.getElementById('totalAmount').textContent = totalAmount.toFixed(2);
+}
+
+function updateOrderButton() {
+    const button = document.getElementById('placeOrderBtn');
+    button.disabled = selectedCategories.size === 0 || !isMenuAvailable;
+}
+
+function updateSelectAllState() {
+    const selectAllCheckbox = document.getElementById('selectAll');
+    const availableCategories = document.querySelectorAll('.category-checkbox:not([disabled])');
+    const checkedCategories = document.querySelectorAll('.category-checkbox:checked:not([disabled])');
+
+    selectAllCheckbox.checked = availableCategories.length > 0 && checkedCategories.length === availableCategories.length;
+}
+
+function showMessage(message, type = 'success') {
+    const messagesContainer = document.querySelector('.messages') || createMessagesContainer();
+    const messageDiv = document.createElement('div');
+    messageDiv.className = `message ${type}`;
+    messageDiv.textContent = message;
+
+    messagesContainer.appendChild(messageDiv);
+
+    setTimeout(() => {
+        messageDiv.remove();
+    }, 5000);
+}
+
+function createMessagesContainer() {
+    const container = document.createElement('div');
+    container.className = 'messages';
+    document.body.appendChild(container);
+    return container;
+}
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Auto-hide messages after 5 seconds
+setTimeout(() => {
+    document.querySelectorAll('.message').forEach(message => {
+        message.remove();
+    });
+}, 5000);
@@ -0,0 +1,21 @@
+// Retries of the same request reuse its Idempotency-Key, so a response lost
+// on a flaky connection cannot make the server do the work twice
+let pendingRequest = { body: null, key: null };
+
+function idempotencyKey(body) {
+    if (pendingRequest.body !== body) {
+        const key = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2);
+        pendingRequest = { body, key };
+    }
+    return pendingRequest.key;
+}
+
+function settleRequest(response) {
+    // Any answer but "still processing" ends the request; the next attempt gets a new key
+    if (response.status !== 409) {
+        pendingRequest = { body: null, key: null };
+    }
+    return response;
+}
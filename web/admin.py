@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Category, Menu, WeeklyMenu, CustomFood, Order, BillReport, UserProfile
+from .models import Category, Menu, WeeklyMenu, CustomFood, Order, DailyCapacity, BillReport, UserProfile
+from .signals import batched_order_deletes
 
 # Unregister the default User admin
 admin.site.unregister(User)
@@ -18,12 +19,22 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'get_role', 'is_active', 'date_joined')
     list_filter = ('is_active', 'is_staff', 'is_superuser', 'date_joined', 'profile__role')
     search_fields = ('username', 'first_name', 'last_name', 'email')
+    list_select_related = ('profile',)
     
     def get_role(self, obj):
         if hasattr(obj, 'profile'):
             return obj.profile.get_role_display()
         return 'No Role'
     get_role.short_description = 'Role'
+    
+    # Deleting users cascades to their orders; do the orders' post_delete work once
+    def delete_model(self, request, obj):
+        with batched_order_deletes():
+            super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        with batched_order_deletes():
+            super().delete_queryset(request, queryset)
 
 # Register the new User admin
 admin.site.register(User, CustomUserAdmin)
@@ -31,10 +42,10 @@ admin.site.register(User, CustomUserAdmin)
 # Category Admin
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'is_locked', 'created_at')
+    list_display = ('name', 'price', 'daily_capacity', 'is_locked', 'created_at')
     list_filter = ('is_locked', 'created_at')
     search_fields = ('name',)
-    list_editable = ('is_locked',)
+    list_editable = ('daily_capacity', 'is_locked')
     ordering = ('name',)
 
 # Menu Admin
@@ -69,6 +80,7 @@ class CustomFoodAdmin(admin.ModelAdmin):
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('user', 'category', 'date', 'price', 'status', 'created_at')
+    list_select_related = ('user', 'category')
     list_filter = ('status', 'date', 'category', 'created_at')
     search_fields = ('user__username', 'user__first_name', 'category__name')
     list_editable = ('status',)
@@ -76,6 +88,14 @@ class OrderAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
     
+    def get_queryset(self, request):
+        # The change and delete pages show __str__, which reads both relations
+        return super().get_queryset(request).with_refs()
+    
+    def delete_queryset(self, request, queryset):
+        with batched_order_deletes():
+            super().delete_queryset(request, queryset)
+    
     fieldsets = (
         ('Order Information', {
             'fields': ('user', 'category', 'date', 'price', 'status')
@@ -86,6 +106,22 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
+# Daily Capacity Admin
+@admin.register(DailyCapacity)
+class DailyCapacityAdmin(admin.ModelAdmin):
+    """Read-only view of the counters web.capacity keeps; remaining 0 means sold out for that day"""
+    list_display = ('category', 'date', 'capacity', 'remaining', 'updated_at')
+    list_select_related = ('category',)
+    list_filter = ('date', 'category')
+    search_fields = ('category__name',)
+    date_hierarchy = 'date'
+    ordering = ('-date', 'category__name')
+    readonly_fields = ('category', 'date', 'capacity', 'remaining', 'updated_at')
+
+    def has_add_permission(self, request):
+        # Counters are opened by the first order of the day and resized with the category
+        return False
+
 # Bill Report Admin
 @admin.register(BillReport)
 class BillReportAdmin(admin.ModelAdmin):
@@ -0,0 +1,101 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from .models import UserProfile
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's profile in the same query.
+
+    Every portal view checks the profile role, so joining it here saves
+    the lazy UserProfile query that would otherwise run on each request.
+    ModelBackend stays listed after it only to load sessions created before
+    this backend existed; failed logins raise PermissionDenied so that it
+    does not hash the same password a second time.
+    """
+
+    def _users(self):
+        return get_user_model()._default_manager.select_related('profile')
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = self._users().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            UserModel().set_password(password)
+            raise PermissionDenied
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        raise PermissionDenied
+
+    def get_user(self, user_id):
+        try:
+            user = self._users().get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def get_role(user):
+    """Return the profile role of a user, or None"""
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.profile.role
+    except ObjectDoesNotExist:
+        return None
+
+
+async def aget_role(user):
+    """Return the profile role of a user from async code, or None"""
+    if not user.is_authenticated:
+        return None
+    if type(user).profile.related.is_cached(user):
+        return get_role(user)
+    return await UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).afirst()
+
+
+def _deny(request, redirect_to):
+    if redirect_to:
+        messages.error(request, 'Access denied.')
+        return redirect(redirect_to)
+    return JsonResponse({'error': 'Access denied'}, status=403)
+
+
+def role_required(role, redirect_to=None):
+    """
+    Only let users whose profile has the given role through.
+
+    Page views pass redirect_to (a URL name) and get a flash message and a
+    redirect; API views leave it out and get a 403 JSON response.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if await aget_role(await request.auser()) != role:
+                    return _deny(request, redirect_to)
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if get_role(request.user) != role:
+                return _deny(request, redirect_to)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
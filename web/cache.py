@@ -0,0 +1,151 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DATA_VERSION_KEY = 'food:data-version'
+# Categories and menus change far less often than orders, so they get their own version
+CATALOG_VERSION_KEY = 'food:catalog-version'
+USER_ORDERS_VERSION_PREFIX = 'food:user-orders-version'
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'AGGREGATE_CACHE_ALIAS', 'default')]
+
+
+def get_data_version(version_key=DATA_VERSION_KEY):
+    """Return the current order data version (or the one under version_key), creating it if missing"""
+    shared = _shared_cache()
+    version = shared.get(version_key)
+    if version is None:
+        version = time.time_ns()
+        # add() keeps the first writer's value if several processes race here
+        shared.add(version_key, version, None)
+        version = shared.get(version_key, version)
+    return version
+
+
+async def aget_data_version():
+    """Async variant of get_data_version()"""
+    shared = _shared_cache()
+    version = await shared.aget(DATA_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        await shared.aadd(DATA_VERSION_KEY, version, None)
+        version = await shared.aget(DATA_VERSION_KEY, version)
+    return version
+
+
+def bump_data_version():
+    """Invalidate every cached aggregate by moving to a new data version"""
+    _shared_cache().set(DATA_VERSION_KEY, time.time_ns(), None)
+
+
+def bump_catalog_version():
+    """Invalidate the cached category catalog after a category or menu change"""
+    _shared_cache().set(CATALOG_VERSION_KEY, time.time_ns(), None)
+
+
+def user_orders_version_key(user_id):
+    """Version key of one user's orders, for aggregates that only read that user's rows"""
+    return f'{USER_ORDERS_VERSION_PREFIX}:{user_id}'
+
+
+def bump_user_orders_version(*user_ids):
+    """Invalidate the cached aggregates of these users' orders"""
+    version = time.time_ns()
+    _shared_cache().set_many({user_orders_version_key(user_id): version for user_id in user_ids}, None)
+
+
+def fragment_version(*parts):
+    """Short digest of the values a cached template fragment is rendered from"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU used in front of the shared cache"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = LRUCache(getattr(settings, 'AGGREGATE_CACHE_LRU_SIZE', 256))
+_MISSING = object()
+
+
+def _build_key(namespace, version, parts):
+    raw = '|'.join(str(part) for part in parts)
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f'food:{namespace}:{version}:{digest}'
+
+
+def make_key(namespace, *parts):
+    """Build a cache key from a namespace, the data version and filter values"""
+    return _build_key(namespace, get_data_version(), parts)
+
+
+def cached_aggregate(namespace, parts, compute, version_key=DATA_VERSION_KEY):
+    """
+    Return compute() for the given filter parts, reusing a cached result.
+
+    Results are looked up in the per-process LRU first, then in the shared
+    Django cache. Keys embed the data version (or the version stored under
+    version_key), so any write makes the old entries unreachable instead of
+    having to delete them one by one.
+    """
+    key = _build_key(namespace, get_data_version(version_key), parts)
+
+    value = _local_cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    shared = _shared_cache()
+    value = shared.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        shared.set(key, value, getattr(settings, 'AGGREGATE_CACHE_TIMEOUT', 300))
+
+    _local_cache.set(key, value)
+    return value
+
+
+async def acached_aggregate(namespace, parts, compute):
+    """Async variant of cached_aggregate(); compute must be a coroutine function"""
+    key = _build_key(namespace, await aget_data_version(), parts)
+
+    value = _local_cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    shared = _shared_cache()
+    value = await shared.aget(key, _MISSING)
+    if value is _MISSING:
+        value = await compute()
+        await shared.aset(key, value, getattr(settings, 'AGGREGATE_CACHE_TIMEOUT', 300))
+
+    _local_cache.set(key, value)
+    return value
@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Least
+
+from .models import DailyCapacity, Order
+
+# The flag only saves work; the counters stay authoritative once it expires
+SOLD_OUT_TIMEOUT = 60 * 60 * 24
+
+
+class SoldOut(Exception):
+    """No capacity left for a category on a date"""
+
+    def __init__(self, category_id, date):
+        super().__init__(f'Category {category_id} is sold out on {date}')
+        self.category_id = category_id
+        self.date = date
+
+
+def _sold_out_key(category_id, date):
+    return f'food:sold-out:{category_id}:{date.isoformat()}'
+
+
+def _mark_sold_out(category_id, date):
+    cache.set(_sold_out_key(category_id, date), True, SOLD_OUT_TIMEOUT)
+
+
+def sold_out_ids(date, category_ids):
+    """Which of category_ids are flagged sold out on date; one cache round trip, no queries"""
+    keys = {_sold_out_key(category_id, date): category_id for category_id in category_ids}
+    return {keys[key] for key in cache.get_many(list(keys))}
+
+
+async def asold_out_ids(date, category_ids):
+    """Async variant of sold_out_ids()"""
+    keys = {_sold_out_key(category_id, date): category_id for category_id in category_ids}
+    return {keys[key] for key in await cache.aget_many(list(keys))}
+
+
+def _take(category_id, date):
+    return DailyCapacity.objects.filter(
+        category_id=category_id,
+        date=date,
+        remaining__gt=0,
+    ).update(remaining=F('remaining') - 1)
+
+
+def _open_counter(category_id, date, capacity):
+    """Create the day's counter, minus the orders placed before it existed"""
+    placed = Order.objects.filter(category_id=category_id, date=date).exclude(status='cancelled').count()
+    try:
+        with transaction.atomic():
+            DailyCapacity.objects.create(
+                category_id=category_id,
+                date=date,
+                capacity=capacity,
+                remaining=max(capacity - placed, 0),
+            )
+    except IntegrityError:
+        # Another request opened it first
+        pass
+
+
+def reserve(category_id, date, capacity):
+    """
+    Take one order's worth of a category's capacity on date.
+
+    capacity is the category's daily_capacity; None means unlimited and
+    reserves nothing. The counter is decremented by a conditional UPDATE
+    (remaining > 0), so concurrent requests can never oversell. Call this
+    inside the transaction that creates the order so a failed insert gives
+    the portion back. Raises SoldOut when nothing is left.
+
+    Taking the last place, or finding none, sets the cached sold-out flag
+    that sold_out_ids() reads, so later requests for that category and day
+    can be turned away without a query.
+    """
+    if capacity is None:
+        return
+    if not _take(category_id, date):
+        if DailyCapacity.objects.filter(category_id=category_id, date=date).exists():
+            _mark_sold_out(category_id, date)
+            raise SoldOut(category_id, date)
+        _open_counter(category_id, date, capacity)
+        if not _take(category_id, date):
+            _mark_sold_out(category_id, date)
+            raise SoldOut(category_id, date)
+
+    # That was the last place: close the category for the day once the order commits
+    if DailyCapacity.objects.filter(category_id=category_id, date=date, remaining=0).exists():
+        transaction.on_commit(lambda: _mark_sold_out(category_id, date))
+
+
+def release(category_id, date, count=1):
+    """Give back count orders' worth of capacity, e.g. after a cancellation"""
+    DailyCapacity.objects.filter(
+        category_id=category_id,
+        date=date,
+        remaining__lt=F('capacity'),
+    ).update(remaining=Least(F('remaining') + count, F('capacity')))
+    cache.delete(_sold_out_key(category_id, date))
+
+
+def resize(category_id, capacity, from_date):
+    """Apply a changed daily_capacity to the counters of from_date onwards"""
+    counters = DailyCapacity.objects.filter(category_id=category_id, date__gte=from_date)
+    cache.delete_many([_sold_out_key(category_id, date) for date in counters.values_list('date', flat=True)])
+    if capacity is None:
+        counters.delete()
+    else:
+        counters.update(
+            remaining=Greatest(F('remaining') + capacity - F('capacity'), 0),
+            capacity=capacity,
+        )
+        for date in counters.filter(remaining=0).values_list('date', flat=True):
+            _mark_sold_out(category_id, date)
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef, Prefetch
+
+from .cache import CATALOG_VERSION_KEY, cached_aggregate
+from .models import Category, CustomFood, Menu, WeeklyMenu
+
+
+def resolve_menus(start_date, end_date):
+    """
+    Effective menu of every day from start_date to end_date, in four queries.
+
+    Rules, per unlocked category and day:
+
+    * available CustomFood rows for the day replace the regular menu items,
+      and the day's price is the highest of their prices;
+    * otherwise a category that has WeeklyMenu rows is only offered on days
+      an active one covers, while a category without any is offered every
+      day (the behaviour before weekly menus were used);
+    * a category with nothing to serve that day is left out.
+
+    Returns {date: snapshot}; see get_day_menu() for the snapshot layout.
+    """
+    categories = Category.objects.filter(is_locked=False).annotate(
+        is_scheduled=Exists(WeeklyMenu.objects.filter(category=OuterRef('pk'))),
+    ).order_by('id').prefetch_related(
+        Prefetch('menus', queryset=Menu.objects.filter(is_available=True).order_by('id'), to_attr='available_menus')
+    )
+
+    weekly_ranges = defaultdict(list)
+    for category_id, first_day, last_day in WeeklyMenu.objects.filter(
+        is_active=True,
+        start_date__lte=end_date,
+        end_date__gte=start_date,
+    ).values_list('category_id', 'start_date', 'end_date'):
+        weekly_ranges[category_id].append((first_day, last_day))
+
+    custom_foods = defaultdict(list)
+    for food in CustomFood.objects.filter(
+        is_available=True,
+        date__range=[start_date, end_date],
+    ).order_by('id'):
+        custom_foods[food.date, food.category_id].append(food)
+
+    snapshots = {}
+    day = start_date
+    while day <= end_date:
+        entries = []
+        for category in categories:
+            foods = custom_foods.get((day, category.id))
+            if foods:
+                price = max(food.price for food in foods)
+                menus = [
+                    {'id': food.id, 'name': food.name, 'description': None, 'is_custom': True}
+                    for food in foods
+                ]
+            elif category.available_menus and (not category.is_scheduled or any(
+                first_day <= day <= last_day for first_day, last_day in weekly_ranges[category.id]
+            )):
+                price = category.price
+                menus = [
+                    {'id': menu.id, 'name': menu.name, 'description': menu.description, 'is_custom': False}
+                    for menu in category.available_menus
+                ]
+            else:
+                continue
+            entries.append({
+                'id': category.id,
+                'name': category.name,
+                'price': price,
+                'is_locked': category.is_locked,
+                'daily_capacity': category.daily_capacity,
+                'is_special': bool(foods),
+                'menus': menus,
+            })
+        snapshots[day] = {
+            'date': day,
+            'categories': entries,
+            'by_id': {entry['id']: entry for entry in entries},
+        }
+        day += timedelta(days=1)
+    return snapshots
+
+
+def get_day_menu(date):
+    """
+    Cached snapshot of the menu served on date.
+
+    A dict with 'categories' (list of category dicts with their 'price' and
+    'menus' for that day, in display order) and 'by_id' (the same dicts keyed
+    by category id). Any category, menu, weekly menu or custom food write
+    bumps the catalog version and so retires every snapshot at once.
+    """
+    return cached_aggregate(
+        'day-menu', (date.isoformat(),),
+        lambda: resolve_menus(date, date)[date],
+        version_key=CATALOG_VERSION_KEY,
+    )
@@ -0,0 +1,91 @@
+"""
+Idempotency-Key handling for POST endpoints that change orders or payments.
+
+A client that sends an Idempotency-Key header with a POST gets the same
+response for every retry with that key, so a request repeated after a
+dropped connection neither places an order twice nor records a payment
+twice. The first response is stored in the shared cache for
+IDEMPOTENCY_TTL seconds, keyed by the user and a digest of the key; a
+replay returns it without running the view or any of its queries.
+
+* A key reused with a different path or body is answered 422.
+* A retry that arrives while the first request is still running is
+  answered 409; the client retries later and then gets the stored result.
+* Server errors (5xx) are not stored, so the request can be retried.
+
+Requests without the header behave as before.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+HEADER = 'Idempotency-Key'
+KEY_PREFIX = 'food:idempotency'
+MAX_KEY_LENGTH = 255
+# Upper bound on how long a view may run before a retry may run it again
+LOCK_TIMEOUT = 60
+
+
+def _cache():
+    return caches[getattr(settings, 'AGGREGATE_CACHE_ALIAS', 'default')]
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256(request.path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(stored):
+    response = HttpResponse(stored['content'], status=stored['status'], content_type=stored['content_type'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response of a POST repeated with the same Idempotency-Key.
+
+    Place it below the login and role decorators: keys are scoped to the
+    signed-in user.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if request.method != 'POST' or not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}, status=400)
+
+        cache = _cache()
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        cache_key = f'{KEY_PREFIX}:{request.user.pk}:{digest}'
+        lock_key = f'{cache_key}:lock'
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                return JsonResponse({'error': f'{HEADER} was already used for a different request'}, status=422)
+            return _replay(stored)
+
+        if not cache.add(lock_key, fingerprint, LOCK_TIMEOUT):
+            return JsonResponse({'error': 'This request is still being processed, retry shortly'}, status=409)
+        try:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code < 500 and not response.streaming:
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'content': response.content,
+                    'content_type': response.get('Content-Type'),
+                }, settings.IDEMPOTENCY_TTL)
+        finally:
+            cache.delete(lock_key)
+        return response
+
+    return wrapper
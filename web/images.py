@@ -0,0 +1,84 @@
+"""
+Resized JPEG and WebP derivatives of Category images.
+
+Derivatives are written next to the originals under a ``derived/``
+directory with a content hash in the filename, so they can be served with
+far-future cache headers and never need purging: a new upload produces
+new names. The names are stored on Category.image_variants as
+``{"source": <original name>, "<width>": {"jpeg": <name>, "webp": <name>}}``.
+"""
+import hashlib
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+}
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _flatten(image):
+    """JPEG has no alpha channel, so paint transparent images onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def build_variants(field_file):
+    """Write the derivatives of an uploaded image and return their names"""
+    storage = field_file.storage
+    stem = posixpath.splitext(posixpath.basename(field_file.name))[0]
+    directory = posixpath.join(posixpath.dirname(field_file.name), 'derived')
+
+    with field_file.open('rb'):
+        with Image.open(field_file) as source:
+            source = _flatten(ImageOps.exif_transpose(source))
+
+    # Never upscale; a small original still gets its own-size variant
+    widths = sorted({min(width, source.width) for width in settings.CATEGORY_IMAGE_WIDTHS})
+    variants = {'source': field_file.name}
+    for width in widths:
+        height = max(1, round(source.height * width / source.width))
+        resized = source.resize((width, height), Image.Resampling.LANCZOS)
+        variants[str(width)] = {}
+        for fmt in FORMATS:
+            data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            name = posixpath.join(directory, f'{stem}.{width}w.{digest}.{fmt}')
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(data))
+            variants[str(width)][fmt] = name
+    return variants
+
+
+def variant_names(variants):
+    """Every derivative file name in an image_variants mapping"""
+    return {
+        name
+        for width, formats in variants.items() if width != 'source'
+        for name in formats.values()
+    }
+
+
+def srcset(variants, fmt, storage):
+    """Render one format of an image_variants mapping as a srcset string"""
+    return ', '.join(
+        f'{storage.url(formats[fmt])} {width}w'
+        for width, formats in sorted(
+            ((int(width), formats) for width, formats in variants.items() if width != 'source'),
+        )
+    )
@@ -0,0 +1,166 @@
+"""
+Write-behind order journal (ORDER_INGESTION = "journal").
+
+At slot opening every order write serialises on the main SQLite database
+lock. In journal mode place_order and place_orders only validate the
+cart, reserve its capacity and append one row per item to a separate
+SQLite file in WAL mode, then answer 202 ("queued") at once. The drain_orders command moves queued rows into web_order with
+bulk_create in batches.
+
+Guarantees:
+
+* An acknowledged cart is durable: the append commits before the
+  response is sent.
+* Draining is idempotent. An order is identified by (user, category,
+  date), which the order views already allow only once; rows whose order
+  already exists are marked placed instead of inserted again, so a
+  drainer that dies between committing orders and updating the journal
+  simply redoes the bookkeeping. Run a single drainer.
+* A cart is still all or nothing, and capacity is reserved before it is
+  acknowledged: a sold-out item rejects the whole cart in the request,
+  so an acknowledged cart is never dropped for lack of capacity. The
+  places are committed before the append; a crash in between can only
+  leave a place unused, never oversell. A cart is rejected at drain time
+  only if one of its categories was deleted in the meantime.
+* Staff read their own writes: the duplicate check, the home page and
+  the user-orders API include their queued (and rejected) journal rows.
+  Manager and kitchen views only see orders once they are drained.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+
+QUEUED = 'queued'
+PLACED = 'placed'
+REJECTED = 'rejected'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_intent (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cart_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    price TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    order_id INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS order_intent_state ON order_intent (state, id);
+CREATE INDEX IF NOT EXISTS order_intent_user ON order_intent (user_id, date);
+"""
+
+_local = threading.local()
+
+
+def is_enabled():
+    return settings.ORDER_INGESTION == 'journal'
+
+
+def _connection():
+    """One connection per thread, created with the schema on first use"""
+    path = str(settings.ORDER_JOURNAL_PATH)
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        connection = sqlite3.connect(path, timeout=10, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # WAL with synchronous=NORMAL survives a process crash; only power loss can drop the last commits
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        _local.connection, _local.path = connection, path
+    return connection
+
+
+def append(user_id, date, items):
+    """
+    Durably queue one cart; items are (category_id, price) pairs.
+
+    Returns the cart id. All items are written in one transaction.
+    """
+    cart_id = uuid.uuid4().hex
+    now = time.time()
+    connection = _connection()
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        connection.executemany(
+            'INSERT INTO order_intent (cart_id, user_id, category_id, date, price, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(cart_id, user_id, category_id, date.isoformat(), str(price), now) for category_id, price in items],
+        )
+    return cart_id
+
+
+def pending_category_ids(user_id, date):
+    """Categories the user has queued for date that are not drained yet"""
+    rows = _connection().execute(
+        'SELECT category_id FROM order_intent WHERE user_id = ? AND date = ? AND state = ?',
+        (user_id, date.isoformat(), QUEUED),
+    )
+    return {category_id for category_id, in rows}
+
+
+def user_intents(user_id, since):
+    """The user's undrained and rejected rows for since and later days as dicts, oldest first"""
+    rows = _connection().execute(
+        'SELECT id, category_id, date, price, state, error, created_at FROM order_intent '
+        'WHERE user_id = ? AND date >= ? AND state != ? ORDER BY id',
+        (user_id, since.isoformat(), PLACED),
+    )
+    return [
+        {
+            'intent_id': intent_id,
+            'category_id': category_id,
+            'date': date.fromisoformat(day),
+            'price': Decimal(price),
+            'state': state,
+            'error': error,
+            'created_at': created_at,
+        }
+        for intent_id, category_id, day, price, state, error, created_at in rows
+    ]
+
+
+def queued_batch(limit):
+    """Oldest queued rows, never splitting a cart across batches"""
+    connection = _connection()
+    rows = connection.execute(
+        'SELECT id, cart_id, user_id, category_id, date, price FROM order_intent '
+        'WHERE state = ? ORDER BY id LIMIT ?',
+        (QUEUED, limit),
+    ).fetchall()
+    if len(rows) == limit:
+        last_cart = rows[-1][1]
+        rows = [row for row in rows if row[1] != last_cart] or connection.execute(
+            'SELECT id, cart_id, user_id, category_id, date, price FROM order_intent '
+            'WHERE state = ? AND cart_id = ? ORDER BY id',
+            (QUEUED, last_cart),
+        ).fetchall()
+    return rows
+
+
+def record(outcomes):
+    """Store drain results; outcomes are (intent id, state, order id, error) tuples"""
+    connection = _connection()
+    with connection:
+        connection.execute('BEGIN IMMEDIATE')
+        connection.executemany(
+            'UPDATE order_intent SET state = ?, order_id = ?, error = ? WHERE id = ?',
+            [(state, order_id, error, intent_id) for intent_id, state, order_id, error in outcomes],
+        )
+
+
+def purge(older_than):
+    """Delete drained rows created more than older_than seconds ago"""
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            'DELETE FROM order_intent WHERE state != ? AND created_at < ?',
+            (QUEUED, time.time() - older_than),
+        )
+    return cursor.rowcount
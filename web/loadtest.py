@@ -0,0 +1,144 @@
+"""Small HTTP client and statistics helpers shared by the load-test commands"""
+import http.cookiejar
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class HttpSession:
+    """A cookie-aware urllib client bound to one base URL"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def _cookie(self, name):
+        for cookie in self.cookies:
+            if cookie.name == name:
+                return cookie.value
+        return None
+
+    def request(self, method, path, data=None, headers=None):
+        """Send a request and return (status, elapsed_seconds, body)"""
+        url = self.base_url + path
+        headers = dict(headers or {})
+        headers.setdefault('Referer', url)
+        csrf_token = self._cookie('csrftoken')
+        if csrf_token and method != 'GET':
+            headers.setdefault('X-CSRFToken', csrf_token)
+
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            body = error.read()
+            status = error.code
+        except (urllib.error.URLError, OSError):
+            body = b''
+            status = 0
+        return status, time.perf_counter() - started, body
+
+    def get(self, path, headers=None):
+        return self.request('GET', path, headers=headers)
+
+    def post_json(self, path, payload, headers=None):
+        headers = dict(headers or {})
+        headers['Content-Type'] = 'application/json'
+        return self.request('POST', path, json.dumps(payload).encode('utf-8'), headers)
+
+    def login(self, login_path, username, password):
+        """Log in through a portal login form; returns True on success"""
+        status, _, body = self.get(login_path)
+        match = CSRF_INPUT_RE.search(body.decode('utf-8', 'ignore'))
+        if status != 200 or not match:
+            return False
+
+        form = urllib.parse.urlencode({
+            'csrfmiddlewaretoken': match.group(1),
+            'username': username,
+            'password': password,
+        }).encode('utf-8')
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        self.request('POST', login_path, form, headers)
+        return self._cookie('sessionid') is not None
+
+    def share_cookies_with(self, other):
+        """Copy this session's cookies into another session"""
+        for cookie in self.cookies:
+            other.cookies.set_cookie(cookie)
+
+
+class Stats:
+    """Thread-safe per-endpoint latency and error recorder"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = {}
+        self._bytes = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, status, elapsed, size=0):
+        with self._lock:
+            self._latencies.setdefault(endpoint, []).append(elapsed)
+            self._bytes[endpoint] = self._bytes.get(endpoint, 0) + size
+            if status == 0 or status >= 500:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        """Return {endpoint: metrics} with throughput and latency percentiles in ms"""
+        duration = (self.finished or time.perf_counter()) - self.started
+        result = {}
+        with self._lock:
+            for endpoint, latencies in sorted(self._latencies.items()):
+                count = len(latencies)
+                errors = self._errors.get(endpoint, 0)
+                result[endpoint] = {
+                    'requests': count,
+                    'errors': errors,
+                    'error_rate': errors / count if count else 0.0,
+                    'throughput': count / duration if duration else 0.0,
+                    'bytes': self._bytes.get(endpoint, 0),
+                    'p50_ms': percentile(latencies, 50) * 1000,
+                    'p95_ms': percentile(latencies, 95) * 1000,
+                    'p99_ms': percentile(latencies, 99) * 1000,
+                }
+        return result
+
+
+def format_summary(summary):
+    """Render a Stats.summary() dict as a fixed-width text table"""
+    lines = [
+        f"{'endpoint':<40} {'reqs':>7} {'err%':>6} {'req/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}"
+    ]
+    for endpoint, metrics in summary.items():
+        lines.append(
+            f"{endpoint:<40} {metrics['requests']:>7} {metrics['error_rate'] * 100:>6.1f} "
+            f"{metrics['throughput']:>8.1f} {metrics['p50_ms']:>8.1f} {metrics['p95_ms']:>8.1f} "
+            f"{metrics['p99_ms']:>8.1f}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from web.images import build_variants
+from web.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized JPEG/WebP derivatives for existing category images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Rebuild categories whose derivatives are already up to date',
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        for category in Category.objects.exclude(image='').exclude(image__isnull=True):
+            if not options['force'] and category.image_variants.get('source') == category.image.name:
+                continue
+            try:
+                variants = build_variants(category.image)
+            except OSError as error:
+                self.stderr.write(f'{category}: {error}')
+                continue
+            Category.objects.filter(pk=category.pk).update(image_variants=variants)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f'Built derivatives for {built} categories'))
@@ -0,0 +1,92 @@
+import json
+import time
+import warnings
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+
+from web.loadtest import percentile
+from web.middleware import brotli
+
+DEFAULT_PATHS = [
+    '/management/order-detail/',
+    '/management/bill-report/',
+    '/management/staff-list/',
+    '/management/api/staff-data/',
+    '/management/api/orders-by-date/?date={today}',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare bytes on the wire and latency of the biggest manager pages '
+        'and APIs without compression, with gzip and (if installed) brotli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Manager account to request as')
+        parser.add_argument('--path', action='append', help='Page to fetch; pass several times')
+        parser.add_argument('--repeat', type=int, default=10, help='Requests per page and encoding')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+
+        today = timezone.now().date().isoformat()
+        paths = options['path'] or [path.format(today=today) for path in DEFAULT_PATHS]
+        encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+        client = Client()
+        client.force_login(user)
+        results = {}
+        self.stdout.write(f"{'page':<48} {'encoding':<9} {'bytes':>9} {'ratio':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        try:
+            for path in paths:
+                results[path] = {}
+                for encoding in encodings:
+                    metrics = self.measure(client, path, encoding, options['repeat'])
+                    results[path][encoding] = metrics
+                    identity_bytes = results[path]['identity']['bytes'] or 1
+                    self.stdout.write(
+                        f"{path:<48} {metrics['encoding']:<9} {metrics['bytes']:>9} "
+                        f"{metrics['bytes'] / identity_bytes:>6.2f} {metrics['p50_ms']:>8.1f} {metrics['p95_ms']:>8.1f}"
+                    )
+        finally:
+            client.logout()
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure(self, client, path, encoding, repeat):
+        latencies = []
+        size = 0
+        content_encoding = 'identity'
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+            if response.streaming:
+                with warnings.catch_warnings():
+                    # The test client drains async streams synchronously
+                    warnings.simplefilter('ignore')
+                    body = b''.join(response)
+            else:
+                body = response.content
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            size = len(body)
+            content_encoding = response.get('Content-Encoding', 'identity')
+
+        return {
+            'encoding': content_encoding,
+            'bytes': size,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+        }
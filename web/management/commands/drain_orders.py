@@ -0,0 +1,123 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, transaction
+
+from web import journal
+from web.cache import bump_data_version, bump_user_orders_version
+from web.capacity import release
+from web.models import Category, DailyOrderSummary, Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Move queued order intents from the write-behind journal '
+        '(ORDER_INGESTION = "journal", see web.journal) into web_order in '
+        'batches. Run exactly one drainer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ORDER_JOURNAL_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=0.2, help='Seconds to wait while the journal is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is queued now and exit')
+        parser.add_argument(
+            '--purge-after', type=float, default=24 * 60 * 60,
+            help='Forget drained journal rows older than this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        placed = rejected = 0
+        last_purge = 0.0
+        while True:
+            rows = journal.queued_batch(options['batch_size'])
+            if rows:
+                started = time.perf_counter()
+                try:
+                    batch_placed, batch_rejected = self.drain(rows)
+                except OperationalError as error:
+                    # e.g. "database is locked" while the site writes; the batch rolled back, so retry it
+                    self.stderr.write(f'Retrying batch of {len(rows)}: {error}')
+                    time.sleep(options['interval'])
+                    continue
+                placed += batch_placed
+                rejected += batch_rejected
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'{len(rows)} intents: {batch_placed} placed, {batch_rejected} rejected '
+                        f'in {(time.perf_counter() - started) * 1000:.0f} ms'
+                    )
+                continue
+
+            if time.monotonic() - last_purge > 60 * 60:
+                journal.purge(options['purge_after'])
+                last_purge = time.monotonic()
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Drained {placed} orders, rejected {rejected}'))
+
+    def drain(self, rows):
+        """Insert one batch of journal rows; returns (placed, rejected) counts"""
+        carts = {}
+        for row in rows:
+            carts.setdefault(row[1], []).append(row)
+
+        outcomes = []
+        new_orders = []
+        with transaction.atomic():
+            # Orders that already exist make re-draining a batch harmless
+            existing = {
+                (user_id, category_id, order_date.isoformat()): order_id
+                for user_id, category_id, order_date, order_id in Order.objects.filter(
+                    user_id__in={row[2] for row in rows},
+                    category_id__in={row[3] for row in rows},
+                    date__in={row[4] for row in rows},
+                ).values_list('user_id', 'category_id', 'date', 'id')
+            }
+            capacities = dict(Category.objects.filter(
+                id__in={row[3] for row in rows},
+            ).values_list('id', 'daily_capacity'))
+
+            for cart in carts.values():
+                fresh = [row for row in cart if (row[2], row[3], row[4]) not in existing]
+                outcomes.extend(
+                    (row[0], journal.PLACED, existing[row[2], row[3], row[4]], None)
+                    for row in cart if (row[2], row[3], row[4]) in existing
+                )
+                if any(row[3] not in capacities for row in fresh):
+                    # The places were reserved when the cart was queued; give back those that still exist
+                    for row in fresh:
+                        if capacities.get(row[3]) is not None:
+                            release(row[3], date.fromisoformat(row[4]))
+                    outcomes.extend((row[0], journal.REJECTED, None, 'Category not found') for row in fresh)
+                    continue
+                for row in fresh:
+                    order = Order(
+                        user_id=row[2],
+                        category_id=row[3],
+                        date=date.fromisoformat(row[4]),
+                        price=row[5],
+                        status='pending',
+                    )
+                    new_orders.append((row[0], order))
+                    existing[row[2], row[3], row[4]] = order
+
+            Order.objects.bulk_create([order for _, order in new_orders])
+            # bulk_create skips the post_save handlers, so do their work once here
+            DailyOrderSummary.add_orders(order for _, order in new_orders)
+            transaction.on_commit(bump_data_version)
+            affected_users = {order.user_id for _, order in new_orders}
+            transaction.on_commit(lambda: bump_user_orders_version(*affected_users))
+
+        # A row queued twice within the batch resolves to the first one's order
+        outcomes = [
+            (intent_id, state, order_id.id if isinstance(order_id, Order) else order_id, error)
+            for intent_id, state, order_id, error in outcomes
+        ]
+        outcomes.extend((intent_id, journal.PLACED, order.id, None) for intent_id, order in new_orders)
+        journal.record(outcomes)
+        rejected = sum(1 for outcome in outcomes if outcome[1] == journal.REJECTED)
+        return len(new_orders), rejected
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from web.loadtest import HttpSession, Stats, format_summary, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure login throughput: password checks per second for each '
+        'configured hasher and, with --base-url, full portal logins against '
+        'a running deployment.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Password checks per hasher')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent logins')
+        parser.add_argument('--base-url', help='Also log in over HTTP against this deployment')
+        parser.add_argument('--login-path', default='/orders/login/')
+        parser.add_argument(
+            '--username', action='append',
+            help='Account to log in as over HTTP; pass several times to spread the load',
+        )
+        parser.add_argument('--password')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        if options['base_url'] and not (options['username'] and options['password']):
+            raise CommandError('--base-url needs --username and --password')
+
+        results = {'hashers': {}}
+        self.stdout.write(
+            f"{'hasher':<16} {'checks/s':>9} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}"
+        )
+        for path in settings.PASSWORD_HASHERS:
+            hasher = import_string(path)()
+            try:
+                metrics = self.measure_hasher(hasher, options)
+            except ValueError as error:
+                # Argon2 without argon2-cffi installed
+                self.stdout.write(f'{hasher.algorithm:<16} skipped: {error}')
+                continue
+            results['hashers'][hasher.algorithm] = metrics
+            self.stdout.write(
+                f"{hasher.algorithm:<16} {metrics['throughput']:>9.1f} {metrics['p50_ms']:>8.1f} "
+                f"{metrics['p95_ms']:>8.1f} {metrics['p99_ms']:>8.1f}"
+            )
+
+        if options['base_url']:
+            self.stdout.write(f"\n{options['base_url']} (preferred hasher: {get_hasher().algorithm})")
+            summary = self.measure_http(options)
+            self.stdout.write(format_summary(summary))
+            results['http'] = summary
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure_hasher(self, hasher, options):
+        encoded = hasher.encode('lunch-rush-password', hasher.salt())
+
+        def check(_):
+            started = time.perf_counter()
+            hasher.verify('lunch-rush-password', encoded)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            latencies = list(pool.map(check, range(options['logins'])))
+        duration = time.perf_counter() - started
+
+        return {
+            'checks': len(latencies),
+            'throughput': len(latencies) / duration if duration else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+
+    def measure_http(self, options):
+        stats = Stats()
+        usernames = options['username']
+        counter = iter(range(options['logins']))
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                session = HttpSession(options['base_url'])
+                started = time.perf_counter()
+                ok = session.login(options['login_path'], usernames[index % len(usernames)], options['password'])
+                # A refused or throttled login is not a server error; record it under its own name
+                stats.record('login' if ok else 'login (refused)', 200, time.perf_counter() - started)
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats.stop()
+        return stats.summary()
@@ -0,0 +1,268 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from web.cache import bump_data_version
+from web.loadtest import HttpSession, Stats, format_summary
+from web.models import Category, Menu, MenuTimeSlot, UserProfile
+from web.search import build_search_text
+
+# Each kitchen poll moves a few orders one step along this path
+NEXT_STATUS = {
+    'pending': 'confirmed',
+    'confirmed': 'preparing',
+    'preparing': 'ready',
+    'ready': 'completed',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed staff, kitchen and manager accounts and replay a lunch rush '
+        'against a running server: staff log in, poll categories and place '
+        'orders, the kitchen polls and advances orders, managers refresh the '
+        'bill report. The run is deterministic for a given --seed and its '
+        'results are stored as JSON so runs can be compared. The login governor '
+        'sees every client on one IP; its default LOGIN_IP_BURST covers the '
+        'default --staff, raise it for runs with more than about 1000. Start '
+        'the server with NPLUSONE_MODE=off when DEBUG is on, so the N+1 '
+        'checks stay out of the timings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--staff', type=int, default=300)
+        parser.add_argument('--kitchen', type=int, default=2)
+        parser.add_argument('--managers', type=int, default=2)
+        parser.add_argument('--categories', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=600.0, help='Length of the rush in seconds')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='rush', help='Prefix of the seeded usernames and categories')
+        parser.add_argument('--password', default='lunch-rush')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse the accounts of an earlier run')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded data and exit')
+        parser.add_argument('--label', default='', help='Free-form name stored with the results')
+        parser.add_argument(
+            '--results-dir', default=str(settings.BASE_DIR / 'loadtest-results'),
+            help='Directory the JSON results are written to',
+        )
+        parser.add_argument('--compare', help='Earlier results file to print p95 changes against')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup(options['prefix'])
+            return
+
+        if not options['skip_seed']:
+            self.seed(options)
+        staff = [f"{options['prefix']}-staff-{index}" for index in range(options['staff'])]
+        kitchen = [f"{options['prefix']}-kitchen-{index}" for index in range(options['kitchen'])]
+        managers = [f"{options['prefix']}-manager-{index}" for index in range(options['managers'])]
+
+        self.stdout.write(
+            f"Lunch rush: {len(staff)} staff, {len(kitchen)} kitchen, {len(managers)} managers "
+            f"over {options['duration']:.0f}s against {options['base_url']} (seed {options['seed']})"
+        )
+        stats = self.run(staff, kitchen, managers, options)
+        summary = stats.summary()
+        self.stdout.write(format_summary(summary))
+
+        path = self.store(summary, options)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+        if options['compare']:
+            self.compare(summary, options['compare'])
+
+    def seed(self, options):
+        prefix = options['prefix']
+        password = make_password(options['password'])
+        accounts = (
+            [(f'{prefix}-staff-{index}', 'staff') for index in range(options['staff'])]
+            + [(f'{prefix}-kitchen-{index}', 'kitchen') for index in range(options['kitchen'])]
+            + [(f'{prefix}-manager-{index}', 'manager') for index in range(options['managers'])]
+        )
+
+        with transaction.atomic():
+            existing = set(User.objects.filter(username__startswith=f'{prefix}-').values_list('username', flat=True))
+            users = User.objects.bulk_create([
+                User(username=username, password=password, first_name=username.title())
+                for username, _ in accounts if username not in existing
+            ], batch_size=500)
+            roles = dict(accounts)
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, role=roles[user.username], search_text=build_search_text(user))
+                for user in users
+            ], batch_size=500)
+
+            for index in range(options['categories']):
+                category, created = Category.objects.get_or_create(
+                    name=f'{prefix} category {index}',
+                    defaults={'price': Decimal(40 + 10 * index)},
+                )
+                if created:
+                    Menu.objects.create(category=category, name=f'{prefix} dish {index}')
+
+            today = timezone.localdate()
+            MenuTimeSlot.objects.update_or_create(
+                name=f'{prefix} lunch rush',
+                defaults={
+                    'start_date': today,
+                    'end_date': today + timedelta(days=1),
+                    'start_time': dt_time(0, 0),
+                    'end_time': dt_time(23, 59, 59),
+                    'is_active': True,
+                },
+            )
+        bump_data_version()
+        self.stdout.write(f'Seeded {len(users)} new accounts')
+
+    def cleanup(self, prefix):
+        with transaction.atomic():
+            users, _ = User.objects.filter(username__startswith=f'{prefix}-').delete()
+            categories, _ = Category.objects.filter(name__startswith=f'{prefix} category ').delete()
+            MenuTimeSlot.objects.filter(name=f'{prefix} lunch rush').delete()
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {users} user rows and {categories} category rows'))
+
+    def run(self, staff, kitchen, managers, options):
+        stats = Stats()
+        rng = random.Random(options['seed'])
+        duration = options['duration']
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+
+        def login(session, path, username):
+            began = time.perf_counter()
+            ok = session.login(path, username, options['password'])
+            stats.record(f'login {path}', 200 if ok else 0, time.perf_counter() - began)
+            return ok
+
+        def call(session, name, method, *args):
+            status, elapsed, body = method(*args)
+            stats.record(name, status, elapsed, len(body))
+            return status, body
+
+        def wait_until(offset):
+            delay = started + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        def staff_client(username, plan):
+            wait_until(plan['arrival'])
+            session = HttpSession(options['base_url'])
+            if not login(session, '/orders/login/', username):
+                return
+            categories = []
+            for _ in range(plan['polls']):
+                status, body = call(session, 'get_categories', session.get, '/orders/api/categories/')
+                if status == 200:
+                    categories = [category['id'] for category in json.loads(body)['categories']]
+                time.sleep(plan['think'])
+            if categories:
+                call(session, 'place_orders', session.post_json, '/orders/api/place-orders/',
+                     {'category_ids': sorted(categories)[:plan['orders']]})
+            call(session, 'get_user_orders', session.get, '/orders/api/user-orders/')
+
+        def kitchen_client(username, seed):
+            local_rng = random.Random(seed)
+            session = HttpSession(options['base_url'])
+            if not login(session, '/kitchen/login/', username):
+                return
+            statuses = {}
+            while time.monotonic() < deadline:
+                status, body = call(session, 'get_today_orders', session.get, '/kitchen/api/today-orders/')
+                if status == 200:
+                    order_ids = sorted(
+                        order['id']
+                        for group in json.loads(body)['categories']
+                        for order in group['orders']
+                        if statuses.get(order['id']) != 'completed'
+                    )
+                    for order_id in local_rng.sample(order_ids, min(3, len(order_ids))):
+                        statuses[order_id] = NEXT_STATUS[statuses.get(order_id, 'pending')]
+                        call(session, 'update_order_status', session.post_json, '/kitchen/api/update-order-status/',
+                             {'order_id': order_id, 'status': statuses[order_id]})
+                time.sleep(3)
+
+        def manager_client(username):
+            session = HttpSession(options['base_url'])
+            if not login(session, '/management/login/', username):
+                return
+            while time.monotonic() < deadline:
+                call(session, 'bill_report', session.get, '/management/bill-report/')
+                time.sleep(10)
+
+        # Staff arrive around a peak a third of the way into the window
+        plans = {
+            username: {
+                'arrival': rng.triangular(0, duration * 0.9, duration * 0.3),
+                'polls': rng.randint(1, 4),
+                'think': rng.uniform(1, 5),
+                'orders': rng.choice([1, 1, 1, 2]),
+            }
+            for username in staff
+        }
+        threads = (
+            [threading.Thread(target=staff_client, args=(username, plans[username])) for username in staff]
+            + [threading.Thread(target=kitchen_client, args=(username, rng.random())) for username in kitchen]
+            + [threading.Thread(target=manager_client, args=(username,)) for username in managers]
+        )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats.stop()
+        return stats
+
+    def store(self, summary, options):
+        results_dir = Path(options['results_dir'])
+        results_dir.mkdir(parents=True, exist_ok=True)
+        now = datetime.now()
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        name = now.strftime('%Y%m%d-%H%M%S')
+        if options['label']:
+            name += f"-{options['label']}"
+        path = results_dir / f'{name}.json'
+        config = {
+            key: options[key]
+            for key in ('base_url', 'staff', 'kitchen', 'managers', 'categories', 'duration', 'seed', 'label')
+        }
+        with open(path, 'w') as fp:
+            json.dump({'started_at': now.isoformat(), 'commit': commit, 'config': config, 'summary': summary}, fp, indent=2)
+        return path
+
+    def compare(self, summary, previous_path):
+        try:
+            with open(previous_path) as fp:
+                previous = json.load(fp)['summary']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Cannot read {previous_path}: {error}')
+
+        self.stdout.write(f"\n{'endpoint':<40} {'p95 before':>11} {'p95 now':>9} {'change':>8}")
+        for endpoint, metrics in summary.items():
+            before = previous.get(endpoint)
+            if not before or not before['p95_ms']:
+                continue
+            change = (metrics['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            self.stdout.write(
+                f"{endpoint:<40} {before['p95_ms']:>11.1f} {metrics['p95_ms']:>9.1f} {change:>+7.1f}%"
+            )
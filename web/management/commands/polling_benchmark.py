@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from web.loadtest import HttpSession, Stats, format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Hold many concurrent polling clients against one or more running '
+        'deployments (e.g. mod_wsgi and uvicorn) and compare their latency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', action='append', required=True,
+            help='Deployment to test; pass several times to compare them',
+        )
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--login-path', default='/kitchen/login/')
+        parser.add_argument(
+            '--endpoint', action='append',
+            help='Polled path (default: the kitchen today-orders API)',
+        )
+        parser.add_argument('--clients', type=int, default=200)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds per deployment')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls per client')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoint'] or ['/kitchen/api/today-orders/']
+        results = {}
+
+        for base_url in options['base_url']:
+            self.stdout.write(f"\n{base_url} ({options['clients']} clients, {options['duration']:.0f}s)")
+            summary = self.run_against(base_url, endpoints, options)
+            self.stdout.write(format_summary(summary))
+            results[base_url] = summary
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_against(self, base_url, endpoints, options):
+        # Log in once and share the session cookie; we measure polling, not logins
+        primary = HttpSession(base_url)
+        if not primary.login(options['login_path'], options['username'], options['password']):
+            raise CommandError(f'Login failed against {base_url}')
+
+        stats = Stats()
+        deadline = time.monotonic() + options['duration']
+
+        def client(index):
+            session = HttpSession(base_url)
+            primary.share_cookies_with(session)
+            # Spread the first polls over one interval instead of a thundering herd
+            time.sleep(options['interval'] * index / max(options['clients'], 1))
+            while time.monotonic() < deadline:
+                for endpoint in endpoints:
+                    status, elapsed, body = session.get(endpoint)
+                    stats.record(endpoint, status, elapsed, len(body))
+                time.sleep(options['interval'])
+
+        threads = [
+            threading.Thread(target=client, args=(index,), daemon=True)
+            for index in range(options['clients'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats.stop()
+        return stats.summary()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from web.models import DailyOrderSummary, Order
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-day order index used by the manager calendar.'
+
+    def handle(self, *args, **options):
+        rows = Order.objects.order_by().values('date').annotate(
+            order_count=Count('id'),
+            total_amount=Sum('price'),
+        )
+        with transaction.atomic():
+            DailyOrderSummary.objects.all().delete()
+            DailyOrderSummary.objects.bulk_create(
+                [DailyOrderSummary(**row) for row in rows],
+                batch_size=500,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {DailyOrderSummary.objects.count()} days'
+        ))
@@ -0,0 +1,82 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from web.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Time server-side rendering of the heavy manager pages with template '
+        'fragment caching off ("before") and on ("after").'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Manager account to render as')
+        parser.add_argument(
+            '--path', action='append',
+            help='Page to render; pass several times (default: order detail and the '
+                 'first staff member detail)',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Renders per page and mode')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.select_related('profile').get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+
+        paths = options['path'] or self.default_paths()
+        results = {}
+        self.stdout.write(f"{'page':<40} {'mode':<7} {'first ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>9}")
+        for path in paths:
+            results[path] = {}
+            for mode, timeout in (('before', 0), ('after', None)):
+                metrics = self.measure(path, user, options['repeat'], timeout)
+                results[path][mode] = metrics
+                self.stdout.write(
+                    f"{path:<40} {mode:<7} {metrics['first_ms']:>9.1f} {metrics['p50_ms']:>8.1f} "
+                    f"{metrics['p95_ms']:>8.1f} {metrics['bytes']:>9}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def default_paths(self):
+        paths = ['/management/order-detail/']
+        staff_id = User.objects.filter(profile__role='staff').values_list('id', flat=True).first()
+        if staff_id:
+            paths.append(f'/management/member-detail/{staff_id}/')
+        return paths
+
+    def measure(self, path, user, repeat, timeout):
+        factory = RequestFactory()
+        match = resolve(path.split('?')[0])
+        settings_override = {} if timeout is None else {'FRAGMENT_CACHE_TIMEOUT': timeout}
+
+        latencies = []
+        size = 0
+        with override_settings(**settings_override):
+            for _ in range(max(repeat, 1)):
+                request = factory.get(path)
+                request.user = user
+                started = time.perf_counter()
+                response = match.func(request, *match.args, **match.kwargs)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}')
+                size = len(response.content)
+
+        return {
+            'first_ms': latencies[0] * 1000,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'bytes': size,
+        }
@@ -0,0 +1,246 @@
+import bisect
+import itertools
+import random
+import time
+from datetime import time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from web.cache import bump_data_version
+from web.models import BillReport, Category, Menu, MenuTimeSlot, Order, UserProfile
+from web.search import build_search_text
+
+CATEGORY_NAMES = ['Breakfast', 'Lunch', 'Snacks', 'Dinner', 'Juice', 'Tea', 'Dessert', 'Special']
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-sized synthetic data (staff, orders spread over '
+        'years, payment history and weekly time slots) with bulk inserts. The '
+        'same --seed always produces the same data. Seeded rows are marked with '
+        '--prefix so they can be removed with --flush.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Staff accounts')
+        parser.add_argument('--kitchen', type=int, default=10)
+        parser.add_argument('--managers', type=int, default=5)
+        parser.add_argument('--categories', type=int, default=6, help=f'At most {len(CATEGORY_NAMES)}')
+        parser.add_argument('--orders', type=int, default=5_000_000)
+        parser.add_argument('--years', type=float, default=3.0, help='How far back the order history goes')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='seed', help='Prefix of the generated usernames and categories')
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Rows per INSERT transaction')
+        parser.add_argument(
+            '--user-skew', type=float, default=0.8,
+            help='Zipf exponent of how unevenly orders are spread over staff (0 = evenly)',
+        )
+        parser.add_argument(
+            '--weekend-ratio', type=float, default=0.15,
+            help='Weekend order volume relative to a weekday',
+        )
+        parser.add_argument(
+            '--paid-ratio', type=float, default=0.95,
+            help='Share of orders older than --open-days that are completed (paid)',
+        )
+        parser.add_argument('--open-days', type=int, default=30, help='Recent days that are still mostly unpaid')
+        parser.add_argument('--flush', action='store_true', help='Delete earlier data with this prefix first')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['categories'] <= len(CATEGORY_NAMES):
+            raise CommandError(f'--categories must be between 1 and {len(CATEGORY_NAMES)}')
+
+        self.rng = random.Random(options['seed'])
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        if options['flush']:
+            self.flush(options['prefix'])
+
+        staff_ids = self.create_users(options)
+        categories = self.create_categories(options)
+        self.create_time_slots(options)
+        totals = self.create_orders(staff_ids, categories, options)
+        self.create_bill_reports(totals, options)
+
+        call_command('rebuild_daily_summaries', stdout=self.stdout)
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.0f}s'))
+
+    def bulk_insert(self, model, rows):
+        """bulk_create an iterable of unsaved instances in batches; returns the row count"""
+        count = 0
+        started = time.perf_counter()
+        rows = iter(rows)
+        while batch := list(itertools.islice(rows, self.batch_size)):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+            if self.verbosity > 1:
+                rate = count / (time.perf_counter() - started)
+                self.stdout.write(f'  {model.__name__}: {count} rows ({rate:,.0f}/s)')
+        self.stdout.write(f'{model.__name__}: {count} rows in {time.perf_counter() - started:.1f}s')
+        return count
+
+    def flush(self, prefix):
+        # Raw deletes: the ORM would load every order to send delete signals
+        users = f"SELECT id FROM {User._meta.db_table} WHERE username LIKE %s"
+        pattern = f'{prefix}-%'
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (Order, BillReport, UserProfile):
+                cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE user_id IN ({users})', [pattern])
+            cursor.execute(f'DELETE FROM {User._meta.db_table} WHERE username LIKE %s', [pattern])
+        Category.objects.filter(name__startswith=f'{prefix} ').delete()
+        MenuTimeSlot.objects.filter(name__startswith=f'{prefix} ').delete()
+        self.stdout.write(f'Flushed earlier {prefix} data')
+
+    def create_users(self, options):
+        prefix = options['prefix']
+        password = make_password(options['password'])
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f'{prefix} data already exists; pass --flush or another --prefix')
+
+        accounts = (
+            [(f'{prefix}-staff-{index}', 'staff') for index in range(options['users'])]
+            + [(f'{prefix}-kitchen-{index}', 'kitchen') for index in range(options['kitchen'])]
+            + [(f'{prefix}-manager-{index}', 'manager') for index in range(options['managers'])]
+        )
+        joined = timezone.now() - timedelta(days=365 * options['years'])
+        self.bulk_insert(User, (
+            User(
+                username=username,
+                password=password,
+                first_name=f'{role.title()} {index}',
+                email=f'{username}@example.com',
+                date_joined=joined,
+            )
+            for index, (username, role) in enumerate(accounts)
+        ))
+
+        roles = dict(accounts)
+        users = list(User.objects.filter(username__startswith=f'{prefix}-').order_by('id'))
+        phone_numbers = {user.id: f'9{self.rng.randrange(10 ** 9):09d}' for user in users}
+        self.bulk_insert(UserProfile, (
+            UserProfile(
+                user=user,
+                role=roles[user.username],
+                phone_number=phone_numbers[user.id],
+                search_text=build_search_text(user, phone_numbers[user.id]),
+            )
+            for user in users
+        ))
+        return [user.id for user in users if roles[user.username] == 'staff']
+
+    def create_categories(self, options):
+        categories = []
+        for index, name in enumerate(CATEGORY_NAMES[:options['categories']]):
+            category = Category.objects.create(name=f"{options['prefix']} {name}", price=Decimal(30 + 10 * index))
+            Menu.objects.create(category=category, name=f'{name} of the day')
+            categories.append(category)
+        return categories
+
+    def create_time_slots(self, options):
+        """One lunch slot per working week over the whole history"""
+        today = timezone.localdate()
+        monday = today - timedelta(days=today.weekday() + 7 * int(52 * options['years']))
+        weeks = []
+        while monday <= today:
+            weeks.append(monday)
+            monday += timedelta(days=7)
+        self.bulk_insert(MenuTimeSlot, (
+            MenuTimeSlot(
+                name=f"{options['prefix']} lunch {week.isoformat()}",
+                start_date=week,
+                end_date=week + timedelta(days=4),
+                start_time=dt_time(10, 30),
+                end_time=dt_time(13, 0),
+            )
+            for week in weeks
+        ))
+
+    def create_orders(self, staff_ids, categories, options):
+        """Insert the orders and return per user and month [total, completed] amounts"""
+        if not staff_ids:
+            raise CommandError('--users must be at least 1')
+
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in range(int(365 * options['years']), -1, -1)]
+        day_weights = [options['weekend_ratio'] if day.weekday() >= 5 else 1.0 for day in days]
+        per_weight = options['orders'] / sum(day_weights)
+
+        # A few heavy users and a long tail, in a seeded random order
+        users = list(staff_ids)
+        self.rng.shuffle(users)
+        user_cum_weights = list(itertools.accumulate(
+            1 / (rank + 1) ** options['user_skew'] for rank in range(len(users))
+        ))
+        category_cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(categories))))
+        open_since = today - timedelta(days=options['open_days'])
+        totals = {}
+
+        def pick(cum_weights, population):
+            return population[bisect.bisect(cum_weights, self.rng.random() * cum_weights[-1])]
+
+        def orders():
+            carry = 0.0
+            for day, weight in zip(days, day_weights):
+                carry += weight * per_weight
+                wanted = min(int(carry), len(users) * len(categories))
+                carry -= wanted
+
+                # One order per user, category and day, like place_order allows
+                pairs = set()
+                for _ in range(wanted * 3):
+                    if len(pairs) == wanted:
+                        break
+                    pairs.add((pick(user_cum_weights, users), pick(category_cum_weights, categories)))
+
+                paid_ratio = options['paid_ratio'] if day < open_since else 0.3
+                month = day.replace(day=1)
+                for user_id, category in sorted(pairs, key=lambda pair: (pair[0], pair[1].id)):
+                    completed = self.rng.random() < paid_ratio
+                    amounts = totals.setdefault((user_id, month), [Decimal(0), Decimal(0)])
+                    amounts[0] += category.price
+                    if completed:
+                        amounts[1] += category.price
+                    yield Order(
+                        user_id=user_id,
+                        category=category,
+                        date=day,
+                        price=category.price,
+                        status='completed' if completed else 'pending',
+                    )
+
+        self.bulk_insert(Order, orders())
+        return totals
+
+    def create_bill_reports(self, totals, options):
+        """One payment record per user and month, dated within that month"""
+        today = timezone.localdate()
+
+        def reports():
+            for (user_id, month), (total, completed) in sorted(totals.items()):
+                if not completed:
+                    continue
+                expense = (total * Decimal(self.rng.uniform(0.6, 0.8))).quantize(Decimal('0.01'))
+                yield BillReport(
+                    user_id=user_id,
+                    date=min(month + timedelta(days=self.rng.randrange(25, 28)), today),
+                    user_total=total,
+                    income=total,
+                    expense=expense,
+                    profit=total - expense,
+                    completed_amount=completed,
+                    pending_amount=total - completed,
+                    balance=total - completed,
+                )
+
+        self.bulk_insert(BillReport, reports())
@@ -0,0 +1,88 @@
+import json
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from web.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-request cost of each session storage mode: time and '
+        'database queries spent loading (and sometimes saving) a logged-in session.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--storage', action='append', choices=sorted(settings.SESSION_ENGINES),
+            help='Storage mode to measure; pass several times (default: all)',
+        )
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per mode')
+        parser.add_argument(
+            '--write-every', type=int, default=10,
+            help='Modify and save the session on every Nth request (0 = never)',
+        )
+        parser.add_argument('--output', help='Write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+
+        results = {}
+        self.stdout.write(
+            f"{'storage':<16} {'queries/req':>12} {'p50us':>8} {'p95us':>8} {'p99us':>8} {'total ms':>9}"
+        )
+        for storage in options['storage'] or sorted(settings.SESSION_ENGINES):
+            metrics = self.measure(settings.SESSION_ENGINES[storage], options)
+            results[storage] = metrics
+            self.stdout.write(
+                f"{storage:<16} {metrics['queries_per_request']:>12.2f} {metrics['p50_us']:>8.1f} "
+                f"{metrics['p95_us']:>8.1f} {metrics['p99_us']:>8.1f} {metrics['total_ms']:>9.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(results, fp, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure(self, engine, options):
+        SessionStore = import_module(engine).SessionStore
+
+        # What django.contrib.auth.login() leaves in a staff session
+        session = SessionStore()
+        session.update({
+            '_auth_user_id': '1',
+            '_auth_user_backend': settings.AUTHENTICATION_BACKENDS[0],
+            '_auth_user_hash': 'x' * 64,
+        })
+        session.save()
+        session_key = session.session_key
+
+        latencies = []
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for index in range(options['requests']):
+                    started = time.perf_counter()
+                    session = SessionStore(session_key)
+                    session.get('_auth_user_id')
+                    if options['write_every'] and index % options['write_every'] == 0:
+                        session['last_seen'] = index
+                        session.save()
+                        session_key = session.session_key
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            SessionStore(session_key).delete()
+
+        return {
+            'engine': engine,
+            'requests': options['requests'],
+            'queries_per_request': len(queries) / options['requests'],
+            'p50_us': percentile(latencies, 50) * 1e6,
+            'p95_us': percentile(latencies, 95) * 1e6,
+            'p99_us': percentile(latencies, 99) * 1e6,
+            'total_ms': sum(latencies) * 1000,
+        }
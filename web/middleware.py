@@ -0,0 +1,147 @@
+import secrets
+import struct
+import zlib
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+re_accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+# Brotli has no header field to pad, so it never compresses these; see process_response()
+BREACH_SENSITIVE_TYPES = {'text/html'}
+
+
+def _random_padding(max_random_bytes):
+    """The random-length gzip file name compress_string() adds against BREACH"""
+    return get_random_string(secrets.randbelow(max_random_bytes) + 1).encode('ascii')
+
+
+def _gzip_stream_compressor(max_random_bytes):
+    """Single-member gzip with a padded header, sync-flushed after every chunk"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # Magic, deflate, FNAME flag, no mtime, unknown OS, then the padding as the file name
+    header = b'\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff' + _random_padding(max_random_bytes) + b'\x00'
+    crc = size = 0
+
+    def compress(chunk):
+        nonlocal header, crc, size
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        # Sync-flush every chunk so streamed JSON reaches the client as it is produced
+        data = header + compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        header = b''
+        return data
+
+    def finish():
+        return header + compressor.flush() + struct.pack('<II', crc, size & 0xffffffff)
+
+    return compress, finish
+
+
+def _stream_compressor(encoding, max_random_bytes):
+    """Return (compress_chunk, finish) sharing one compression context"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+    return _gzip_stream_compressor(max_random_bytes)
+
+
+def compress_stream(chunks, encoding, max_random_bytes=100):
+    compress, finish = _stream_compressor(encoding, max_random_bytes)
+    for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding, max_random_bytes=100):
+    compress, finish = _stream_compressor(encoding, max_random_bytes)
+    async for chunk in chunks:
+        data = compress(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Brotli or gzip for text responses at least COMPRESSION_MIN_SIZE bytes long.
+
+    Unlike GZipMiddleware, only COMPRESSION_CONTENT_TYPES are compressed
+    (PDF exports and images are left alone) and a streamed response keeps a
+    single compressor for its whole body, flushed after every chunk, instead
+    of a separate gzip member per chunk.
+
+    Every gzip response, streamed or not, keeps GZipMiddleware's BREACH
+    mitigation: a random-length file name in the gzip header. Brotli has
+    nowhere to put such padding, so it is only used for types that do not
+    carry CSRF tokens (BREACH_SENSITIVE_TYPES get gzip).
+    """
+
+    def _encoding(self, request, content_type):
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (
+            brotli is not None
+            and content_type not in BREACH_SENSITIVE_TYPES
+            and re_accepts_brotli.search(accept_encoding)
+        ):
+            return 'br'
+        if re_accepts_gzip.search(accept_encoding):
+            return 'gzip'
+        return None
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self._encoding(request, content_type)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            # The compressed size is unknown until the stream ends
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=5)
+            else:
+                # Random filename padding keeps GZipMiddleware's BREACH mitigation
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # A strong ETag must not survive a change of encoding (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
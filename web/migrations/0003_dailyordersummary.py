@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:11
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_daily_summaries(apps, schema_editor):
+    Order = apps.get_model('web', 'Order')
+    DailyOrderSummary = apps.get_model('web', 'DailyOrderSummary')
+    rows = Order.objects.order_by().values('date').annotate(
+        order_count=Count('id'),
+        total_amount=Sum('price'),
+    )
+    DailyOrderSummary.objects.bulk_create(
+        [DailyOrderSummary(**row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0002_menutimeslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily Order Summaries',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='date',
+            field=models.DateField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(build_daily_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:13
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE web_userprofile_search USING fts5("
+    "search_text, content='web_userprofile', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER web_userprofile_search_ai AFTER INSERT ON web_userprofile BEGIN "
+    "INSERT INTO web_userprofile_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER web_userprofile_search_ad AFTER DELETE ON web_userprofile BEGIN "
+    "INSERT INTO web_userprofile_search(web_userprofile_search, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER web_userprofile_search_au AFTER UPDATE OF search_text ON web_userprofile BEGIN "
+    "INSERT INTO web_userprofile_search(web_userprofile_search, rowid, search_text) "
+    "VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO web_userprofile_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO web_userprofile_search(web_userprofile_search) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS web_userprofile_search_au",
+    "DROP TRIGGER IF EXISTS web_userprofile_search_ad",
+    "DROP TRIGGER IF EXISTS web_userprofile_search_ai",
+    "DROP TABLE IF EXISTS web_userprofile_search",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX web_userprofile_search_trgm ON web_userprofile USING gin (search_text gin_trgm_ops)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS web_userprofile_search_trgm",
+]
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def fill_search_text(apps, schema_editor):
+    UserProfile = apps.get_model('web', 'UserProfile')
+    profiles = list(UserProfile.objects.select_related('user'))
+    for profile in profiles:
+        user = profile.user
+        profile.search_text = _normalize(' '.join(filter(None, [
+            user.first_name, user.last_name, user.username, user.email, profile.phone_number,
+        ])))
+    UserProfile.objects.bulk_update(profiles, ['search_text'], batch_size=500)
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0003_dailyordersummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Normalized name, username, email and phone used by staff search'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
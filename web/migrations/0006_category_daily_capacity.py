@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web', '0005_category_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='daily_capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Orders accepted per day; leave empty for no limit', null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_capacities', to='web.category')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily Capacities',
+                'constraints': [models.UniqueConstraint(fields=('category', 'date'), name='unique_daily_capacity')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -6,7 +9,9 @@ class Category(models.Model):
     name = models.CharField(max_length=255)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='category_images/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text='Resized JPEG and WebP copies of image, see web.images')
     is_locked = models.BooleanField(default=False)
+    daily_capacity = models.PositiveIntegerField(blank=True, null=True, help_text='Orders accepted per day; leave empty for no limit')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -55,6 +60,18 @@ class CustomFood(models.Model):
         verbose_name_plural = "Custom Foods"
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_refs(self):
+        """Join the user and category that __str__ and order listings show"""
+        return self.select_related('user', 'category')
+
+    def for_listing(self):
+        """with_refs() without the columns no order listing shows (notes, password hash, images)"""
+        return self.with_refs().defer(
+            'notes', 'user__password', 'category__image', 'category__image_variants',
+        )
+
+
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -67,13 +84,15 @@ class Order(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
-    date = models.DateField(default=timezone.now)
+    date = models.DateField(default=timezone.now, db_index=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=ORDER_STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True, null=True)
 
+    objects = OrderQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username} - {self.category.name} - {self.date}"
 
@@ -81,6 +100,100 @@ class Order(models.Model):
         ordering = ['-created_at']
 
 
+class DailyOrderSummary(models.Model):
+    """Per-day order count and amount, kept in sync with Order writes"""
+    date = models.DateField(unique=True)
+    order_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.date} - {self.order_count} orders"
+
+    class Meta:
+        verbose_name_plural = "Daily Order Summaries"
+        ordering = ['date']
+
+    @classmethod
+    def add(cls, date, count, amount):
+        """
+        Add count orders worth amount to the day (negative to take them off).
+
+        One F() update per call, so concurrent order writes add up instead
+        of overwriting each other and nothing rescans the day. The row is
+        created with the day's first order and removed with its last.
+        """
+        if not count and not amount:
+            return
+        with transaction.atomic():
+            if cls.objects.filter(date=date).update(
+                order_count=F('order_count') + count,
+                total_amount=F('total_amount') + amount,
+            ):
+                if count < 0:
+                    cls.objects.filter(date=date, order_count=0).delete()
+                return
+            if count <= 0:
+                # The day was never indexed (e.g. a failed rebuild), so there is nothing to adjust
+                cls.refresh(date)
+                return
+            try:
+                with transaction.atomic():
+                    cls.objects.create(date=date, order_count=count, total_amount=amount)
+            except IntegrityError:
+                # A concurrent write created the row first
+                cls.objects.filter(date=date).update(
+                    order_count=F('order_count') + count,
+                    total_amount=F('total_amount') + amount,
+                )
+
+    @classmethod
+    def add_orders(cls, orders, sign=1):
+        """add() a batch of orders per date, e.g. after bulk_create(); sign=-1 takes them off"""
+        totals = {}
+        for order in orders:
+            count, amount = totals.get(order.date, (0, Decimal(0)))
+            totals[order.date] = (count + 1, amount + Decimal(str(order.price)))
+        for date, (count, amount) in totals.items():
+            cls.add(date, sign * count, sign * amount)
+
+    @classmethod
+    def refresh(cls, date):
+        """Recompute the summary row for one date from the orders table"""
+        with transaction.atomic():
+            # Lock the row first so a concurrent add() cannot land between the aggregate and the write
+            cls.objects.select_for_update().filter(date=date).first()
+            totals = Order.objects.filter(date=date).aggregate(
+                order_count=Count('id'),
+                total_amount=Sum('price'),
+            )
+            if totals['order_count']:
+                cls.objects.update_or_create(date=date, defaults={
+                    'order_count': totals['order_count'],
+                    'total_amount': totals['total_amount'] or 0,
+                })
+            else:
+                cls.objects.filter(date=date).delete()
+
+
+class DailyCapacity(models.Model):
+    """Orders still accepted for a category on a day, see web.capacity"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_capacities')
+    date = models.DateField()
+    capacity = models.PositiveIntegerField()
+    remaining = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.category.name} - {self.date}: {self.remaining}/{self.capacity}"
+
+    class Meta:
+        verbose_name_plural = "Daily Capacities"
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'date'], name='unique_daily_capacity'),
+        ]
+
+
 class BillReport(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bill_reports')
     date = models.DateField(default=timezone.now)
@@ -158,6 +271,7 @@ class UserProfile(models.Model):
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='staff')
     is_active = models.BooleanField(default=True)
+    search_text = models.TextField(blank=True, default='', editable=False, help_text="Normalized name, username, email and phone used by staff search")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,130 @@
+"""
+N+1 query detection for development and tests.
+
+A view that runs one query per row of a listing executes the same SQL
+with different parameters over and over. While a request is watched,
+every query is reduced to its shape (the SQL with its parameters left
+out and IN lists collapsed), and a shape that runs NPLUSONE_THRESHOLD
+times or more is reported together with the stack of the code that ran
+it: logged to the "web.nplusone" logger (NPLUSONE_MODE = "log") or
+raised as NPlusOneError when the request ends (NPLUSONE_MODE = "raise").
+
+NPlusOneMiddleware watches whole requests and removes itself when
+NPLUSONE_MODE is "off". NPlusOneTestMixin switches it to "raise" for
+every test-client request of a TestCase and adds assertNoNPlusOne() for
+code that runs outside a request.
+"""
+import logging
+import re
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MIDDLEWARE = 'web.nplusone.NPlusOneMiddleware'
+re_placeholder_list = re.compile(r'\((?:%s, )+%s\)')
+re_values_rows = re.compile(r'(\(\.\.\.\))(?:, \(\.\.\.\))+')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def query_shape(sql):
+    """SQL without its parameters, with IN lists and VALUES rows of any length alike"""
+    return re_values_rows.sub(r'\1', re_placeholder_list.sub('(...)', sql))
+
+
+def _caller_stack():
+    """The project frames of the current stack, innermost last"""
+    base_dir = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+
+
+class QueryShapeCounter:
+    """Database execute wrapper counting how often each query shape runs"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = {}
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = query_shape(sql)
+        count = self.counts[shape] = self.counts.get(shape, 0) + 1
+        if count == self.threshold:
+            self.stacks[shape] = _caller_stack()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """(shape, count, stack) of every shape that reached the threshold"""
+        return [(shape, self.counts[shape], stack) for shape, stack in self.stacks.items()]
+
+    def report(self, label=''):
+        return '\n\n'.join(
+            f'{label}{count} queries of the same shape:\n    {shape}\n'
+            + ''.join(traceback.format_list(stack))
+            for shape, count, stack in self.repeated()
+        )
+
+
+@contextmanager
+def detect_n_plus_one(mode=None, threshold=None, label=''):
+    """Watch the queries run inside the block; see the module docstring"""
+    counter = QueryShapeCounter(threshold or settings.NPLUSONE_THRESHOLD)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+    if counter.stacks:
+        report = counter.report(f'{label}: ' if label else '')
+        if (mode or settings.NPLUSONE_MODE) == 'raise':
+            raise NPlusOneError(report)
+        logger.warning(report)
+
+
+class NPlusOneMiddleware:
+    """
+    Check every request for N+1 query loops (NPLUSONE_MODE).
+
+    Keep it last in MIDDLEWARE so that it only sees the view's queries.
+    It is synchronous, so in development async views run adapted to it.
+    """
+
+    def __init__(self, get_response):
+        if settings.NPLUSONE_MODE not in ('log', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_n_plus_one(label=f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+
+class NPlusOneTestMixin:
+    """TestCase mixin failing any test-client request that runs an N+1 loop"""
+
+    def setUp(self):
+        from django.test import override_settings
+
+        super().setUp()
+        middleware = list(settings.MIDDLEWARE)
+        if MIDDLEWARE not in middleware:
+            middleware.append(MIDDLEWARE)
+        overrides = override_settings(NPLUSONE_MODE='raise', MIDDLEWARE=middleware)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def assertNoNPlusOne(self, threshold=None):
+        """Context manager raising NPlusOneError if the block runs an N+1 loop"""
+        return detect_n_plus_one(mode='raise', threshold=threshold)
@@ -0,0 +1,98 @@
+"""
+Staff search over a precomputed, normalized UserProfile.search_text column.
+
+On SQLite the column is mirrored into an FTS5 trigram table (see migration
+0004) and on PostgreSQL it carries a pg_trgm GIN index, so substring
+searches no longer scan and join auth_user for every keystroke. SQLite
+migrations that rebuild web_userprofile drop the FTS triggers, so such
+migrations must re-create them.
+"""
+import unicodedata
+
+from django.db import connection
+
+from .models import UserProfile
+
+FTS_TABLE = 'web_userprofile_search'
+MIN_TRIGRAM_LENGTH = 3
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def build_search_text(user, phone_number=None):
+    """The normalized text a staff member can be found by"""
+    return normalize(' '.join(filter(None, [
+        user.first_name,
+        user.last_name,
+        user.username,
+        user.email,
+        phone_number,
+    ])))
+
+
+def _fts_query(terms):
+    # Quote every term so user input is never parsed as FTS5 syntax
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _sqlite_fts_user_ids(terms, role, limit):
+    sql = (
+        f'SELECT p.user_id FROM {FTS_TABLE} s '
+        f'JOIN web_userprofile p ON p.id = s.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s AND p.role = %s ORDER BY s.rank'
+    )
+    params = [_fts_query(terms), role]
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_user_ids(query, terms, role, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    profiles = UserProfile.objects.filter(role=role)
+    for term in terms:
+        # search_text and the terms are both normalized to lowercase, so a
+        # case-sensitive LIKE is enough, and the gin_trgm_ops index serves it
+        profiles = profiles.filter(search_text__contains=term)
+    profiles = profiles.annotate(
+        similarity=TrigramSimilarity('search_text', query)
+    ).order_by('-similarity')
+    if limit:
+        profiles = profiles[:limit]
+    return list(profiles.values_list('user_id', flat=True))
+
+
+def _fallback_user_ids(terms, role, limit):
+    profiles = UserProfile.objects.filter(role=role)
+    for term in terms:
+        profiles = profiles.filter(search_text__contains=term)
+    profiles = profiles.order_by('search_text')
+    if limit:
+        profiles = profiles[:limit]
+    return list(profiles.values_list('user_id', flat=True))
+
+
+def search_user_ids(query, role='staff', limit=None):
+    """
+    Return ids of users with the given role matching every query term,
+    best matches first.
+    """
+    query = normalize(query)
+    terms = query.split()
+    if not terms:
+        return []
+
+    if connection.vendor == 'sqlite' and all(len(term) >= MIN_TRIGRAM_LENGTH for term in terms):
+        return _sqlite_fts_user_ids(terms, role, limit)
+    if connection.vendor == 'postgresql':
+        return _postgres_user_ids(query, terms, role, limit)
+    return _fallback_user_ids(terms, role, limit)
@@ -0,0 +1,191 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_catalog_version, bump_data_version, bump_user_orders_version
+from .capacity import release, resize
+from .images import build_variants, variant_names
+from .models import Category, CustomFood, DailyOrderSummary, Menu, Order, UserProfile, WeeklyMenu
+from .search import build_search_text
+
+# The orders deleted so far inside batched_order_deletes(), None outside it
+_deleted_orders = ContextVar('deleted_orders', default=None)
+
+
+@contextmanager
+def batched_order_deletes():
+    """
+    Do the post_delete work for the orders deleted in the block once, on exit.
+
+    QuerySet.delete() and the cascade from a deleted user send post_delete
+    for every order, and each one would update its day's summary row, give
+    back its place and bump the cache versions. Inside this block the
+    Order post_delete receivers only collect the orders. On a clean exit
+    every day, category and user gets one update. Yields the list of
+    deleted orders.
+    """
+    orders = []
+    token = _deleted_orders.set(orders)
+    try:
+        yield orders
+    finally:
+        _deleted_orders.reset(token)
+    if orders:
+        DailyOrderSummary.add_orders(orders, sign=-1)
+        released = Counter((order.category_id, order.date) for order in orders if order.status != 'cancelled')
+        for (category_id, date), count in released.items():
+            release(category_id, date, count)
+        bump_data_version()
+        bump_user_orders_version(*{order.user_id for order in orders})
+
+
+def _batched(sender, signal):
+    """Whether this is an Order delete that batched_order_deletes() handles"""
+    return sender is Order and signal is post_delete and _deleted_orders.get() is not None
+
+
+@receiver(post_delete, sender=Order)
+def collect_deleted_order(sender, instance, **kwargs):
+    """Inside batched_order_deletes(), note the order for the work done on exit"""
+    orders = _deleted_orders.get()
+    if orders is not None:
+        orders.append(instance)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_aggregates(sender, signal, **kwargs):
+    """Bump the data version whenever orders or staff profiles change"""
+    if not _batched(sender, signal):
+        bump_data_version()
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_user_orders(sender, instance, signal, **kwargs):
+    """Retire the cached order totals of the order's owner"""
+    if not _batched(sender, signal):
+        bump_user_orders_version(instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=WeeklyMenu)
+@receiver(post_delete, sender=WeeklyMenu)
+@receiver(post_save, sender=CustomFood)
+@receiver(post_delete, sender=CustomFood)
+def invalidate_catalog(sender, **kwargs):
+    """Bump the catalog version whenever anything that shapes a day's menu changes"""
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_date(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored date, status and price so a moved or repriced order also updates its old day"""
+    instance._previous_date = instance._previous_status = instance._previous_price = None
+    if instance.pk and (update_fields is None or {'date', 'status', 'price'} & set(update_fields)):
+        previous = Order.objects.filter(pk=instance.pk).values_list('date', 'status', 'price').first()
+        if previous:
+            instance._previous_date, instance._previous_status, instance._previous_price = previous
+
+
+def _price(order):
+    return Order._meta.get_field('price').to_python(order.price)
+
+
+@receiver(post_save, sender=Order)
+def refresh_daily_summary(sender, instance, created, **kwargs):
+    """Keep the per-day calendar index in step with order writes"""
+    if created:
+        DailyOrderSummary.add(instance.date, 1, _price(instance))
+        return
+    previous_date = getattr(instance, '_previous_date', None)
+    if previous_date is None:
+        # The save did not touch date, status or price
+        return
+    previous_price = instance._previous_price
+    if previous_date != Order._meta.get_field('date').to_python(instance.date):
+        DailyOrderSummary.add(previous_date, -1, -previous_price)
+        DailyOrderSummary.add(instance.date, 1, _price(instance))
+    else:
+        DailyOrderSummary.add(instance.date, 0, _price(instance) - previous_price)
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_daily_summary(sender, instance, signal, **kwargs):
+    """A deleted order leaves its day's calendar index"""
+    if not _batched(sender, signal):
+        DailyOrderSummary.add(instance.date, -1, -_price(instance))
+
+
+@receiver(post_save, sender=Order)
+def release_cancelled_capacity(sender, instance, created, **kwargs):
+    """A cancelled order frees its place in the day's capacity"""
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and instance.status == 'cancelled' and previous_status not in (None, 'cancelled'):
+        release(instance.category_id, instance.date)
+
+
+@receiver(post_delete, sender=Order)
+def release_deleted_capacity(sender, instance, signal, **kwargs):
+    """So does a deleted one that was still live"""
+    if instance.status != 'cancelled' and not _batched(sender, signal):
+        release(instance.category_id, instance.date)
+
+
+@receiver(post_save, sender=Category)
+def resize_capacity(sender, instance, **kwargs):
+    """Carry a changed daily_capacity over to today's and future counters"""
+    resize(instance.pk, instance.daily_capacity, timezone.now().date())
+
+
+@receiver(pre_save, sender=UserProfile)
+def fill_profile_search_text(sender, instance, **kwargs):
+    """Store the normalized search text alongside the profile"""
+    instance.search_text = build_search_text(instance.user, instance.phone_number)
+
+
+SEARCHABLE_USER_FIELDS = {'first_name', 'last_name', 'username', 'email'}
+
+
+@receiver(post_save, sender=User)
+def refresh_profile_search_text(sender, instance, update_fields=None, **kwargs):
+    """Names and emails live on User, so re-index its profile when they change"""
+    if update_fields is not None and not SEARCHABLE_USER_FIELDS & set(update_fields):
+        # e.g. the last_login update on every login
+        return
+    for profile in UserProfile.objects.filter(user=instance).only('id', 'phone_number', 'search_text'):
+        search_text = build_search_text(instance, profile.phone_number)
+        if search_text != profile.search_text:
+            UserProfile.objects.filter(pk=profile.pk).update(search_text=search_text)
+
+
+@receiver(post_save, sender=Category)
+def refresh_image_variants(sender, instance, **kwargs):
+    """Build the resized derivatives whenever the category image changes"""
+    current = instance.image.name if instance.image else None
+    if instance.image_variants.get('source') == current:
+        return
+
+    variants = {}
+    if current:
+        try:
+            variants = build_variants(instance.image)
+        except OSError:
+            # Missing or unreadable original; the API falls back to image.url
+            pass
+
+    stale = variant_names(instance.image_variants) - variant_names(variants)
+    Category.objects.filter(pk=instance.pk).update(image_variants=variants)
+    instance.image_variants = variants
+    for name in stale:
+        instance.image.storage.delete(name)
@@ -0,0 +1,69 @@
+"""
+Order totals: per user in one annotated query, and for the profile page.
+
+Totals come from conditional aggregates. On the profile page days before
+today are closed: nothing can be ordered for them any more, so their
+totals only change when a manager records a payment or removes orders.
+Those totals are cached under a per-user version that every write to the
+user's orders bumps (web.cache.bump_user_orders_version), and only today
+is aggregated live.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+
+from .cache import cached_aggregate, user_orders_version_key
+from .models import Order
+
+PENDING_STATUSES = ['pending', 'confirmed', 'preparing']
+AMOUNTS = ('total_amount', 'completed_amount', 'pending_amount')
+
+
+def order_totals(orders):
+    """Total, completed and pending amounts of an order queryset, in one query"""
+    totals = orders.aggregate(
+        total_amount=Sum('price'),
+        completed_amount=Sum('price', filter=Q(status='completed')),
+        pending_amount=Sum('price', filter=Q(status__in=PENDING_STATUSES)),
+    )
+    return {name: amount or 0 for name, amount in totals.items()}
+
+
+def annotate_order_totals(users, start_date=None, end_date=None):
+    """
+    Annotate a User queryset with total_amount, completed_amount,
+    pending_amount and total_days (distinct order days), optionally limited
+    to orders from start_date to end_date. All in one query; users without
+    orders get None amounts and 0 days.
+    """
+    in_range = Q(orders__date__range=[start_date, end_date]) if start_date else Q(orders__isnull=False)
+    return users.annotate(
+        total_amount=Sum('orders__price', filter=in_range),
+        completed_amount=Sum('orders__price', filter=in_range & Q(orders__status='completed')),
+        pending_amount=Sum('orders__price', filter=in_range & Q(orders__status__in=PENDING_STATUSES)),
+        total_days=Count('orders__date', filter=in_range, distinct=True),
+    )
+
+
+def user_order_totals(user_id, start_date, end_date, today):
+    """
+    order_totals() of the user's orders from start_date to end_date, plus 'balance'.
+
+    The part of the range before today comes from the cache; at most one
+    query runs, for the part from today on.
+    """
+    periods = []
+    closed_end = min(end_date, today - timedelta(days=1))
+    if start_date <= closed_end:
+        periods.append(cached_aggregate(
+            'user-order-totals', (user_id, start_date, closed_end),
+            lambda: order_totals(Order.objects.filter(user_id=user_id, date__range=[start_date, closed_end])),
+            version_key=user_orders_version_key(user_id),
+        ))
+    open_start = max(start_date, today)
+    if open_start <= end_date:
+        periods.append(order_totals(Order.objects.filter(user_id=user_id, date__range=[open_start, end_date])))
+
+    totals = {name: sum(period[name] for period in periods) for name in AMOUNTS}
+    totals['balance'] = totals['total_amount'] - totals['completed_amount']
+    return totals
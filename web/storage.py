@@ -0,0 +1,64 @@
+"""
+Static files storage for production.
+
+collectstatic writes every file under a content-hashed name (see
+ManifestStaticFilesStorage), minifies the hashed stylesheets and writes
+``.gz`` and, when the brotli package is installed, ``.br`` siblings of
+text assets. Apache serves the precompressed sibling and marks hashed
+names as immutable (food.natdemy.com.conf).
+"""
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+MIN_COMPRESS_SIZE = 256
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};])\s*')
+
+
+def minify_css(css):
+    """Drop comments and the whitespace around braces and semicolons"""
+    css = CSS_COMMENT_RE.sub('', css)
+    css = ' '.join(css.split())
+    css = CSS_PUNCTUATION_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip() + '\n'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with self.open(name) as original:
+                content = original.read()
+            if name.endswith('.css'):
+                content = minify_css(content.decode('utf-8')).encode('utf-8')
+                self._replace(name, content)
+            if len(content) >= MIN_COMPRESS_SIZE:
+                self._write_compressed(name, content)
+
+    def _replace(self, name, content):
+        self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def _write_compressed(self, name, content):
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                self._replace(name + suffix, compressed)
@@ -0,0 +1,171 @@
+"""Incremental JSON encoding for large list APIs"""
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+BATCH_SIZE = 500
+
+
+class CompactJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without whitespace that writes decimals as numbers"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('separators', (',', ':'))
+        super().__init__(**kwargs)
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+dumps = CompactJSONEncoder().encode
+
+
+async def aiter_rows(queryset, chunk_size=BATCH_SIZE):
+    """
+    Asynchronously iterate a values_list() queryset in bounded chunks.
+
+    QuerySet.aiterator() opens the values_list() cursor on the event loop
+    thread and raises SynchronousOnlyOperation, so the cursor is created
+    and advanced entirely inside the ORM's sync worker thread instead.
+    """
+    iterator = None
+
+    def next_chunk():
+        nonlocal iterator
+        if iterator is None:
+            iterator = queryset.iterator(chunk_size=chunk_size)
+        return list(islice(iterator, chunk_size))
+
+    while True:
+        chunk = await sync_to_async(next_chunk)()
+        for row in chunk:
+            yield row
+        if len(chunk) < chunk_size:
+            break
+
+
+def serves_async(request):
+    """
+    True when the request came in through ASGI.
+
+    A StreamingHttpResponse is consumed the way the handler serves it:
+    under WSGI (mod_wsgi) an async iterator is read into memory in one go
+    before anything is sent, so async views must stream sync iterators
+    there and async ones only under ASGI.
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def stream_rows(request, queryset, chunk_size=BATCH_SIZE):
+    """Rows of a values_list() queryset in bounded chunks, async under ASGI and sync under WSGI"""
+    if serves_async(request):
+        return aiter_rows(queryset, chunk_size)
+    # Evaluated lazily, when the WSGI server iterates the response
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def wants_columns(request):
+    """True when the client asked for the columnar layout (?layout=columns)"""
+    return request.GET.get('layout') == 'columns'
+
+
+def _open_document(key, extra, opening):
+    # Encode the scalar members up front, then leave the container open
+    head = dumps(extra or {})[:-1]
+    separator = ',' if len(head) > 1 else ''
+    return f'{head}{separator}{dumps(key)}:{opening}'
+
+
+def _close_document(closing, trailer):
+    tail = dumps(trailer() if trailer else {})[1:]
+    separator = ',' if len(tail) > 1 else ''
+    return f'{closing}{separator}{tail}'
+
+
+class _Batcher:
+    """Collects encoded items and releases them in comma-joined batches"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.items = []
+        self.separator = ''
+
+    def add(self, encoded):
+        self.items.append(encoded)
+        if len(self.items) >= self.batch_size:
+            return self.flush()
+        return ''
+
+    def flush(self):
+        if not self.items:
+            return ''
+        chunk = self.separator + ','.join(self.items)
+        self.separator = ','
+        self.items = []
+        return chunk
+
+
+def iter_document(key, items, encode=dumps, extra=None, trailer=None, brackets='[]', batch_size=BATCH_SIZE):
+    """
+    Yield {**extra, key: [encode(item), ...], **trailer()} as text chunks.
+
+    items is any iterable (typically values_list().iterator()), so memory
+    stays bounded by batch_size items regardless of the result size.
+    trailer is called once the items are exhausted, which lets totals
+    gathered while streaming go after the list. Pass brackets='{}' and an
+    encode returning '"key":value' to stream an object instead of a list.
+    """
+    yield _open_document(key, extra, brackets[0])
+    batcher = _Batcher(batch_size)
+    for item in items:
+        chunk = batcher.add(encode(item))
+        if chunk:
+            yield chunk
+    yield batcher.flush() + _close_document(brackets[1], trailer)
+
+
+async def aiter_document(key, items, encode=dumps, extra=None, trailer=None, brackets='[]', batch_size=BATCH_SIZE):
+    """Async variant of iter_document() for async iterables such as aiterator()"""
+    yield _open_document(key, extra, brackets[0])
+    batcher = _Batcher(batch_size)
+    async for item in items:
+        chunk = batcher.add(encode(item))
+        if chunk:
+            yield chunk
+    yield batcher.flush() + _close_document(brackets[1], trailer)
+
+
+def document(key, items, **kwargs):
+    """iter_document() or aiter_document(), whichever matches items"""
+    if hasattr(items, '__aiter__'):
+        return aiter_document(key, items, **kwargs)
+    return iter_document(key, items, **kwargs)
+
+
+def columns_document(fields, rows, extra=None):
+    """Columnar layout: {"fields": [...], "rows": [[...], ...]}; rows may be sync or async"""
+    return document('rows', rows, extra=dict(fields=list(fields), **(extra or {})))
+
+
+def record_encoder(fields):
+    """Return an encoder turning value tuples into JSON objects keyed by fields"""
+    def encode(row):
+        return dumps(dict(zip(fields, row)))
+    return encode
+
+
+def member_encoder(pair):
+    """Encode a (key, value) pair as an object member for brackets='{}'"""
+    key, value = pair
+    return f'{dumps(str(key))}:{dumps(value)}'
+
+
+def json_stream_response(chunks, status=200):
+    """Wrap a (sync or async) iterator of JSON text chunks in a response"""
+    return StreamingHttpResponse(chunks, status=status, content_type='application/json')
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the apps' tests.
+
+Tests run with LOCMEM_CACHES so no test reads or writes the configured
+cache server; CacheResetMixin empties those caches, and the per-process
+aggregate cache in front of them, before every test.
+"""
+from datetime import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+
+from . import cache as aggregate_cache
+from .models import MenuTimeSlot, UserProfile
+
+LOCMEM_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'tests-{alias}'}
+    for alias in ('default', 'template_fragments', 'sessions')
+}
+
+
+def create_user(username, role='staff', **kwargs):
+    user = User.objects.create_user(username, password='password', **kwargs)
+    UserProfile.objects.create(user=user, role=role)
+    return user
+
+
+def open_ordering(date):
+    """A time slot covering the whole day, so ordering is open whenever the test runs"""
+    return MenuTimeSlot.objects.create(
+        name='All day', start_date=date, end_date=date,
+        start_time=time(0, 0), end_time=time(23, 59, 59),
+    )
+
+
+class CacheResetMixin:
+    """Start every test with empty caches, shared and per-process"""
+
+    def setUp(self):
+        super().setUp()
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        aggregate_cache._local_cache.clear()
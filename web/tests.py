@@ -1,3 +1,702 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from web import cache as aggregate_cache
+from web import journal
+from web.cache import get_data_version, user_orders_version_key
+from web.capacity import SoldOut, reserve, sold_out_ids
+from web.models import Category, DailyCapacity, DailyOrderSummary, Menu, Order
+from web.nplusone import NPlusOneError, NPlusOneTestMixin, detect_n_plus_one, query_shape
+from web.signals import batched_order_deletes
+from web.middleware import brotli
+from web.streaming import BATCH_SIZE, iter_document, member_encoder
+from web.testing import LOCMEM_CACHES, CacheResetMixin, create_user, open_ordering
+from web.throttle import password_attempt_delay
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CapacityTests(CacheResetMixin, TestCase):
+    """A category with a daily_capacity closes for the day at zero and reopens on a cancel"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.category = Category.objects.create(name='Lunch', price=50, daily_capacity=2)
+        Menu.objects.create(category=cls.category, name='Rice')
+        cls.users = [create_user(f'staff{index}') for index in range(3)]
+        open_ordering(cls.today)
+
+    def place_order(self, user):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('orders:place_order'),
+                json.dumps({'category_id': self.category.id}),
+                content_type='application/json',
+            )
+
+    def remaining(self):
+        return DailyCapacity.objects.get(category=self.category, date=self.today).remaining
+
+    def test_reserve_past_capacity_raises_sold_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve(self.category.id, self.today, 2)
+            reserve(self.category.id, self.today, 2)
+        self.assertEqual(self.remaining(), 0)
+        self.assertEqual(sold_out_ids(self.today, [self.category.id]), {self.category.id})
+
+        with self.assertRaises(SoldOut):
+            reserve(self.category.id, self.today, 2)
+        self.assertEqual(self.remaining(), 0)
+
+    def test_unlimited_category_reserves_nothing(self):
+        reserve(self.category.id, self.today, None)
+        self.assertFalse(DailyCapacity.objects.exists())
+
+    def test_cancel_releases_a_place(self):
+        for user in self.users[:2]:
+            self.assertEqual(self.place_order(user).status_code, 200)
+        response = self.place_order(self.users[2])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'This category is sold out for today')
+        self.assertEqual(Order.objects.count(), 2)
+
+        order = Order.objects.filter(user=self.users[0]).get()
+        order.status = 'cancelled'
+        order.save()
+        self.assertEqual(self.remaining(), 1)
+        self.assertEqual(sold_out_ids(self.today, [self.category.id]), set())
+
+        self.assertEqual(self.place_order(self.users[2]).status_code, 200)
+        self.assertEqual(self.remaining(), 0)
+        # Cancelling the same order twice gives nothing back
+        order.save()
+        self.assertEqual(self.remaining(), 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ORDER_INGESTION='journal')
+class JournalTests(CacheResetMixin, TestCase):
+    """Journal mode reserves capacity before it acknowledges a cart, and draining is idempotent"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.limited = Category.objects.create(name='Lunch', price=50, daily_capacity=1)
+        cls.unlimited = Category.objects.create(name='Tea', price=10)
+        for category in (cls.limited, cls.unlimited):
+            Menu.objects.create(category=category, name=f'{category.name} special')
+        cls.users = [create_user(f'staff{index}') for index in range(2)]
+        open_ordering(cls.today)
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(ORDER_JOURNAL_PATH=str(Path(directory.name) / 'journal.sqlite3'))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(lambda: journal._local.connection.close())
+
+    def place_orders(self, user, category_ids):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('orders:place_orders'),
+            json.dumps({'category_ids': category_ids}),
+            content_type='application/json',
+        )
+
+    def drain(self):
+        call_command('drain_orders', '--once', stdout=io.StringIO())
+
+    def intents(self):
+        return journal._connection().execute('SELECT id, state, order_id, error FROM order_intent ORDER BY id').fetchall()
+
+    def test_append_and_drain(self):
+        response = self.place_orders(self.users[0], [self.limited.id, self.unlimited.id])
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()['queued'])
+        self.assertIn('queued', response.json()['message'])
+
+        # Queued, not placed: the place is taken but no order exists yet
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 0)
+        self.assertEqual(journal.pending_category_ids(self.users[0].id, self.today), {self.limited.id, self.unlimited.id})
+
+        self.drain()
+        self.assertEqual(
+            set(Order.objects.values_list('user_id', 'category_id', 'status')),
+            {(self.users[0].id, self.limited.id, 'pending'), (self.users[0].id, self.unlimited.id, 'pending')},
+        )
+        self.assertEqual(journal.pending_category_ids(self.users[0].id, self.today), set())
+        self.assertEqual({state for _, state, _, _ in self.intents()}, {journal.PLACED})
+        # Draining did not take the place a second time
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 0)
+
+    def test_redrain_is_idempotent(self):
+        self.place_orders(self.users[0], [self.limited.id, self.unlimited.id])
+        self.drain()
+        placed = self.intents()
+
+        # A drainer that died after committing the orders leaves the rows queued
+        journal.record([(intent_id, journal.QUEUED, None, None) for intent_id, _, _, _ in placed])
+        self.drain()
+        self.assertEqual(self.intents(), placed)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_sold_out_cart_is_rejected_before_queueing(self):
+        self.assertEqual(self.place_orders(self.users[0], [self.limited.id]).status_code, 202)
+
+        response = self.place_orders(self.users[1], [self.unlimited.id, self.limited.id])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['results'], [
+            {'category_id': self.unlimited.id, 'error': None},
+            {'category_id': self.limited.id, 'error': 'Sold out for this date'},
+        ])
+        self.assertEqual(journal.pending_category_ids(self.users[1].id, self.today), set())
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 0)
+
+        self.drain()
+        self.assertEqual(list(Order.objects.values_list('user_id', flat=True)), [self.users[0].id])
+
+    def test_place_order_is_queued(self):
+        self.client.force_login(self.users[0])
+        body = json.dumps({'category_id': self.limited.id})
+        response = self.client.post(reverse('orders:place_order'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['message'], 'Order queued, it will appear in your orders shortly')
+
+        response = self.client.post(reverse('orders:place_order'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'You have already ordered this category today')
+
+        self.drain()
+        self.assertEqual(Order.objects.get().category_id, self.limited.id)
+
+    def test_deleted_category_rejects_cart_and_releases_places(self):
+        self.place_orders(self.users[0], [self.limited.id, self.unlimited.id])
+        self.unlimited.delete()
+        self.drain()
+
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual({error for _, _, _, error in self.intents()}, {'Category not found'})
+        self.assertEqual(DailyCapacity.objects.get(category=self.limited).remaining, 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IdempotencyTests(CacheResetMixin, TestCase):
+    """A POST retried with the same Idempotency-Key is answered from the stored response"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.categories = [Category.objects.create(name=f'Category {index}', price=20) for index in range(2)]
+        for category in cls.categories:
+            Menu.objects.create(category=category, name=f'{category.name} dish')
+        cls.users = [create_user(f'staff{index}') for index in range(2)]
+        open_ordering(cls.today)
+
+    def post(self, user, body, key='retry-1'):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('orders:place_order'),
+            body if isinstance(body, str) else json.dumps(body),
+            content_type='application/json',
+            headers={'Idempotency-Key': key},
+        )
+
+    def test_same_key_and_body_replays_without_a_second_order(self):
+        body = {'category_id': self.categories[0].id}
+        first = self.post(self.users[0], body)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        # Only the session and the user are loaded; the view does not run
+        self.client.force_login(self.users[0])
+        with self.assertNumQueries(2):
+            replay = self.client.post(
+                reverse('orders:place_order'), json.dumps(body),
+                content_type='application/json', headers={'Idempotency-Key': 'retry-1'},
+            )
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_same_key_with_different_body_is_rejected(self):
+        self.post(self.users[0], {'category_id': self.categories[0].id})
+        response = self.post(self.users[0], {'category_id': self.categories[1].id})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_server_errors_are_not_stored(self):
+        # place_order answers 500 when the body is not JSON
+        self.assertEqual(self.post(self.users[0], 'not json').status_code, 500)
+        retry = self.post(self.users[0], 'not json')
+        self.assertEqual(retry.status_code, 500)
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_keys_are_scoped_per_user(self):
+        body = {'category_id': self.categories[0].id}
+        self.post(self.users[0], body)
+        response = self.post(self.users[1], body)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(set(Order.objects.values_list('user_id', flat=True)), {user.id for user in self.users})
+
+    def test_requests_without_a_key_are_not_stored(self):
+        self.client.force_login(self.users[0])
+        body = json.dumps({'category_id': self.categories[0].id})
+        self.client.post(reverse('orders:place_order'), body, content_type='application/json')
+        response = self.client.post(reverse('orders:place_order'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProfileTotalsTests(CacheResetMixin, TestCase):
+    """Cached totals of closed days follow payments recorded by a manager"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.staff = create_user('staff')
+        cls.manager = create_user('manager', role='manager')
+        category = Category.objects.create(name='Lunch', price=30)
+        for days_ago, price in ((3, 30), (2, 20)):
+            Order.objects.create(user=cls.staff, category=category, date=cls.today - timedelta(days=days_ago), price=price)
+
+    def profile_totals(self):
+        self.client.force_login(self.staff)
+        context = self.client.get(reverse('orders:profile'), {'filter': 'week'}).context
+        return context['completed_amount'], context['balance']
+
+    def pay(self, **data):
+        self.client.force_login(self.manager)
+        response = self.client.post(reverse('management:update_payment'), json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_partial_payment_updates_cached_totals(self):
+        self.assertEqual(self.profile_totals(), (Decimal(0), Decimal(50)))
+        # The closed days are now cached; the profile reads them without aggregating
+        self.assertTrue(aggregate_cache._local_cache)
+
+        self.pay(user_id=self.staff.id, payment_amount=30)
+        self.assertEqual(self.profile_totals(), (Decimal(30), Decimal(20)))
+
+    def test_mark_all_completed_updates_cached_totals(self):
+        self.profile_totals()
+        self.pay(user_id=self.staff.id, mark_all_completed=True)
+        self.assertEqual(self.profile_totals(), (Decimal(50), Decimal(0)))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderListingQueryTests(NPlusOneTestMixin, CacheResetMixin, TestCase):
+    """Order listings run a fixed number of queries however many orders they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        categories = [Category.objects.create(name=f'Category {index}', price=10 + index) for index in range(5)]
+        for category in categories:
+            Menu.objects.create(category=category, name=f'{category.name} dish')
+        cls.staff = [create_user(f'staff{index}') for index in range(4)]
+        for user in cls.staff:
+            for index, category in enumerate(categories):
+                Order.objects.create(
+                    user=user, category=category, price=category.price,
+                    date=cls.today - timedelta(days=index % 2), notes='Less salt',
+                )
+        cls.kitchen = create_user('kitchen', role='kitchen')
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        open_ordering(cls.today)
+
+    def assertQueriesFor(self, user, url, num, **params):
+        self.client.force_login(user)
+        with self.assertNumQueries(num):
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_staff_pages(self):
+        # Every count includes the session and the user with their profile
+        self.assertQueriesFor(self.staff[0], reverse('orders:user_orders'), 3)
+        # Four to resolve the day menu, one for the categories already ordered
+        self.assertQueriesFor(self.staff[0], reverse('orders:home'), 7)
+        # Today's totals, the closed days' totals (cached afterwards), the pre-orders and the order table
+        self.assertQueriesFor(self.staff[0], reverse('orders:profile'), 6, filter='week')
+        self.assertQueriesFor(self.staff[0], reverse('orders:profile'), 5, filter='week')
+
+    def test_kitchen_pages(self):
+        self.assertQueriesFor(self.kitchen, reverse('kitchen:home'), 3)
+        # order_list shares home's template, which only reads the grouped orders
+        self.assertQueriesFor(self.kitchen, reverse('kitchen:order_list'), 2)
+        self.assertQueriesFor(self.kitchen, reverse('kitchen:today_orders'), 4)
+
+    def test_admin_changelist(self):
+        response = self.assertQueriesFor(self.admin, reverse('admin:web_order_changelist'), 8)
+        self.assertEqual(response.context['cl'].result_count, 20)
+
+    def test_order_str_over_listing(self):
+        with self.assertNumQueries(1):
+            labels = [str(order) for order in Order.objects.for_listing()]
+        self.assertEqual(len(labels), 20)
+
+
+class NPlusOneDetectorTests(NPlusOneTestMixin, TestCase):
+    """Queries of one shape repeated up to the threshold are reported"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Lunch', price=30)
+        cls.orders = [
+            Order.objects.create(user=create_user(f'staff{index}'), category=category, date=timezone.now().date(), price=30)
+            for index in range(3)
+        ]
+
+    def load_each_user(self):
+        for order in Order.objects.all():
+            order.user.username
+
+    def test_query_shape_collapses_in_lists(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM "web_order" WHERE "web_order"."id" IN (%s, %s)'),
+            query_shape('SELECT * FROM "web_order" WHERE "web_order"."id" IN (%s, %s, %s, %s)'),
+        )
+        self.assertEqual(
+            query_shape('SELECT * FROM "web_order" WHERE "web_order"."id" IN (%s, %s, %s)'),
+            'SELECT * FROM "web_order" WHERE "web_order"."id" IN (...)',
+        )
+
+    def test_query_shape_collapses_values_rows(self):
+        self.assertEqual(
+            query_shape('INSERT INTO "web_order" ("user_id", "price") VALUES (%s, %s), (%s, %s), (%s, %s)'),
+            'INSERT INTO "web_order" ("user_id", "price") VALUES (...)',
+        )
+
+    def test_raise_mode_raises_at_the_threshold(self):
+        with self.assertRaisesMessage(NPlusOneError, '3 queries of the same shape'):
+            with detect_n_plus_one(mode='raise', threshold=3):
+                self.load_each_user()
+
+    def test_below_the_threshold_is_not_reported(self):
+        with detect_n_plus_one(mode='raise', threshold=4) as counter:
+            self.load_each_user()
+        self.assertEqual(counter.repeated(), [])
+
+    def test_log_mode_only_logs(self):
+        with self.assertLogs('web.nplusone', 'WARNING') as logs:
+            with detect_n_plus_one(mode='log', threshold=3, label='loop'):
+                self.load_each_user()
+        self.assertIn('loop: 3 queries of the same shape', logs.output[0])
+        self.assertIn('load_each_user', logs.output[0])
+
+    def test_select_related_is_not_reported(self):
+        with self.assertNoNPlusOne(threshold=2):
+            for order in Order.objects.with_refs():
+                order.user.username
+
+    def test_assert_no_n_plus_one_fails_on_a_loop(self):
+        with self.assertRaises(NPlusOneError):
+            with self.assertNoNPlusOne(threshold=3):
+                self.load_each_user()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StreamingTests(CacheResetMixin, TestCase):
+    """The order list APIs stream JSON the way the handler serving them consumes it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.staff = create_user('staff')
+        cls.kitchen = create_user('kitchen', role='kitchen')
+        cls.category = Category.objects.create(name='Lunch', price=30)
+        Order.objects.create(user=cls.staff, category=cls.category, date=cls.today, price=30)
+
+    def test_wsgi_streams_a_sync_iterator(self):
+        for user, url in ((self.staff, reverse('orders:user_orders')), (self.kitchen, reverse('kitchen:today_orders'))):
+            self.client.force_login(user)
+            response = self.client.get(url)
+            # An async iterator would be buffered whole, with a warning, to serve it synchronously
+            self.assertTrue(response.streaming)
+            self.assertFalse(response.is_async)
+            self.assertTrue(json.loads(b''.join(response)))
+
+    async def test_asgi_streams_an_async_iterator(self):
+        client = AsyncClient()
+        for user, url in ((self.staff, reverse('orders:user_orders')), (self.kitchen, reverse('kitchen:today_orders'))):
+            await client.aforce_login(user)
+            response = await client.get(url)
+            self.assertTrue(response.is_async)
+            self.assertTrue(json.loads(b''.join([chunk async for chunk in response])))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StreamedDocumentTests(CacheResetMixin, TestCase):
+    """The incrementally written documents are valid JSON of the expected shape"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.staff = create_user('staff', first_name='Asha')
+        cls.other = create_user('other')
+        cls.kitchen = create_user('kitchen', role='kitchen')
+        cls.manager = create_user('manager', role='manager')
+        cls.categories = [Category.objects.create(name=name, price=30) for name in ('Lunch', 'Tea')]
+
+    def get_json(self, user, name, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response))
+
+    def documents(self, **params):
+        params['date'] = self.today.isoformat()
+        return (
+            self.get_json(self.staff, 'orders:user_orders', **params),
+            self.get_json(self.kitchen, 'kitchen:today_orders', **params),
+            self.get_json(self.manager, 'management:get_orders_by_date', **params),
+        )
+
+    def test_empty_results(self):
+        self.assertEqual(self.documents(), (
+            {'orders': []},
+            {'categories': [], 'total_orders': 0},
+            {'orders_by_user': {}, 'date': self.today.isoformat()},
+        ))
+        user_orders, today_orders, orders_by_date = self.documents(layout='columns')
+        self.assertEqual(user_orders, {'fields': ['id', 'category', 'price', 'status', 'created_at', 'date'], 'rows': []})
+        self.assertEqual(today_orders['rows'], [])
+        self.assertEqual(orders_by_date['rows'], [])
+        self.assertEqual(orders_by_date['date'], self.today.isoformat())
+
+    def test_grouped_layout(self):
+        orders = [
+            Order.objects.create(user=user, category=category, date=self.today, price=30)
+            for user in (self.staff, self.other) for category in self.categories
+        ]
+        user_orders, today_orders, orders_by_date = self.documents()
+
+        self.assertEqual({order['id'] for order in user_orders['orders']}, {orders[0].id, orders[1].id})
+        self.assertEqual(user_orders['orders'][0]['price'], 30.0)
+        self.assertEqual(today_orders['total_orders'], 4)
+        self.assertEqual([group['category'] for group in today_orders['categories']], ['Lunch', 'Tea'])
+        self.assertEqual([group['count'] for group in today_orders['categories']], [2, 2])
+        self.assertEqual(
+            {user_id: group['total_amount'] for user_id, group in orders_by_date['orders_by_user'].items()},
+            {str(self.staff.id): '60.00', str(self.other.id): '60.00'},
+        )
+        self.assertEqual(orders_by_date['orders_by_user'][str(self.staff.id)]['user']['first_name'], 'Asha')
+
+    def test_columns_across_a_batch_boundary(self):
+        Order.objects.bulk_create([
+            Order(user=self.staff, category=self.categories[index % 2], date=self.today, price=30)
+            for index in range(BATCH_SIZE + 1)
+        ])
+        for document in self.documents(layout='columns'):
+            self.assertEqual(len(document['rows']), BATCH_SIZE + 1)
+            self.assertEqual(len(document['rows'][-1]), len(document['fields']))
+        user_orders, today_orders, orders_by_date = self.documents()
+        self.assertEqual(len(user_orders['orders']), BATCH_SIZE + 1)
+        self.assertEqual(today_orders['total_orders'], BATCH_SIZE + 1)
+        self.assertEqual(len(orders_by_date['orders_by_user'][str(self.staff.id)]['orders']), BATCH_SIZE + 1)
+
+    def test_iter_document_batches(self):
+        for count in (0, 1, 2, 3, 4, 5):
+            chunks = list(iter_document('items', range(count), extra={'page': 1}, trailer=lambda: {'n': count}, batch_size=2))
+            self.assertEqual(json.loads(''.join(chunks)), {'page': 1, 'items': list(range(count)), 'n': count})
+
+            pairs = ((f'k{index}', index) for index in range(count))
+            document = ''.join(iter_document('members', pairs, encode=member_encoder, brackets='{}', batch_size=2))
+            self.assertEqual(json.loads(document), {'members': {f'k{index}': index for index in range(count)}})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DailyOrderSummaryTests(CacheResetMixin, TestCase):
+    """Order writes adjust the per-day index incrementally"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.user = create_user('staff')
+        cls.category = Category.objects.create(name='Lunch', price=30)
+
+    def summaries(self):
+        return {
+            summary.date: (summary.order_count, summary.total_amount)
+            for summary in DailyOrderSummary.objects.all()
+        }
+
+    def rebuilt(self):
+        for day in {self.today, self.today + timedelta(days=1)}:
+            DailyOrderSummary.refresh(day)
+        return self.summaries()
+
+    def create_order(self, **kwargs):
+        return Order.objects.create(user=self.user, category=self.category, date=self.today, price=30, **kwargs)
+
+    def test_insert_does_not_rescan_the_day(self):
+        self.create_order()
+        with CaptureQueriesContext(connection) as queries:
+            self.create_order()
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        self.assertEqual(self.summaries(), {self.today: (2, Decimal(60))})
+
+    def test_updates_and_deletes_match_a_rebuild(self):
+        first, second, third = self.create_order(), self.create_order(), self.create_order()
+
+        second.price = 45
+        second.save()
+        third.date = self.today + timedelta(days=1)
+        third.save()
+        first.notes = 'No onion'
+        first.save(update_fields=['notes'])
+        first.status = 'cancelled'
+        first.save()
+        expected = {self.today: (2, Decimal(75)), self.today + timedelta(days=1): (1, Decimal(30))}
+        self.assertEqual(self.summaries(), expected)
+        self.assertEqual(self.rebuilt(), expected)
+
+        third.delete()
+        self.assertEqual(self.summaries(), {self.today: (2, Decimal(75))})
+        first.delete()
+        second.delete()
+        self.assertEqual(self.summaries(), {})
+
+    def test_add_orders_after_bulk_create(self):
+        orders = Order.objects.bulk_create([
+            Order(user=self.user, category=self.category, date=self.today + timedelta(days=index % 2), price=30)
+            for index in range(5)
+        ])
+        DailyOrderSummary.add_orders(orders)
+        self.assertEqual(self.summaries(), self.rebuilt())
+        DailyOrderSummary.add_orders(orders, sign=-1)
+        self.assertEqual(self.summaries(), {})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BatchedOrderDeletesTests(CacheResetMixin, TestCase):
+    """Deleting many orders updates each day, category and user once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.now().date()
+        cls.staff = create_user('staff')
+        cls.other = create_user('other')
+        cls.admin = User.objects.create_superuser('admin', password='password')
+        cls.lunch = Category.objects.create(name='Lunch', price=30, daily_capacity=50)
+        for days_ago in range(30):
+            day = cls.today - timedelta(days=days_ago % 3)
+            reserve(cls.lunch.id, day, cls.lunch.daily_capacity)
+            Order.objects.create(user=cls.staff, category=cls.lunch, date=day, price=30)
+        reserve(cls.lunch.id, cls.today, cls.lunch.daily_capacity)
+        Order.objects.create(user=cls.other, category=cls.lunch, date=cls.today, price=30)
+
+    def assertOrdersOfStaffRemoved(self):
+        self.assertFalse(Order.objects.filter(user_id=self.staff.id).exists())
+        self.assertEqual(
+            {summary.date: summary.order_count for summary in DailyOrderSummary.objects.all()},
+            {self.today: 1},
+        )
+        self.assertEqual(
+            {counter.date: counter.remaining for counter in DailyCapacity.objects.filter(category=self.lunch)},
+            {self.today - timedelta(days=days_ago): 50 - (days_ago == 0) for days_ago in range(3)},
+        )
+
+    def test_user_delete_cascades_in_one_pass(self):
+        version = get_data_version(user_orders_version_key(self.staff.id))
+        with detect_n_plus_one(mode='raise'), batched_order_deletes() as deleted:
+            self.staff.delete()
+        self.assertEqual(len(deleted), 30)
+        self.assertOrdersOfStaffRemoved()
+        self.assertNotEqual(get_data_version(user_orders_version_key(self.staff.id)), version)
+
+    # The confirmation's list of the user's orders reads each order's category
+    @override_settings(NPLUSONE_MODE='off')
+    def test_admin_user_delete(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:auth_user_delete', args=[self.staff.id]), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertOrdersOfStaffRemoved()
+
+    def test_failed_block_leaves_derived_state_alone(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic(), batched_order_deletes() as deleted:
+                Order.objects.filter(user=self.staff).delete()
+                raise RuntimeError
+        self.assertEqual(len(deleted), 30)
+        self.assertEqual(DailyOrderSummary.objects.get(date=self.today).order_count, 11)
+        self.assertEqual(DailyCapacity.objects.get(category=self.lunch, date=self.today).remaining, 39)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LoginGovernorTests(CacheResetMixin, TestCase):
+    """The canteen's lunch burst from one NAT address gets through; one account cannot be hammered"""
+
+    def attempt(self, username):
+        return password_attempt_delay(RequestFactory().post('/orders/login/', REMOTE_ADDR='10.0.0.1'), username)
+
+    def test_lunch_burst_from_one_address_is_allowed(self):
+        self.assertEqual([self.attempt(f'staff{index}') for index in range(300)], [0] * 300)
+
+    def test_one_username_is_limited(self):
+        delays = [self.attempt('staff1') for _ in range(6)]
+        self.assertEqual(delays[:5], [0] * 5)
+        self.assertGreater(delays[5], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, COMPRESSION_MIN_SIZE=0)
+class CompressionTests(CacheResetMixin, TestCase):
+    """Compressed responses keep the random gzip padding against BREACH"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_user('staff')
+        category = Category.objects.create(name='Lunch', price=30)
+        Order.objects.create(user=cls.staff, category=category, date=timezone.now().date(), price=30)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def padding(self, body):
+        """The gzip FNAME field, which carries the random padding"""
+        self.assertEqual(body[:4], b'\x1f\x8b\x08\x08')
+        return body[10:body.index(b'\x00', 10)]
+
+    def test_streamed_json_is_padded_gzip(self):
+        lengths = set()
+        for _ in range(10):
+            response = self.client.get(reverse('orders:user_orders'), headers={'Accept-Encoding': 'gzip'})
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            body = b''.join(response)
+            lengths.add(len(self.padding(body)))
+            self.assertEqual(len(json.loads(gzip.decompress(body))['orders']), 1)
+        self.assertGreater(len(lengths), 1)
+
+    def test_html_stays_on_padded_gzip(self):
+        response = self.client.get(reverse('orders:profile'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.padding(response.content)
+        self.assertIn(b'<html', gzip.decompress(response.content))
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_json_uses_brotli(self):
+        response = self.client.get(reverse('orders:user_orders'), headers={'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(b''.join(response)))['orders']), 1)
@@ -0,0 +1,67 @@
+"""
+Token-bucket governor for requests that hash a password.
+
+Buckets live in the shared cache so every worker process sees the same
+counts. Reads and writes are not atomic, so concurrent requests can
+occasionally overspend a bucket by a token or two; that is fine for
+keeping login bursts from starving order placement of CPU.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = 'food:login-bucket'
+
+
+def _cache():
+    return caches[getattr(settings, 'AGGREGATE_CACHE_ALIAS', 'default')]
+
+
+def take_token(key, burst, refill_per_second):
+    """
+    Spend one token from the bucket stored under key.
+
+    Returns 0 if the request may go ahead, otherwise the number of
+    seconds until the next token is available.
+    """
+    cache = _cache()
+    now = time.time()
+    tokens, updated = cache.get(key) or (burst, now)
+    tokens = min(burst, tokens + (now - updated) * refill_per_second)
+
+    if tokens < 1:
+        return math.ceil((1 - tokens) / refill_per_second)
+
+    # Keep the bucket only as long as it takes to refill completely
+    timeout = math.ceil(burst / refill_per_second)
+    cache.set(key, (tokens - 1, now), timeout)
+    return 0
+
+
+def _bucket_key(kind, value):
+    digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:{kind}:{digest}'
+
+
+def password_attempt_delay(request, username=None):
+    """
+    Charge a password attempt to the client IP and, if given, the username.
+
+    Returns the seconds the client has to wait, or 0 if the attempt is allowed.
+    """
+    ip_address = request.META.get('REMOTE_ADDR') or 'unknown'
+    delay = take_token(
+        _bucket_key('ip', ip_address),
+        settings.LOGIN_IP_BURST,
+        settings.LOGIN_IP_REFILL_PER_SECOND,
+    )
+    if delay or not username:
+        return delay
+    return take_token(
+        _bucket_key('username', username.strip().lower()),
+        settings.LOGIN_USERNAME_BURST,
+        settings.LOGIN_USERNAME_REFILL_PER_SECOND,
+    )